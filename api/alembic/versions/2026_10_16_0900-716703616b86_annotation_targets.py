@@ -0,0 +1,80 @@
+"""annotation targets
+
+Revision ID: 716703616b86
+Revises: 2088c7ea8d55
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '716703616b86'
+down_revision: Union[str, None] = '2088c7ea8d55'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Create normalized target index table
+    op.create_table(
+        'annotation_targets',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('annotation_id', sa.Integer(), nullable=False),
+        sa.Column('target_id', sa.Integer(), nullable=True),
+        sa.Column('source_kind', sa.String(length=50), nullable=False),
+        sa.Column('source_id', sa.Integer(), nullable=False),
+        sa.Column('start', sa.Integer(), nullable=True),
+        sa.Column('end', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['annotation_id'], ['app.annotations.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        schema='app'
+    )
+    op.create_index(op.f('ix_app_annotation_targets_id'), 'annotation_targets', ['id'], unique=False, schema='app')
+
+    # Backfill from existing annotations, flattening nested (one level deep) target lists
+    op.execute("""
+        INSERT INTO app.annotation_targets (annotation_id, target_id, source_kind, source_id, start, "end")
+        SELECT
+            a.id,
+            (t.value ->> 'id')::int,
+            split_part(trim(both '/' from t.value ->> 'source'), '/', 1),
+            split_part(trim(both '/' from t.value ->> 'source'), '/', 2)::int,
+            (t.value -> 'selector' -> 'refined_by' ->> 'start')::int,
+            (t.value -> 'selector' -> 'refined_by' ->> 'end')::int
+        FROM app.annotations a
+        CROSS JOIN LATERAL jsonb_array_elements(
+            CASE WHEN jsonb_typeof(a.target) = 'array' THEN a.target ELSE '[]'::jsonb END
+        ) AS e
+        CROSS JOIN LATERAL jsonb_array_elements(
+            CASE WHEN jsonb_typeof(e.value) = 'array' THEN e.value ELSE jsonb_build_array(e.value) END
+        ) AS t
+        WHERE jsonb_typeof(t.value) = 'object'
+            AND CASE
+                WHEN trim(both '/' from t.value ->> 'source') ~ '^(DocumentElements|Annotation)/[0-9]+$'
+                -- source_id is int4; larger IDs are skipped, as the service does
+                THEN split_part(trim(both '/' from t.value ->> 'source'), '/', 2)::numeric <= 2147483647
+                ELSE false
+            END
+    """)
+
+    # Indexes are created after the backfill so the bulk insert does not maintain them row by row
+    op.create_index('idx_annotation_targets_annotation_id', 'annotation_targets', ['annotation_id'], schema='app')
+    op.create_index(
+        'idx_annotation_targets_source',
+        'annotation_targets',
+        ['source_kind', 'source_id', 'annotation_id'],
+        schema='app'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_annotation_targets_source', table_name='annotation_targets', schema='app')
+    op.drop_index('idx_annotation_targets_annotation_id', table_name='annotation_targets', schema='app')
+    op.drop_index(op.f('ix_app_annotation_targets_id'), table_name='annotation_targets', schema='app')
+    op.drop_table('annotation_targets', schema='app')
@@ -0,0 +1,62 @@
+"""keyset pagination indexes
+
+Revision ID: 9c3e5b7a1d42
+Revises: 716703616b86
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3e5b7a1d42'
+down_revision: Union[str, None] = '716703616b86'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Annotation listings filter by motivation/classroom or element and page by id
+    op.create_index(
+        'idx_annotations_motivation_classroom_id',
+        'annotations',
+        ['motivation', 'classroom_id', 'id'],
+        schema='app'
+    )
+    op.create_index(
+        'idx_annotations_document_element_id_id',
+        'annotations',
+        ['document_element_id', 'id'],
+        schema='app'
+    )
+    # Document listings filter by collection and page by id
+    op.create_index(
+        'idx_documents_collection_id_id',
+        'documents',
+        ['document_collection_id', 'id'],
+        schema='app'
+    )
+    # Element listings page by (element_order, id) within a document; the
+    # expression must match DocumentElementService._element_order
+    op.create_index(
+        'idx_document_elements_document_order',
+        'document_elements',
+        [
+            'document_id',
+            sa.text("coalesce(CAST((hierarchy ->> 'element_order') AS INTEGER), 2147483647)"),
+            'id',
+        ],
+        schema='app'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_document_elements_document_order', table_name='document_elements', schema='app')
+    op.drop_index('idx_documents_collection_id_id', table_name='documents', schema='app')
+    op.drop_index('idx_annotations_document_element_id_id', table_name='annotations', schema='app')
+    op.drop_index('idx_annotations_motivation_classroom_id', table_name='annotations', schema='app')
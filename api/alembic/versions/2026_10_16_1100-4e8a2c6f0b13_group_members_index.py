@@ -0,0 +1,33 @@
+"""group members index
+
+Revision ID: 4e8a2c6f0b13
+Revises: 9c3e5b7a1d42
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e8a2c6f0b13'
+down_revision: Union[str, None] = '9c3e5b7a1d42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Classroom membership checks are EXISTS probes on (group_id, user_id)
+    op.create_index(
+        'idx_group_members_group_user',
+        'group_members',
+        ['group_id', 'user_id'],
+        schema='app'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_group_members_group_user', table_name='group_members', schema='app')
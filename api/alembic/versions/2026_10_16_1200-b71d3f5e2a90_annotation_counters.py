@@ -0,0 +1,97 @@
+"""annotation counters
+
+Revision ID: b71d3f5e2a90
+Revises: 4e8a2c6f0b13
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71d3f5e2a90'
+down_revision: Union[str, None] = '4e8a2c6f0b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SCHOLARLY = "('scholarly', 'highlighting', 'bookmarking', 'classifying')"
+
+ANNOTATION_COUNTS = f"""
+    SELECT {{key}} AS scope_id,
+        count(*) FILTER (WHERE motivation IN {SCHOLARLY}) AS scholarly_count,
+        count(*) FILTER (WHERE motivation = 'commenting') AS comment_count,
+        count(*) AS annotation_count
+    FROM app.annotations
+    WHERE {{key}} IS NOT NULL
+    GROUP BY {{key}}
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Maintained statistics per element, document and collection
+    op.create_table(
+        'annotation_counters',
+        sa.Column('scope', sa.String(length=20), nullable=False),
+        sa.Column('scope_id', sa.Integer(), nullable=False),
+        sa.Column('scholarly_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('comment_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('annotation_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('element_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('document_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('scope', 'scope_id'),
+        schema='app'
+    )
+
+    # Backfill every existing element, document and collection
+    op.execute(f"""
+        INSERT INTO app.annotation_counters
+            (scope, scope_id, scholarly_count, comment_count, annotation_count, element_count, document_count)
+        SELECT 'element', e.id,
+            coalesce(a.scholarly_count, 0), coalesce(a.comment_count, 0), coalesce(a.annotation_count, 0), 0, 0
+        FROM app.document_elements e
+        LEFT JOIN ({ANNOTATION_COUNTS.format(key='document_element_id')}) a ON a.scope_id = e.id
+    """)
+    op.execute(f"""
+        INSERT INTO app.annotation_counters
+            (scope, scope_id, scholarly_count, comment_count, annotation_count, element_count, document_count)
+        SELECT 'document', d.id,
+            coalesce(a.scholarly_count, 0), coalesce(a.comment_count, 0), coalesce(a.annotation_count, 0),
+            coalesce(e.element_count, 0), 0
+        FROM app.documents d
+        LEFT JOIN ({ANNOTATION_COUNTS.format(key='document_id')}) a ON a.scope_id = d.id
+        LEFT JOIN (
+            SELECT document_id, count(*) AS element_count
+            FROM app.document_elements
+            GROUP BY document_id
+        ) e ON e.document_id = d.id
+    """)
+    op.execute(f"""
+        INSERT INTO app.annotation_counters
+            (scope, scope_id, scholarly_count, comment_count, annotation_count, element_count, document_count)
+        SELECT 'collection', c.id,
+            coalesce(a.scholarly_count, 0), coalesce(a.comment_count, 0), coalesce(a.annotation_count, 0),
+            coalesce(e.element_count, 0), coalesce(d.document_count, 0)
+        FROM app.document_collections c
+        LEFT JOIN ({ANNOTATION_COUNTS.format(key='document_collection_id')}) a ON a.scope_id = c.id
+        LEFT JOIN (
+            SELECT d.document_collection_id, count(*) AS element_count
+            FROM app.document_elements e
+            JOIN app.documents d ON d.id = e.document_id
+            GROUP BY d.document_collection_id
+        ) e ON e.document_collection_id = c.id
+        LEFT JOIN (
+            SELECT document_collection_id, count(*) AS document_count
+            FROM app.documents
+            GROUP BY document_collection_id
+        ) d ON d.document_collection_id = c.id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('annotation_counters', schema='app')
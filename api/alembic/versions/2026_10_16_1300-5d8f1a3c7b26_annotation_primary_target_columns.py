@@ -0,0 +1,78 @@
+"""annotation primary target columns
+
+Revision ID: 5d8f1a3c7b26
+Revises: b71d3f5e2a90
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8f1a3c7b26'
+down_revision: Union[str, None] = 'b71d3f5e2a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Annotations backfilled per UPDATE, so each batch holds its row locks briefly
+BATCH_SIZE = 10000
+
+# Source of the primary target; targets may be nested one level deep
+PRIMARY_SOURCE = "trim(both '/' from coalesce(target -> 0 ->> 'source', target -> 0 -> 0 ->> 'source'))"
+
+# The primary target's ID when it is a source of the given kind that fits in int4, else NULL
+PRIMARY_ID = f"""CASE WHEN {PRIMARY_SOURCE} ~ '^{{kind}}/[0-9]+$'
+    THEN CASE WHEN split_part({PRIMARY_SOURCE}, '/', 2)::numeric <= 2147483647
+        THEN split_part({PRIMARY_SOURCE}, '/', 2)::int END END"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('annotations', sa.Column('target_element_id', sa.Integer(), nullable=True), schema='app')
+    op.add_column('annotations', sa.Column('target_annotation_id', sa.Integer(), nullable=True), schema='app')
+
+    conn = op.get_bind()
+    max_id = conn.execute(sa.text("SELECT coalesce(max(id), 0) FROM app.annotations")).scalar_one()
+
+    # Commit each batch on its own so the backfill never holds the whole table
+    with op.get_context().autocommit_block():
+        for lower in range(0, max_id + 1, BATCH_SIZE):
+            conn.execute(
+                sa.text(f"""
+                    UPDATE app.annotations SET
+                        target_element_id = {PRIMARY_ID.format(kind='DocumentElements')},
+                        target_annotation_id = {PRIMARY_ID.format(kind='Annotation')}
+                    WHERE id >= :lower AND id < :upper
+                """),
+                {"lower": lower, "upper": lower + BATCH_SIZE},
+            )
+
+        # Built after the backfill, without blocking writes
+        op.create_index(
+            'idx_annotations_target_element_id',
+            'annotations',
+            ['target_element_id'],
+            schema='app',
+            postgresql_where=sa.text('target_element_id IS NOT NULL'),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'idx_annotations_target_annotation_id',
+            'annotations',
+            ['target_annotation_id', 'motivation'],
+            schema='app',
+            postgresql_where=sa.text('target_annotation_id IS NOT NULL'),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_annotations_target_annotation_id', table_name='annotations', schema='app')
+    op.drop_index('idx_annotations_target_element_id', table_name='annotations', schema='app')
+    op.drop_column('annotations', 'target_annotation_id', schema='app')
+    op.drop_column('annotations', 'target_element_id', schema='app')
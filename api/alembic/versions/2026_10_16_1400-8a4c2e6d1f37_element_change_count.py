@@ -0,0 +1,33 @@
+"""element change count
+
+Revision ID: 8a4c2e6d1f37
+Revises: 5d8f1a3c7b26
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4c2e6d1f37'
+down_revision: Union[str, None] = '5d8f1a3c7b26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Versions the per-element annotation endpoints for conditional GETs
+    op.add_column(
+        'annotation_counters',
+        sa.Column('change_count', sa.Integer(), nullable=False, server_default='0'),
+        schema='app'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('annotation_counters', 'change_count', schema='app')
@@ -0,0 +1,54 @@
+"""annotation delta sync
+
+Revision ID: c3e7a9b1d5f2
+Revises: 8a4c2e6d1f37
+Create Date: 2026-10-16 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e7a9b1d5f2'
+down_revision: Union[str, None] = '8a4c2e6d1f37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Changed annotations are found by modification time
+    op.create_index('idx_annotations_modified', 'annotations', ['modified'], schema='app')
+
+    # Deletion log read by delta sync
+    op.create_table(
+        'annotation_tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('annotation_id', sa.Integer(), nullable=False),
+        sa.Column('document_id', sa.Integer(), nullable=False),
+        sa.Column('document_element_id', sa.Integer(), nullable=False),
+        sa.Column('classroom_id', sa.Integer(), nullable=True),
+        sa.Column('deleted', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        schema='app'
+    )
+    op.create_index(
+        'idx_annotation_tombstones_document_deleted',
+        'annotation_tombstones',
+        ['document_id', 'deleted'],
+        schema='app'
+    )
+    op.create_index(
+        'idx_annotation_tombstones_deleted', 'annotation_tombstones', ['deleted'], schema='app'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_annotation_tombstones_deleted', table_name='annotation_tombstones', schema='app')
+    op.drop_index('idx_annotation_tombstones_document_deleted', table_name='annotation_tombstones', schema='app')
+    op.drop_table('annotation_tombstones', schema='app')
+    op.drop_index('idx_annotations_modified', table_name='annotations', schema='app')
@@ -0,0 +1,73 @@
+"""annotation tags
+
+Revision ID: e1b6d94a2c8f
+Revises: c3e7a9b1d5f2
+Create Date: 2026-10-16 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1b6d94a2c8f'
+down_revision: Union[str, None] = 'c3e7a9b1d5f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Tag index: one row per tagging annotation and object it tags
+    op.create_table(
+        'annotation_tags',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('annotation_id', sa.Integer(), nullable=False),
+        sa.Column('tag', sa.String(length=255), nullable=False),
+        sa.Column('source_kind', sa.String(length=50), nullable=False),
+        sa.Column('source_id', sa.Integer(), nullable=False),
+        sa.Column('document_collection_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['annotation_id'], ['app.annotations.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        schema='app'
+    )
+
+    # Backfill from existing tagging annotations, normalizing tags the way the service does
+    op.execute("""
+        INSERT INTO app.annotation_tags (annotation_id, tag, source_kind, source_id, document_collection_id)
+        SELECT
+            a.id,
+            left(lower(btrim(regexp_replace(a.body ->> 'value', '\\s+', ' ', 'g'))), 255),
+            t.source_kind,
+            t.source_id,
+            a.document_collection_id
+        FROM app.annotations a
+        JOIN app.annotation_targets t ON t.annotation_id = a.id
+        WHERE a.motivation = 'tagging'
+            AND coalesce(btrim(regexp_replace(a.body ->> 'value', '\\s+', ' ', 'g')), '') <> ''
+    """)
+
+    # Indexes are created after the backfill so the bulk insert does not maintain them row by row
+    op.create_index(
+        'idx_annotation_tags_tag_source',
+        'annotation_tags',
+        ['tag', 'source_kind', 'source_id'],
+        schema='app'
+    )
+    op.create_index(
+        'idx_annotation_tags_collection_tag',
+        'annotation_tags',
+        ['document_collection_id', 'tag'],
+        schema='app'
+    )
+    op.create_index('idx_annotation_tags_annotation_id', 'annotation_tags', ['annotation_id'], schema='app')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_annotation_tags_annotation_id', table_name='annotation_tags', schema='app')
+    op.drop_index('idx_annotation_tags_collection_tag', table_name='annotation_tags', schema='app')
+    op.drop_index('idx_annotation_tags_tag_source', table_name='annotation_tags', schema='app')
+    op.drop_table('annotation_tags', schema='app')
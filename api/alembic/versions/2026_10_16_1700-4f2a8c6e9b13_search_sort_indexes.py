@@ -0,0 +1,62 @@
+"""search sort indexes
+
+Revision ID: 4f2a8c6e9b13
+Revises: e1b6d94a2c8f
+Create Date: 2026-10-16 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f2a8c6e9b13'
+down_revision: Union[str, None] = 'e1b6d94a2c8f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Search pages sorted by title, created or modified walk these in order
+    op.create_index(
+        'idx_documents_title_sort',
+        'documents',
+        [sa.text("(coalesce(title, '') COLLATE \"C\")"), 'id'],
+        schema='app'
+    )
+    op.create_index(
+        'idx_document_elements_created_sort',
+        'document_elements',
+        [sa.text("coalesce(created, 'epoch'::timestamp)"), 'id'],
+        schema='app'
+    )
+    op.create_index(
+        'idx_document_elements_modified_sort',
+        'document_elements',
+        [sa.text("coalesce(modified, 'epoch'::timestamp)"), 'id'],
+        schema='app'
+    )
+    op.create_index(
+        'idx_annotations_created_sort',
+        'annotations',
+        [sa.text("coalesce(created, 'epoch'::timestamp)"), 'id'],
+        schema='app'
+    )
+    op.create_index(
+        'idx_annotations_modified_sort',
+        'annotations',
+        [sa.text("coalesce(modified, 'epoch'::timestamp)"), 'id'],
+        schema='app'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_annotations_modified_sort', table_name='annotations', schema='app')
+    op.drop_index('idx_annotations_created_sort', table_name='annotations', schema='app')
+    op.drop_index('idx_document_elements_modified_sort', table_name='document_elements', schema='app')
+    op.drop_index('idx_document_elements_created_sort', table_name='document_elements', schema='app')
+    op.drop_index('idx_documents_title_sort', table_name='documents', schema='app')
@@ -0,0 +1,110 @@
+"""
+Benchmark for annotation list serialization.
+
+Seeds one document element with N comments (each with one reply and one
+upvote) inside a transaction, loads them through AnnotationService.list and
+AnnotationQueryService.get_by_motivation, and times turning the result into
+JSON bytes two ways:
+
+- response_model: what FastAPI does for `List[Annotation]` responses,
+  validating every row through the schema, dumping it and encoding with json
+- fast: AnnotationSerializer building dicts from the rows and encoding them
+  with orjson (or json when orjson is not installed)
+
+Everything is rolled back afterwards.
+
+Usage (from the api directory, against a migrated PostgreSQL database):
+
+    SQLALCHEMY_DATABASE_URL=postgresql://... python -m benchmarks.bench_annotation_serialization
+"""
+
+import json
+import statistics
+import time
+from typing import Dict, List
+
+from pydantic import TypeAdapter
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from database import engine
+from models.models import User
+from schemas.annotations import Annotation
+from services.annotation_query_service import annotation_query_service
+from services.annotation_serializer import annotation_serializer, orjson
+from services.annotation_service import annotation_service
+
+from benchmarks.bench_get_by_motivation import ELEMENT_ID, _seed
+
+SIZES = [100, 500, 1000, 2000]
+REPEATS = 5
+
+LIST_ADAPTER = TypeAdapter(List[Annotation])
+GROUPED_ADAPTER = TypeAdapter(Dict[str, List[Annotation]])
+
+
+def _response_model(adapter: TypeAdapter, payload) -> bytes:
+    validated = adapter.validate_python(payload, from_attributes=True)
+    return json.dumps(adapter.dump_python(validated, mode="json")).encode()
+
+
+def _median_ms(encode) -> float:
+    encode()  # warm up: lazy loads happen here, not in the timed runs
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        encode()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main() -> None:
+    encoder = "orjson" if orjson is not None else "json"
+    print(f"fast path encoder: {encoder}")
+    print(
+        f"{'endpoint':>14} {'rows':>6} {'response_model ms':>18} {'fast ms':>8} {'speedup':>8}"
+    )
+
+    for size in SIZES:
+        with engine.connect() as connection:
+            transaction = connection.begin()
+            db = Session(bind=connection)
+            try:
+                creator = User(username=f"bench-{time.time_ns()}", first_name="Bench", last_name="User")
+                db.add(creator)
+                db.flush()
+
+                _seed(db, creator.id, size)
+                db.execute(text("ANALYZE app.annotation_targets"))
+
+                # Rows are loaded once; only serialization is timed
+                listed = annotation_service.list(db, None, limit=size * 3)
+                grouped = annotation_query_service.get_by_motivation(db, ELEMENT_ID, None)
+
+                cases = [
+                    (
+                        "list",
+                        len(listed),
+                        lambda: _response_model(LIST_ADAPTER, listed),
+                        lambda: annotation_serializer.dumps(annotation_serializer.annotations(listed)),
+                    ),
+                    (
+                        "by-motivation",
+                        sum(len(v) for v in grouped.values()),
+                        lambda: _response_model(GROUPED_ADAPTER, grouped),
+                        lambda: annotation_serializer.dumps(annotation_serializer.grouped(grouped)),
+                    ),
+                ]
+                for name, rows, slow, fast in cases:
+                    slow_ms, fast_ms = _median_ms(slow), _median_ms(fast)
+                    print(
+                        f"{name:>14} {rows:>6} {slow_ms:>18.2f} {fast_ms:>8.2f} "
+                        f"{slow_ms / max(fast_ms, 1e-9):>7.1f}x"
+                    )
+            finally:
+                db.close()
+                transaction.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark for AnnotationQueryService.get_by_motivation.
+
+Seeds one document element with N comments (each with one reply and one
+upvote) inside a transaction, times get_by_motivation for increasing N and
+rolls everything back. Per-annotation latency should stay flat as N grows,
+since every thread level is an index probe on annotation_targets.
+
+Usage (from the api directory, against a migrated PostgreSQL database):
+
+    SQLALCHEMY_DATABASE_URL=postgresql://... python -m benchmarks.bench_get_by_motivation
+"""
+
+import statistics
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from database import engine
+from models.models import Annotation, User
+from services.annotation_query_service import annotation_query_service
+from services.annotation_target_service import annotation_target_service
+
+SIZES = [10, 100, 500, 1000, 2000]
+REPEATS = 5
+
+# Far above any real element ID so seeded rows never mix with existing data
+ELEMENT_ID = 2_000_000_000
+
+
+def _body(value: str) -> dict:
+    return {"type": "TextualBody", "value": value, "format": "text/plain", "language": "en"}
+
+
+def _annotation(creator_id: int, motivation: str, source: str) -> Annotation:
+    now = datetime.now()
+    return Annotation(
+        creator_id=creator_id,
+        motivation=motivation,
+        body=_body(motivation),
+        target=[{"type": "Target", "source": source}],
+        created=now,
+        modified=now,
+    )
+
+
+def _seed(db: Session, creator_id: int, comment_count: int) -> None:
+    comments = [
+        _annotation(creator_id, "commenting", f"DocumentElements/{ELEMENT_ID}")
+        for _ in range(comment_count)
+    ]
+    db.add_all(comments)
+    db.flush()
+
+    children = []
+    for comment in comments:
+        children.append(_annotation(creator_id, "replying", f"Annotation/{comment.id}"))
+        children.append(_annotation(creator_id, "upvoting", f"Annotation/{comment.id}"))
+    db.add_all(children)
+    db.flush()
+
+    for annotation in [*comments, *children]:
+        annotation_target_service.sync(db, annotation.id, annotation.target)
+    db.flush()
+
+
+def _time_query(db: Session) -> tuple[float, int]:
+    timings = []
+    total = 0
+    for _ in range(REPEATS):
+        db.expunge_all()
+        start = time.perf_counter()
+        grouped = annotation_query_service.get_by_motivation(db, ELEMENT_ID, None)
+        timings.append(time.perf_counter() - start)
+        total = sum(len(v) for v in grouped.values())
+    return statistics.median(timings), total
+
+
+def main() -> None:
+    print(f"{'comments':>10} {'rows':>8} {'median ms':>10} {'us/row':>8}")
+
+    for size in SIZES:
+        with engine.connect() as connection:
+            transaction = connection.begin()
+            db = Session(bind=connection)
+            try:
+                creator = User(username=f"bench-{time.time_ns()}", first_name="Bench", last_name="User")
+                db.add(creator)
+                db.flush()
+
+                _seed(db, creator.id, size)
+                db.execute(text("ANALYZE app.annotation_targets"))
+
+                seconds, rows = _time_query(db)
+                print(
+                    f"{size:>10} {rows:>8} {seconds * 1000:>10.2f} "
+                    f"{seconds * 1_000_000 / max(rows, 1):>8.1f}"
+                )
+            finally:
+                db.close()
+                transaction.rollback()
+
+
+if __name__ == "__main__":
+    main()
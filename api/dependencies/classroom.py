@@ -5,7 +5,7 @@ from sqlalchemy import select
 from sqlalchemy.orm import joinedload
 
 from routers.auth_utils import get_session_user
-from database import get_db
+from database import get_db, SessionLocal
 from models.models import User, Group
 
 
@@ -123,6 +123,24 @@ def get_classroom_context(
     return classroom_id
 
 
+def get_classroom_context_unscoped(
+    request: Request,
+    classroom_id: Optional[int] = Query(
+        None, description="ID of the classroom context"
+    ),
+) -> Optional[int]:
+    """
+    Get and validate classroom context on a short-lived session of its own.
+
+    For long-lived responses such as event streams: the request-scoped get_db
+    session is only closed when the response finishes, so it would hold a
+    pooled connection for as long as the client stays connected.
+    """
+    with SessionLocal() as db:
+        current_user = get_current_user_optional(request, db)
+        return get_classroom_context(classroom_id, current_user, db)
+
+
 def get_user_classrooms(
     current_user: User = Depends(get_current_user_sync), db: Session = Depends(get_db)
 ) -> list[Group]:
@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -15,16 +17,26 @@ load_dotenv()
 from routers.cas_auth import router as cas_router
 from routers.auth import router as auth_router 
 
-from database import engine
+from database import engine, SessionLocal
 from models import models
+from services.link_graph_service import link_graph_service
 
 # Create tables in the database
 models.Base.metadata.create_all(bind=engine)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the intertext link graph before serving, so link reads never scan annotations
+    link_graph_service.start(SessionLocal)
+    yield
+    link_graph_service.stop()
+
+
 app = FastAPI(
     title="Document Annotation API",
     description="API for managing document annotations",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configure session middleware
@@ -40,6 +52,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["X-Next-Cursor"],  # Keyset pagination cursor on list endpoints
 )
 
 # Include routers
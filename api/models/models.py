@@ -13,7 +13,7 @@ from sqlalchemy import (
 )
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
-from sqlalchemy import Sequence, Index
+from sqlalchemy import Sequence, Index, literal_column
 
 from database import Base
 from dotenv import load_dotenv, find_dotenv
@@ -301,6 +301,10 @@ class Annotation(Base):
     body = Column(JSONB)
     target = Column(JSONB)
 
+    # Primary (first) target, maintained on write from `target`
+    target_element_id = Column(Integer, nullable=True)
+    target_annotation_id = Column(Integer, nullable=True)
+
     status = Column(String(50))
     annotation_type = Column(String(100))
     context = Column(String(255))
@@ -320,6 +324,71 @@ class Annotation(Base):
     classroom = relationship("Group", foreign_keys=[classroom_id])
 
 
+class AnnotationTarget(Base):
+    __tablename__ = "annotation_targets"
+    __table_args__ = {"schema": "app"}
+
+    id = Column(Integer, primary_key=True, index=True)
+    annotation_id = Column(
+        Integer,
+        ForeignKey(f"{'app'}.annotations.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    target_id = Column(Integer)
+    source_kind = Column(String(50), nullable=False)  # e.g. 'DocumentElements', 'Annotation'
+    source_id = Column(Integer, nullable=False)
+    start = Column(Integer, nullable=True)
+    end = Column(Integer, nullable=True)
+
+
+class AnnotationTag(Base):
+    __tablename__ = "annotation_tags"
+    __table_args__ = {"schema": "app"}
+
+    # One row per tagging annotation and object it tags; backs search tag filters and tag clouds
+    id = Column(Integer, primary_key=True)
+    annotation_id = Column(
+        Integer,
+        ForeignKey(f"{'app'}.annotations.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    tag = Column(String(255), nullable=False)  # normalized: trimmed, single-spaced, lower case
+    source_kind = Column(String(50), nullable=False)  # e.g. 'DocumentElements', 'Annotation'
+    source_id = Column(Integer, nullable=False)
+    document_collection_id = Column(Integer, nullable=True)
+
+
+class AnnotationCounter(Base):
+    __tablename__ = "annotation_counters"
+    __table_args__ = {"schema": "app"}
+
+    # One row per element, document or collection
+    scope = Column(String(20), primary_key=True)  # 'element', 'document', 'collection'
+    scope_id = Column(Integer, primary_key=True)
+
+    scholarly_count = Column(Integer, nullable=False, default=0)
+    comment_count = Column(Integer, nullable=False, default=0)
+    annotation_count = Column(Integer, nullable=False, default=0)
+    element_count = Column(Integer, nullable=False, default=0)
+    document_count = Column(Integer, nullable=False, default=0)
+
+    # Bumped on every annotation write in an element's threads; versions conditional GETs
+    change_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class AnnotationTombstone(Base):
+    __tablename__ = "annotation_tombstones"
+    __table_args__ = {"schema": "app"}
+
+    # One row per deleted annotation and element thread it left; read by delta sync
+    id = Column(Integer, primary_key=True)
+    annotation_id = Column(Integer, nullable=False)
+    document_id = Column(Integer, nullable=False)
+    document_element_id = Column(Integer, nullable=False)
+    classroom_id = Column(Integer, nullable=True)
+    deleted = Column(DateTime, nullable=False)
+
+
 class SiteSettings(Base):
     __tablename__ = "site_settings"
     __table_args__ = {"schema": "app"}
@@ -413,6 +482,8 @@ class CASConfiguration(Base):
 # Indices
 # Foreign key indices
 Index("idx_user_passwords_user_id", UserPassword.user_id)
+# Classroom membership checks probe (group_id, user_id)
+Index("idx_group_members_group_user", group_members.c.group_id, group_members.c.user_id)
 Index("idx_document_collections_created_by", DocumentCollection.created_by_id)
 Index("idx_document_collections_modified_by", DocumentCollection.modified_by_id)
 Index("idx_document_collections_owner", DocumentCollection.owner_id)
@@ -427,6 +498,7 @@ Index("idx_annotations_creator_id", Annotation.creator_id)
 Index("idx_annotations_owner_id", Annotation.owner_id)
 Index("idx_annotations_collection_id", Annotation.document_collection_id)
 Index("idx_annotations_classroom_id", Annotation.classroom_id)
+Index("idx_annotation_targets_annotation_id", AnnotationTarget.annotation_id)
 Index("idx_object_sharing_object", ObjectSharing.object_id, ObjectSharing.object_type)
 Index(
     "idx_object_sharing_shared_with",
@@ -439,6 +511,98 @@ Index("idx_site_settings_updated_by", SiteSettings.updated_by_id)
 Index("idx_annotations_type", Annotation.type)
 Index("idx_annotations_created", Annotation.created)
 Index("idx_annotations_motivation", Annotation.motivation)
+Index("idx_annotations_modified", Annotation.modified)
+
+# Delta sync: deletions per document since a point in time, and pruning by age
+Index(
+    "idx_annotation_tombstones_document_deleted",
+    AnnotationTombstone.document_id,
+    AnnotationTombstone.deleted,
+)
+Index("idx_annotation_tombstones_deleted", AnnotationTombstone.deleted)
+
+# Composite indices backing keyset pagination (filter columns, then sort key, then id)
+Index(
+    "idx_annotations_motivation_classroom_id",
+    Annotation.motivation,
+    Annotation.classroom_id,
+    Annotation.id,
+)
+Index(
+    "idx_annotations_document_element_id_id",
+    Annotation.document_element_id,
+    Annotation.id,
+)
+Index("idx_documents_collection_id_id", Document.document_collection_id, Document.id)
+Index(
+    "idx_document_elements_document_order",
+    DocumentElement.document_id,
+    func.coalesce(DocumentElement.hierarchy["element_order"].as_integer(), 2147483647),
+    DocumentElement.id,
+)
+
+# Annotation target lookups (element -> annotations, annotation -> replies)
+Index(
+    "idx_annotation_targets_source",
+    AnnotationTarget.source_kind,
+    AnnotationTarget.source_id,
+    AnnotationTarget.annotation_id,
+)
+
+# Tag lookups (search tag filters, per-collection tag clouds, maintenance by annotation)
+Index(
+    "idx_annotation_tags_tag_source",
+    AnnotationTag.tag,
+    AnnotationTag.source_kind,
+    AnnotationTag.source_id,
+)
+Index(
+    "idx_annotation_tags_collection_tag",
+    AnnotationTag.document_collection_id,
+    AnnotationTag.tag,
+)
+Index("idx_annotation_tags_annotation_id", AnnotationTag.annotation_id)
+
+# Primary target joins (search -> element, flag -> flagged annotation)
+Index(
+    "idx_annotations_target_element_id",
+    Annotation.target_element_id,
+    postgresql_where=Annotation.target_element_id.isnot(None),
+)
+Index(
+    "idx_annotations_target_annotation_id",
+    Annotation.target_annotation_id,
+    Annotation.motivation,
+    postgresql_where=Annotation.target_annotation_id.isnot(None),
+)
+
+# Search sort orders (see SearchService.SORT_EXPRESSIONS)
+_EPOCH = literal_column("'epoch'::timestamp")
+Index(
+    "idx_documents_title_sort",
+    func.coalesce(Document.title, "").collate("C"),
+    Document.id,
+)
+Index(
+    "idx_document_elements_created_sort",
+    func.coalesce(DocumentElement.created, _EPOCH),
+    DocumentElement.id,
+)
+Index(
+    "idx_document_elements_modified_sort",
+    func.coalesce(DocumentElement.modified, _EPOCH),
+    DocumentElement.id,
+)
+Index(
+    "idx_annotations_created_sort",
+    func.coalesce(Annotation.created, _EPOCH),
+    Annotation.id,
+)
+Index(
+    "idx_annotations_modified_sort",
+    func.coalesce(Annotation.modified, _EPOCH),
+    Annotation.id,
+)
 
 # GIN indices for JSONB fields
 Index("idx_users_metadata", User.user_metadata, postgresql_using="gin")
@@ -0,0 +1,27 @@
+"""
+Recompute the maintained annotation counters and repair any drift.
+
+Counters are kept current by the services; this job catches writes that
+bypassed them (manual SQL, restores, failed requests). Run it periodically,
+e.g. nightly from cron, from the api directory:
+
+    python reconcile_counters.py
+"""
+
+from database import SessionLocal
+from services.annotation_counter_service import annotation_counter_service
+
+
+def main() -> None:
+    db = SessionLocal()
+    try:
+        repaired = annotation_counter_service.reconcile(db)
+    finally:
+        db.close()
+
+    for scope, count in repaired.items():
+        print(f"{scope}: {count} row(s) repaired")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
+import asyncio
+import json
 from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from dotenv import load_dotenv, find_dotenv
 
@@ -10,18 +13,32 @@ from schemas.annotations import (
     AnnotationCreate,
     AnnotationPatch,
     AnnotationAddTarget,
+    AnnotationAggregate,
+    AnnotationAggregatesRequest,
+    AnnotationBulkCreate,
+    AnnotationBulkResult,
 )
 from dependencies.classroom import (
     get_classroom_context,
+    get_classroom_context_unscoped,
     get_current_user_sync,
     get_current_user_optional,
     get_user_classrooms,
 )
 from services.annotation_service import annotation_service
 from services.annotation_query_service import annotation_query_service
+from services.annotation_counter_service import annotation_counter_service
+from services.annotation_serializer import annotation_serializer
+from services.annotation_event_service import annotation_event_service
+from services.link_graph_service import link_graph_service
 
 load_dotenv(find_dotenv())
 
+# Live event stream: idle keep-alive interval, and how long to gather a burst
+# of events before sending it
+STREAM_HEARTBEAT_SECONDS = 15
+STREAM_COALESCE_SECONDS = 0.25
+
 router = APIRouter(
     prefix="/api/v1/annotations",
     tags=["annotations"],
@@ -29,6 +46,45 @@ router = APIRouter(
 )
 
 
+def _element_etag(db: Session, document_element_id: int, *variant: Any) -> str:
+    """Weak ETag from the element's change counter plus whatever else shapes the response."""
+    version = annotation_counter_service.element_version(db, document_element_id)
+    parts = [str(document_element_id), version, *(str(v) for v in variant)]
+    return f'W/"{".".join(parts)}"'
+
+
+def _not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Return a 304 response if the client already holds this version.
+
+    Otherwise set the ETag on the response and return None.
+    """
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        held = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if "*" in held or etag.removeprefix("W/") in held:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return None
+
+
+def _fast_json(payload: Any, response: Response) -> Response:
+    """Encode pre-built dicts, keeping headers already set on the injected response."""
+    headers = {
+        name: value
+        for name, value in response.headers.items()
+        if name != "content-length"
+    }
+    return Response(
+        content=annotation_serializer.dumps(payload),
+        media_type=annotation_serializer.MEDIA_TYPE,
+        headers=headers,
+    )
+
+
 @router.post("/", response_model=Annotation, status_code=status.HTTP_201_CREATED)
 def create_annotation(
     annotation: AnnotationCreate,
@@ -40,24 +96,159 @@ def create_annotation(
     return annotation_service.create(db, annotation, current_user, classroom_id)
 
 
+@router.post("/bulk", response_model=AnnotationBulkResult, status_code=status.HTTP_200_OK)
+def bulk_create_annotations(
+    payload: AnnotationBulkCreate,
+    classroom_id: Optional[int] = Depends(get_classroom_context),
+    current_user: User = Depends(get_current_user_sync),
+    db: Session = Depends(get_db),
+):
+    """
+    Create many annotations in one transaction.
+
+    Valid items are created; invalid items are reported by their index in `errors`.
+    """
+    return annotation_service.bulk_create(
+        db, payload.annotations, current_user, classroom_id
+    )
+
+
 @router.get("/", response_model=List[Annotation], status_code=status.HTTP_200_OK)
 def read_annotations(
+    response: Response,
     motivation: str = None,
     document_element_id: int = None,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    fast: bool = Query(False, description="Serialize rows directly, skipping response validation"),
     classroom_id: Optional[int] = Depends(get_classroom_context),
     current_user: User = Depends(get_current_user_sync),
     db: Session = Depends(get_db),
 ):
-    """Get annotations filtered by classroom context."""
-    return annotation_service.list(
+    """
+    Get annotations filtered by classroom context.
+
+    The cursor for the next page, if any, is returned in the X-Next-Cursor header.
+    """
+    annotations = annotation_service.list(
         db,
         classroom_id,
         motivation=motivation,
         document_element_id=document_element_id,
         skip=skip,
         limit=limit,
+        cursor=cursor,
+    )
+
+    next_cursor = annotation_service.get_next_cursor(annotations, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    if fast:
+        return _fast_json(annotation_serializer.annotations(annotations), response)
+    return annotations
+
+
+@router.get(
+    "/by-elements",
+    response_model=Dict[int, Dict[str, List[Annotation]]],
+    status_code=status.HTTP_200_OK,
+)
+def read_annotations_by_elements(
+    response: Response,
+    element_ids: List[int] = Query(...),
+    fast: bool = Query(False, description="Serialize rows directly, skipping response validation"),
+    classroom_id: Optional[int] = Depends(get_classroom_context),
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db),
+):
+    """Get annotations for several document elements, keyed by element and motivation."""
+    if len(element_ids) > annotation_query_service.MAX_BATCH_ELEMENTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {annotation_query_service.MAX_BATCH_ELEMENTS} element IDs per request",
+        )
+
+    grouped = annotation_query_service.get_by_elements(db, element_ids, classroom_id)
+    if fast:
+        return _fast_json(annotation_serializer.grouped(grouped), response)
+    return grouped
+
+
+@router.post(
+    "/aggregates",
+    response_model=Dict[int, AnnotationAggregate],
+    status_code=status.HTTP_200_OK,
+)
+def read_annotation_aggregates(
+    payload: AnnotationAggregatesRequest,
+    classroom_id: Optional[int] = Depends(get_classroom_context),
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db),
+):
+    """Get reply, upvote and flag counts for several annotations, keyed by annotation ID."""
+    if len(payload.annotation_ids) > annotation_query_service.MAX_BATCH_ANNOTATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {annotation_query_service.MAX_BATCH_ANNOTATIONS} annotation IDs per request",
+        )
+
+    return annotation_query_service.get_aggregates(
+        db,
+        payload.annotation_ids,
+        classroom_id,
+        user_id=current_user.id if current_user else None,
+    )
+
+
+@router.get("/stream", status_code=status.HTTP_200_OK)
+async def stream_annotation_events(
+    request: Request,
+    document_id: Optional[int] = Query(None, description="Document to watch"),
+    classroom_id: Optional[int] = Depends(get_classroom_context_unscoped),
+):
+    """
+    Stream annotation changes as server-sent events.
+
+    Watches one document when `document_id` is given, otherwise the classroom
+    context. Each `annotation` event names the annotation, the change type
+    (created, updated or deleted) and the affected documents and elements;
+    clients refetch what they show. A `resync` event means events were
+    dropped and the client should catch up through delta sync.
+    """
+    if document_id is not None:
+        channel = annotation_event_service.document_channel(document_id)
+    elif classroom_id is not None:
+        channel = annotation_event_service.classroom_channel(classroom_id)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A document_id or classroom_id is required",
+        )
+
+    subscription = annotation_event_service.subscribe(
+        channel, classroom_id, loop=asyncio.get_running_loop()
+    )
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                if not await subscription.wait(STREAM_HEARTBEAT_SECONDS):
+                    yield ": ping\n\n"
+                    continue
+
+                await asyncio.sleep(STREAM_COALESCE_SECONDS)
+                for event in subscription.drain():
+                    name = "resync" if event["type"] == "resync" else "annotation"
+                    yield f"event: {name}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            annotation_event_service.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
@@ -145,14 +336,29 @@ def remove_target_from_annotation(
 )
 def read_annotations_by_motivation(
     document_element_id: int,
+    request: Request,
+    response: Response,
+    fast: bool = Query(False, description="Serialize rows directly, skipping response validation"),
     classroom_id: Optional[int] = Depends(get_classroom_context),
     current_user: Optional[User] = Depends(get_current_user_optional),
     db: Session = Depends(get_db),
 ):
-    """Get annotations grouped by motivation for a document element."""
-    return annotation_query_service.get_by_motivation(
+    """
+    Get annotations grouped by motivation for a document element.
+
+    Answers 304 without loading annotations when If-None-Match holds the current ETag.
+    """
+    etag = _element_etag(db, document_element_id, classroom_id)
+    not_modified = _not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    grouped = annotation_query_service.get_by_motivation(
         db, document_element_id, classroom_id
     )
+    if fast:
+        return _fast_json(annotation_serializer.grouped(grouped), response)
+    return grouped
 
 
 @router.get(
@@ -162,13 +368,28 @@ def read_annotations_by_motivation(
 )
 def fetch_links(
     document_element_id: int,
+    request: Request,
+    response: Response,
+    fast: bool = Query(False, description="Serialize rows directly, skipping response validation"),
     current_user: Optional[User] = Depends(get_current_user_optional),
     db: Session = Depends(get_db),
 ):
-    """Get linking annotations that reference a specific document element."""
-    return annotation_query_service.get_links_for_element(
+    """
+    Get linking annotations that reference a specific document element.
+
+    Answers 304 without loading annotations when If-None-Match holds the current ETag.
+    """
+    etag = _element_etag(db, document_element_id)
+    not_modified = _not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    links = annotation_query_service.get_links_for_element(
         db, document_element_id, classroom_id=None
     )
+    if fast:
+        return _fast_json(annotation_serializer.annotations(links), response)
+    return links
 
 
 @router.get(
@@ -178,11 +399,25 @@ def fetch_links(
 )
 def get_linked_text_info(
     document_element_id: int,
+    request: Request,
+    response: Response,
     current_user: Optional[User] = Depends(get_current_user_optional),
     db: Session = Depends(get_db),
 ):
-    """Returns only the specific documents and elements that are linked."""
-    return annotation_query_service.get_linked_text_info(db, document_element_id)
+    """
+    Returns only the specific documents and elements that are linked.
+
+    Answers 304 without loading annotations when If-None-Match holds the current ETag.
+    """
+    version = annotation_counter_service.element_version(db, document_element_id)
+    etag = f'W/"{document_element_id}.{version}"'
+    not_modified = _not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    return annotation_query_service.get_linked_text_info(
+        db, document_element_id, version=version
+    )
 
 
 @router.get("/classrooms", response_model=List[dict], status_code=status.HTTP_200_OK)
@@ -201,3 +436,46 @@ def get_my_classrooms(
         }
         for classroom in classrooms
     ]
+
+
+@router.get(
+    "/link-graph/elements/{document_element_id}/neighbours",
+    response_model=List[Dict[str, Any]],
+    status_code=status.HTTP_200_OK,
+)
+def get_link_neighbours(
+    document_element_id: int,
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db),
+):
+    """Get the elements linked directly to a document element."""
+    return link_graph_service.neighbours(db, document_element_id)
+
+
+@router.get(
+    "/link-graph/elements/{document_element_id}/expand",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+)
+def expand_link_graph(
+    document_element_id: int,
+    hops: int = Query(2, ge=1, le=link_graph_service.MAX_HOPS),
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db),
+):
+    """Get every element within `hops` links of a document element."""
+    return link_graph_service.expand(db, document_element_id, hops)
+
+
+@router.get(
+    "/link-graph/documents/{document_id}/summary",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+)
+def get_document_link_summary(
+    document_id: int,
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db),
+):
+    """Get a summary of the links between a document and other documents."""
+    return link_graph_service.document_summary(db, document_id)
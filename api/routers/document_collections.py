@@ -1,7 +1,9 @@
 # routers/document_collections.py
 
+from datetime import datetime
 from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, status, Response
+from fastapi import APIRouter, Depends, Query, status, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from database import get_db
@@ -12,9 +14,13 @@ from schemas.document_collections import (
     DocumentCollectionPartialUpdate,
     DocumentCollectionWithStats,
     DocumentCollectionWithUsers,
-    CollectionDisplayOrderBatchUpdate
+    CollectionDisplayOrderBatchUpdate,
+    CollectionTagCount
 )
+from dependencies.classroom import get_classroom_context
 from services.document_collection_service import document_collection_service
+from services.annotation_export_service import annotation_export_service
+from services.annotation_tag_service import annotation_tag_service
 
 router = APIRouter(
     prefix="/api/v1/collections",
@@ -150,4 +156,52 @@ def delete_all_collection_documents(
     - This operation cascades through: Collection -> Documents -> Elements -> Annotations
     """
     document_collection_service.delete_all_documents(db, collection_id, force=force)
-    return Response(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/{collection_id}/tags", response_model=List[CollectionTagCount])
+def get_collection_tag_cloud(
+    collection_id: int,
+    limit: int = Query(annotation_tag_service.TAG_CLOUD_LIMIT, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the most used tags in a collection, with how many times each was applied
+    """
+    return annotation_tag_service.tag_cloud(db, collection_id, limit=limit)
+
+
+@router.get("/{collection_id}/annotations/export")
+def export_collection_annotations(
+    collection_id: int,
+    format: str = "ndjson",
+    motivation: Optional[str] = None,
+    since: Optional[datetime] = None,
+    classroom_id: Optional[int] = Depends(get_classroom_context),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream all annotations in a collection as W3C Web Annotations
+
+    - format=ndjson (default): one JSON-LD annotation per line
+    - format=jsonld: a single AnnotationCollection document
+    - motivation: only export annotations with this motivation
+    - since: only export annotations modified at or after this timestamp
+    - classroom_id: export comments, replies, flags and upvotes from this classroom
+      instead of the global ones
+    """
+    chunks = annotation_export_service.export(
+        db,
+        collection_id,
+        format=format,
+        motivation=motivation,
+        classroom_id=classroom_id,
+        since=since,
+    )
+    return StreamingResponse(
+        chunks,
+        media_type=annotation_export_service.MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="collection-{collection_id}-annotations.{format}"'
+        },
+    )
@@ -37,10 +37,12 @@ def create_element(
 
 @router.get("/", response_model=List[DocumentElement])
 def read_elements(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     document_id: Optional[int] = None,
     content_query: Optional[str] = None,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
 ):
     """
@@ -49,15 +51,24 @@ def read_elements(
     - document_id: Filter by document ID
     - content_query: Search within the content JSONB field
     - Results are sorted by hierarchy->element_order in ascending order
+    - cursor: Continue after a previous page; the next cursor, if any, is
+      returned in the X-Next-Cursor header
     """
-    return document_element_service.list(
+    elements = document_element_service.list(
         db,
         skip=skip,
         limit=limit,
         document_id=document_id,
-        content_query=content_query
+        content_query=content_query,
+        cursor=cursor
     )
 
+    next_cursor = document_element_service.get_next_cursor(elements, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    return elements
+
 
 @router.get("/{element_id}", response_model=DocumentElementWithDocument)
 def read_element(
@@ -23,7 +23,12 @@ from schemas.documents import (
     DocumentWithDetails,
 )
 from schemas.document_elements import DocumentElement as DocumentElementSchema
+from schemas.annotations import Annotation, AnnotationChanges
+from dependencies.classroom import get_classroom_context, get_current_user_optional
+from models.models import User
 from services.document_service import document_service
+from services.annotation_query_service import annotation_query_service
+from services.annotation_change_service import annotation_change_service
 
 
 class BulkDeleteRequest(BaseModel):
@@ -50,22 +55,33 @@ def create_document(
 
 @router.get("/", response_model=List[Document])
 def read_documents(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     title: Optional[str] = None,
     collection_id: Optional[int] = None,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
 ):
     """
     Retrieve documents with optional filtering
+    
+    The cursor for the next page, if any, is returned in the X-Next-Cursor header.
     """
-    return document_service.list(
+    documents = document_service.list(
         db,
         skip=skip,
         limit=limit,
         title=title,
-        collection_id=collection_id
+        collection_id=collection_id,
+        cursor=cursor
     )
+    
+    next_cursor = document_service.get_next_cursor(documents, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    
+    return documents
 
 
 @router.delete("/bulk-delete", status_code=status.HTTP_204_NO_CONTENT)
@@ -147,6 +163,41 @@ def get_document_elements(
     return document_service.get_elements(db, document_id, skip=skip, limit=limit)
 
 
+@router.get(
+    "/{document_id}/annotations",
+    response_model=Dict[int, Dict[str, List[Annotation]]],
+)
+def get_document_annotations(
+    document_id: int,
+    classroom_id: Optional[int] = Depends(get_classroom_context),
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db),
+):
+    """
+    Get annotations for every element of a document, keyed by element and motivation
+    """
+    return annotation_query_service.get_by_document(db, document_id, classroom_id)
+
+
+@router.get(
+    "/{document_id}/annotations/changes",
+    response_model=AnnotationChanges,
+)
+def get_document_annotation_changes(
+    document_id: int,
+    since: Optional[str] = None,
+    classroom_id: Optional[int] = Depends(get_classroom_context),
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db),
+):
+    """
+    Get annotations of a document created or modified since a sync token, plus
+    tombstones for deleted ones. Pass `next_since` from the response as the
+    next `since`; without `since` every annotation is returned.
+    """
+    return annotation_change_service.get_changes(db, document_id, classroom_id, since)
+
+
 @router.get("/collection/{collection_id}/with-stats", response_model=List[Dict[str, Any]])
 def get_documents_with_annotation_stats(
     collection_id: int,
@@ -1,5 +1,5 @@
 from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, status
 from sqlalchemy.orm import Session
 
 from database import get_db
@@ -19,22 +19,30 @@ def get_flags_count(
     current_user: User = Depends(get_current_user_sync),
     db: Session = Depends(get_db),
 ):
-    """Get count of pending flags (admin only)."""
+    """
+    Get count of pending flags (admin only).
+    Counts are cached per worker process: writes made through this worker show
+    up at once, but flags created or removed through another worker may take
+    up to 30 seconds (AnnotationQueryService.FLAG_COUNT_TTL) to be reflected.
+    """
     count = flag_service.get_count(db, classroom_id, current_user)
     return {"count": count}
 
 
 @router.get("", response_model=List[Dict[str, Any]])
 def get_flags(
+    grouped: bool = Query(False, description="One entry per flagged annotation"),
     classroom_id: Optional[int] = Depends(get_classroom_context),
     current_user: User = Depends(get_current_user_sync),
     db: Session = Depends(get_db),
 ):
     """
     Get all flags with enriched data (admin only).
-    Returns flags with the flagged annotation data.
+    Returns flags with the flagged annotation data. With `grouped`, returns
+    one entry per flagged annotation with its flag count, earliest flag time,
+    distinct reasons and the flags themselves.
     """
-    return flag_service.list(db, classroom_id, current_user)
+    return flag_service.list(db, classroom_id, current_user, grouped=grouped)
 
 
 @router.delete("/{flag_id}/unflag", status_code=status.HTTP_200_OK)
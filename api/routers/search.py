@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, status, Query as QueryParam
+from fastapi import APIRouter, Depends, HTTPException, status, Query as QueryParam
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from database import get_db
 from dependencies.classroom import get_current_user_sync
@@ -28,7 +28,8 @@ def search(
     Execute a full-text search across documents, comments, and annotations.
 
     Uses PGroonga for multilingual full-text search with fuzzy matching.
-    Filters comments by classroom context if provided.
+    Filters comments by classroom context if provided. Pass `next_cursor`
+    back as `cursor` for the next page.
     """
     result = search_service.search(
         db=db, query_dict=query.dict(), classroom_id=classroom_id
@@ -39,4 +40,18 @@ def search(
         query=query,
         total_results=result["total_results"],
         results=[SearchResult(**row) for row in result["results"]],
+        next_cursor=result["next_cursor"],
+        total=result["total"],
+        total_estimated=result["total_estimated"],
     )
+
+
+@router.get("/cache-stats", response_model=Dict[str, Any], status_code=status.HTTP_200_OK)
+def get_search_cache_stats(
+    current_user: User = Depends(get_current_user_sync),
+):
+    """Hit, miss and size statistics of this worker's search result cache (admin only)."""
+    if not current_user.roles or "admin" not in [r.name for r in current_user.roles]:
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return search_service.cache.stats()
@@ -1,5 +1,5 @@
 from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, status, Response
 from sqlalchemy.orm import Session
 
 from database import get_db
@@ -24,22 +24,35 @@ def create_user(
 
 @router.get("/", response_model=List[User])
 def read_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     first_name: Optional[str] = None,
     last_name: Optional[str] = None,
     name_search: Optional[str] = None,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Retrieve users with optional filtering (includes roles via joinedload)."""
-    return user_service.list(
+    """
+    Retrieve users with optional filtering (includes roles via joinedload).
+    
+    The cursor for the next page, if any, is returned in the X-Next-Cursor header.
+    """
+    users = user_service.list(
         db=db,
         skip=skip,
         limit=limit,
         first_name=first_name,
         last_name=last_name,
-        name_search=name_search
+        name_search=name_search,
+        cursor=cursor
     )
+    
+    next_cursor = user_service.get_next_cursor(users, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    
+    return users
 
 
 @router.get("/{user_id}", response_model=User)
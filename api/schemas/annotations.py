@@ -1,4 +1,4 @@
-from typing import Optional, List, Dict, Union
+from typing import Any, Optional, List, Dict, Union
 from pydantic import BaseModel, RootModel, ConfigDict
 from datetime import datetime
 from schemas.users import User
@@ -73,4 +73,40 @@ class AnnotationPatch(BaseModel):
     motivation: Optional[str] = None
 
 class AnnotationAddTarget(BaseModel):
-    target: Union[TextTarget, ObjectTarget, List[Union[TextTarget, ObjectTarget]]] = None
\ No newline at end of file
+    target: Union[TextTarget, ObjectTarget, List[Union[TextTarget, ObjectTarget]]] = None
+
+class AnnotationAggregatesRequest(BaseModel):
+    annotation_ids: List[int]
+
+class AnnotationAggregate(BaseModel):
+    reply_count: int
+    upvote_count: int
+    flag_count: int
+    upvoted: bool
+
+class AnnotationBulkCreate(BaseModel):
+    # Items are validated one by one so that errors can be reported per item
+    annotations: List[Dict[str, Any]]
+
+class AnnotationBulkCreated(BaseModel):
+    index: int
+    id: int
+
+class AnnotationBulkError(BaseModel):
+    index: int
+    detail: str
+
+class AnnotationBulkResult(BaseModel):
+    created: List[AnnotationBulkCreated]
+    errors: List[AnnotationBulkError]
+
+class AnnotationTombstone(BaseModel):
+    id: int
+    document_element_id: int
+    deleted: datetime
+
+class AnnotationChanges(BaseModel):
+    # Changed annotations keyed by element and motivation, as in the full document fetch
+    annotations: Dict[int, Dict[str, List[Annotation]]]
+    deleted: List[AnnotationTombstone]
+    next_since: str
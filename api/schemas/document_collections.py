@@ -69,4 +69,8 @@ class DocumentCollectionWithStats(DocumentCollection):
     created_by: Optional[User] = None
     modified_by: Optional[User] = None
     
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class CollectionTagCount(BaseModel):
+    tag: str
+    count: int
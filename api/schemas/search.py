@@ -19,6 +19,11 @@ class SortOrder(str, Enum):
     ASC = "asc"
     DESC = "desc"
 
+class CountMode(str, Enum):
+    NONE = "none"
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+
 class ParsedSearchTerm(BaseModel):
     type: Literal["term", "group"]
     term: Optional[str] = None
@@ -41,6 +46,10 @@ class SearchQuery(BaseModel):
         default_factory=list,
         description="Tags to filter by"
     )
+    tagOperator: Literal["AND", "OR"] = Field(
+        default="OR",
+        description="Whether results need all of the tags, or any one of them"
+    )
     sortBy: SortBy = Field(
         default=SortBy.RELEVANCE,
         description="Field to sort results by"
@@ -50,11 +59,23 @@ class SearchQuery(BaseModel):
         description="Sort order direction"
     )
     limit: int = Field(
-        default=50,
+        default=20,
         ge=1,
         le=1000,
         description="Maximum number of results to return"
     )
+    cursor: Optional[str] = Field(
+        default=None,
+        description="next_cursor of the previous page, to continue after it"
+    )
+    countMode: CountMode = Field(
+        default=CountMode.NONE,
+        description="Also count all matches: exactly, or from the planner's estimate"
+    )
+    snippets: bool = Field(
+        default=False,
+        description="Return keyword-in-context snippets instead of full content"
+    )
 
     model_config = ConfigDict(
         # Use enum values in JSON output
@@ -88,9 +109,11 @@ class SearchQuery(BaseModel):
                 ],
                 "searchTypes": ["documents", "comments"],
                 "tags": ["ai", "tutorial"],
+                "tagOperator": "AND",
                 "sortBy": "relevance",
                 "sortOrder": "desc",
-                "limit": 50
+                "limit": 20,
+                "countMode": "estimated"
             }
         }
         )
@@ -103,7 +126,9 @@ class SearchResult(BaseModel):
     element_id: Optional[int] = Field(None, description="ID of the document element")
     document_id: int = Field(..., description="ID of the document")
     collection_id: int = Field(..., description="ID of the collection")
-    content: str = Field(..., description="The text content of the result")
+    content: Optional[str] = Field(None, description="The text content of the result; omitted with snippets")
+    snippet: Optional[str] = Field(None, description="Keyword-in-context excerpt, when snippets were requested")
+    highlights: Optional[List[List[int]]] = Field(None, description="[start, end) offsets of keywords in the snippet")
     document_title: str = Field(..., description="Title of the parent document")
     collection_title: str = Field(..., description="Title of the parent document collection")
     type: str = Field(..., description="Type of result (annotation, element, etc.)")
@@ -115,4 +140,7 @@ class SearchResult(BaseModel):
 class SearchResponse(BaseModel):
     query: SearchQuery
     total_results: int
-    results: List[SearchResult]
\ No newline at end of file
+    results: List[SearchResult]
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, if any")
+    total: Optional[int] = Field(None, description="Matches across all pages, when counted")
+    total_estimated: bool = Field(False, description="Whether total is the planner's estimate")
\ No newline at end of file
@@ -0,0 +1,185 @@
+# services/annotation_change_service.py
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, insert, or_
+
+from models.models import (
+    AnnotationTombstone as AnnotationTombstoneModel,
+    Annotation as AnnotationModel,
+    Document,
+    DocumentElement,
+)
+from services.base_service import BaseService
+from services.annotation_query_service import annotation_query_service
+
+
+class AnnotationChangeService(BaseService[AnnotationTombstoneModel]):
+    """
+    Service for delta sync of a document's annotations.
+
+    Changed annotations are found through the index on `annotations.modified`.
+    Deletions are recorded in `annotation_tombstones`, one row per deleted
+    annotation and element thread it belonged to, and pruned after
+    TOMBSTONE_RETENTION.
+
+    A sync token is the server time the previous response was built, less
+    COMMIT_LAG so that writes committed slightly after their `modified` stamp
+    are not missed. Changes near a token boundary can be sent twice; clients
+    apply them by annotation ID.
+    """
+
+    TOMBSTONE_RETENTION = timedelta(days=7)
+    COMMIT_LAG = timedelta(seconds=5)
+
+    def __init__(self):
+        super().__init__(AnnotationTombstoneModel)
+
+    # ==================== Helper Methods ====================
+
+    def _classroom_scope(self, annotation: AnnotationModel) -> Optional[int]:
+        """The classroom whose clients see an annotation; None for every client."""
+        if annotation.motivation == "commenting":
+            return annotation.classroom_id
+        return None
+
+    def encode_token(self, moment: datetime) -> str:
+        return self.encode_cursor(moment.isoformat())
+
+    def decode_token(self, token: str) -> datetime:
+        """
+        Decode a sync token.
+
+        Raises HTTPException 400 if the token is malformed.
+        Raises HTTPException 410 if deletions since the token were already pruned.
+        """
+        value = self.decode_cursor(token, 1)[0]
+        try:
+            since = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid sync token"
+            )
+
+        if since < datetime.now() - self.TOMBSTONE_RETENTION:
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail="Sync token expired; reload the document's annotations",
+            )
+        return since
+
+    # ==================== Write Hooks ====================
+
+    def annotation_removed(
+        self, db: Session, annotation: AnnotationModel, element_ids: Iterable[int]
+    ) -> None:
+        """
+        Record that an annotation left the threads of some elements, for the
+        clients that could see it there.
+        """
+        element_ids = sorted(set(element_ids))
+        if not element_ids:
+            return
+
+        now = datetime.now()
+        documents = db.execute(
+            select(DocumentElement.id, DocumentElement.document_id).where(
+                DocumentElement.id.in_(element_ids)
+            )
+        ).all()
+        rows = [
+            {
+                "annotation_id": annotation.id,
+                "document_id": document_id,
+                "document_element_id": element_id,
+                "classroom_id": self._classroom_scope(annotation),
+                "deleted": now,
+            }
+            for element_id, document_id in documents
+            if document_id is not None
+        ]
+        if rows:
+            db.execute(insert(self.model), rows)
+
+        db.execute(
+            delete(self.model)
+            .where(self.model.deleted < now - self.TOMBSTONE_RETENTION)
+            .execution_options(synchronize_session=False)
+        )
+
+    # ==================== Read Operations ====================
+
+    def get_changes(
+        self,
+        db: Session,
+        document_id: int,
+        classroom_id: Optional[int],
+        since: Optional[str],
+    ) -> Dict[str, Any]:
+        """
+        Annotations of a document created or modified since a sync token, and
+        tombstones for those deleted since.
+
+        Without a token every annotation is returned, which gives a client its
+        first token. Raises HTTPException 404 if the document does not exist.
+        """
+        if db.query(Document.id).filter(Document.id == document_id).first() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Document not found"
+            )
+
+        # Taken before reading so nothing committed during the read is skipped
+        next_since = self.encode_token(datetime.now() - self.COMMIT_LAG)
+        modified_since = self.decode_token(since) if since else None
+
+        element_ids = select(DocumentElement.id).where(
+            DocumentElement.document_id == document_id
+        )
+        annotations = annotation_query_service.get_by_elements(
+            db, element_ids, classroom_id, modified_since=modified_since
+        )
+
+        deleted = []
+        if modified_since is not None:
+            # An edit can hide an annotation from some scopes only; where it is
+            # still shown, it is returned above and its tombstone is dropped
+            shown = {
+                (element_id, annotation.id)
+                for element_id, by_motivation in annotations.items()
+                for group in by_motivation.values()
+                for annotation in group
+            }
+            classroom_scope = self.model.classroom_id.is_(None)
+            if classroom_id is not None:
+                classroom_scope = or_(
+                    classroom_scope, self.model.classroom_id == classroom_id
+                )
+            deleted = [
+                {
+                    "id": row.annotation_id,
+                    "document_element_id": row.document_element_id,
+                    "deleted": row.deleted,
+                }
+                for row in db.execute(
+                    select(
+                        self.model.annotation_id,
+                        self.model.document_element_id,
+                        self.model.deleted,
+                    )
+                    .where(
+                        self.model.document_id == document_id,
+                        self.model.deleted >= modified_since,
+                        classroom_scope,
+                    )
+                    .order_by(self.model.deleted, self.model.id)
+                )
+                if (row.document_element_id, row.annotation_id) not in shown
+            ]
+
+        return {"annotations": annotations, "deleted": deleted, "next_since": next_since}
+
+
+# Singleton instance for easy importing
+annotation_change_service = AnnotationChangeService()
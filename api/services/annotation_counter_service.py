@@ -0,0 +1,480 @@
+# services/annotation_counter_service.py
+
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, update, delete, func, case
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+
+from models.models import (
+    AnnotationCounter as AnnotationCounterModel,
+    Annotation as AnnotationModel,
+    DocumentCollection,
+    DocumentElement,
+    Document,
+)
+from services.base_service import BaseService
+
+logger = logging.getLogger(__name__)
+
+
+class AnnotationCounterService(BaseService[AnnotationCounterModel]):
+    """
+    Service for the maintained statistics counters.
+
+    `annotation_counters` holds one row per element, document and collection
+    with its scholarly, comment and total annotation counts, plus element and
+    document counts. Annotation writes adjust the rows inside the caller's
+    transaction; structural changes (imports, cascade deletes) recompute the
+    affected rows. Statistics pages read the rows instead of counting.
+
+    An annotation counts against the element, document and collection named
+    in its own columns. A row that does not exist yet is seeded from source on
+    first read, and `reconcile` repairs drift left by writes that bypass the
+    services.
+
+    Element rows also carry `change_count`, bumped whenever an annotation in
+    one of the element's threads is written. Together with the counts it
+    versions the per-element annotation endpoints for conditional GETs.
+    """
+
+    ELEMENT = "element"
+    DOCUMENT = "document"
+    COLLECTION = "collection"
+    SCOPES = (ELEMENT, DOCUMENT, COLLECTION)
+
+    SCHOLARLY_MOTIVATIONS = ("scholarly", "highlighting", "bookmarking", "classifying")
+    COMMENT_MOTIVATION = "commenting"
+
+    COUNT_COLUMNS = (
+        "scholarly_count",
+        "comment_count",
+        "annotation_count",
+        "element_count",
+        "document_count",
+    )
+
+    def __init__(self):
+        super().__init__(AnnotationCounterModel)
+
+    # ==================== Helper Methods ====================
+
+    def _zero(self) -> Dict[str, int]:
+        return dict.fromkeys(self.COUNT_COLUMNS, 0)
+
+    def _annotation_column(self, scope: str):
+        """The annotation column that attributes an annotation to a scope."""
+        return {
+            self.ELEMENT: AnnotationModel.document_element_id,
+            self.DOCUMENT: AnnotationModel.document_id,
+            self.COLLECTION: AnnotationModel.document_collection_id,
+        }[scope]
+
+    def _entity_ids(self, scope: str):
+        """Select the IDs of every element, document or collection."""
+        return select(
+            {
+                self.ELEMENT: DocumentElement.id,
+                self.DOCUMENT: Document.id,
+                self.COLLECTION: DocumentCollection.id,
+            }[scope]
+        )
+
+    def _annotation_deltas(self, motivation: Optional[str], sign: int) -> Dict[str, int]:
+        deltas = {"annotation_count": sign}
+        if motivation in self.SCHOLARLY_MOTIVATIONS:
+            deltas["scholarly_count"] = sign
+        elif motivation == self.COMMENT_MOTIVATION:
+            deltas["comment_count"] = sign
+        return deltas
+
+    def _annotation_scopes(self, annotation: AnnotationModel) -> List[Tuple[str, Optional[int]]]:
+        return [
+            (self.ELEMENT, annotation.document_element_id),
+            (self.DOCUMENT, annotation.document_id),
+            (self.COLLECTION, annotation.document_collection_id),
+        ]
+
+    def _add(
+        self, db: Session, scope: str, scope_id: Optional[int], deltas: Dict[str, int]
+    ) -> None:
+        """
+        Atomically add deltas to one counter row.
+
+        A missing row is left alone; it is seeded with current counts on first read.
+        """
+        if scope_id is None or not deltas:
+            return
+
+        db.execute(
+            update(self.model)
+            .where(self.model.scope == scope, self.model.scope_id == scope_id)
+            .values(
+                {
+                    column: getattr(self.model, column) + delta
+                    for column, delta in deltas.items()
+                }
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    def _collection_id(self, db: Session, document_id: int) -> Optional[int]:
+        return db.execute(
+            select(Document.document_collection_id).where(Document.id == document_id)
+        ).scalar_one_or_none()
+
+    def _count_from_source(
+        self, db: Session, scope: str, scope_ids: Optional[List[int]]
+    ) -> Dict[int, Dict[str, int]]:
+        """
+        Count annotations, elements and documents for a scope with GROUP BY queries.
+
+        Counts every scope ID that has any data when scope_ids is None.
+        """
+        counts = {scope_id: self._zero() for scope_id in scope_ids or ()}
+
+        column = self._annotation_column(scope)
+        query = (
+            select(
+                column,
+                func.count(),
+                func.sum(
+                    case(
+                        (AnnotationModel.motivation.in_(self.SCHOLARLY_MOTIVATIONS), 1),
+                        else_=0,
+                    )
+                ),
+                func.sum(
+                    case((AnnotationModel.motivation == self.COMMENT_MOTIVATION, 1), else_=0)
+                ),
+            )
+            .where(column.is_not(None))
+            .group_by(column)
+        )
+        if scope_ids is not None:
+            query = query.where(column.in_(scope_ids))
+
+        for scope_id, total, scholarly, comments in db.execute(query):
+            counts.setdefault(scope_id, self._zero()).update(
+                annotation_count=total,
+                scholarly_count=scholarly or 0,
+                comment_count=comments or 0,
+            )
+
+        grouped = []
+        if scope == self.DOCUMENT:
+            grouped.append(
+                (
+                    "element_count",
+                    DocumentElement.document_id,
+                    select(DocumentElement.document_id, func.count()),
+                )
+            )
+        elif scope == self.COLLECTION:
+            grouped.append(
+                (
+                    "element_count",
+                    Document.document_collection_id,
+                    select(Document.document_collection_id, func.count()).join(
+                        DocumentElement, DocumentElement.document_id == Document.id
+                    ),
+                )
+            )
+            grouped.append(
+                (
+                    "document_count",
+                    Document.document_collection_id,
+                    select(Document.document_collection_id, func.count()),
+                )
+            )
+
+        for name, key, query in grouped:
+            query = query.where(key.is_not(None)).group_by(key)
+            if scope_ids is not None:
+                query = query.where(key.in_(scope_ids))
+            for scope_id, total in db.execute(query):
+                counts.setdefault(scope_id, self._zero())[name] = total
+
+        return counts
+
+    def _rows(
+        self,
+        scope: str,
+        counts: Dict[int, Dict[str, int]],
+        change_counts: Optional[Dict[int, int]] = None,
+    ) -> List[Dict]:
+        rows = [
+            {"scope": scope, "scope_id": scope_id, **values}
+            for scope_id, values in counts.items()
+        ]
+        if change_counts is not None:
+            for row in rows:
+                row["change_count"] = change_counts.get(row["scope_id"], 0)
+        return rows
+
+    def _insert_missing(self, db: Session, rows: List[Dict]) -> None:
+        """Insert counter rows unless they exist, in a savepoint of the caller's transaction."""
+        if not rows:
+            return
+
+        dialect = {"postgresql": postgresql, "sqlite": sqlite}[db.get_bind().dialect.name]
+        with db.begin_nested():
+            db.execute(dialect.insert(self.model).on_conflict_do_nothing(), rows)
+
+    def _seed(
+        self, db: Session, scope: str, scope_ids: List[int]
+    ) -> Dict[int, Dict[str, int]]:
+        """
+        Count rows that do not exist yet and store them on a short-lived session.
+
+        The caller's transaction is neither written to nor committed. If the
+        rows cannot be stored, their counts are returned unstored.
+        """
+        try:
+            with Session(bind=db.get_bind()) as seed_db:
+                counts = self._count_from_source(seed_db, scope, scope_ids)
+                self._insert_missing(seed_db, self._rows(scope, counts))
+                seed_db.commit()
+            return counts
+        except SQLAlchemyError:
+            logger.warning("Could not seed %s counters %s", scope, scope_ids, exc_info=True)
+            return self._count_from_source(db, scope, scope_ids)
+
+    # ==================== Write Hooks ====================
+
+    def annotation_added(self, db: Session, annotation: AnnotationModel) -> None:
+        """Count a new annotation against its element, document and collection."""
+        self.annotations_added(db, [annotation])
+
+    def annotations_added(self, db: Session, annotations: Iterable[AnnotationModel]) -> None:
+        """Count many new annotations with one update per affected counter row."""
+        totals: Dict[Tuple[str, int], Dict[str, int]] = {}
+        for annotation in annotations:
+            deltas = self._annotation_deltas(annotation.motivation, 1)
+            for scope, scope_id in self._annotation_scopes(annotation):
+                if scope_id is None:
+                    continue
+                row = totals.setdefault((scope, scope_id), {})
+                for column, delta in deltas.items():
+                    row[column] = row.get(column, 0) + delta
+
+        for (scope, scope_id), deltas in totals.items():
+            self._add(db, scope, scope_id, deltas)
+
+    def annotation_removed(self, db: Session, annotation: AnnotationModel) -> None:
+        """Stop counting a deleted annotation."""
+        deltas = self._annotation_deltas(annotation.motivation, -1)
+        for scope, scope_id in self._annotation_scopes(annotation):
+            self._add(db, scope, scope_id, deltas)
+
+    def motivation_changed(
+        self, db: Session, annotation: AnnotationModel, previous_motivation: Optional[str]
+    ) -> None:
+        """Move an annotation between motivation buckets."""
+        if previous_motivation == annotation.motivation:
+            return
+
+        deltas = self._annotation_deltas(previous_motivation, -1)
+        for column, delta in self._annotation_deltas(annotation.motivation, 1).items():
+            deltas[column] = deltas.get(column, 0) + delta
+        deltas = {column: delta for column, delta in deltas.items() if delta}
+
+        for scope, scope_id in self._annotation_scopes(annotation):
+            self._add(db, scope, scope_id, deltas)
+
+    def scope_created(self, db: Session, scope: str, scope_id: int) -> None:
+        """Start a new element, document or collection at zero."""
+        db.execute(insert(self.model).values(scope=scope, scope_id=scope_id, **self._zero()))
+
+    def element_created(self, db: Session, element: DocumentElement) -> None:
+        """Start a new element at zero and count it against its document and collection."""
+        self.scope_created(db, self.ELEMENT, element.id)
+        self._add(db, self.DOCUMENT, element.document_id, {"element_count": 1})
+        self._add(
+            db,
+            self.COLLECTION,
+            self._collection_id(db, element.document_id),
+            {"element_count": 1},
+        )
+
+    def document_created(self, db: Session, document: Document) -> None:
+        """Start a new document at zero and count it against its collection."""
+        self.scope_created(db, self.DOCUMENT, document.id)
+        self._add(
+            db, self.COLLECTION, document.document_collection_id, {"document_count": 1}
+        )
+
+    def refresh(self, db: Session, scope: str, scope_ids: Iterable[Optional[int]]) -> None:
+        """Recompute counter rows from source, e.g. after bulk imports or cascade deletes."""
+        scope_ids = sorted({scope_id for scope_id in scope_ids if scope_id is not None})
+        if not scope_ids:
+            return
+
+        # Carry change_count forward, bumped, so element versions never repeat
+        change_counts = {
+            scope_id: change_count + 1
+            for scope_id, change_count in db.execute(
+                select(self.model.scope_id, self.model.change_count).where(
+                    self.model.scope == scope, self.model.scope_id.in_(scope_ids)
+                )
+            )
+        }
+        counts = self._count_from_source(db, scope, scope_ids)
+        self.drop(db, scope, scope_ids)
+        db.execute(insert(self.model), self._rows(scope, counts, change_counts))
+
+    def refresh_documents(self, db: Session, document_ids: Iterable[int]) -> None:
+        """Recompute the rows of some documents and of the collections they belong to."""
+        document_ids = list(document_ids)
+        if not document_ids:
+            return
+
+        collection_ids = db.execute(
+            select(Document.document_collection_id).where(Document.id.in_(document_ids))
+        ).scalars().all()
+        self.refresh(db, self.DOCUMENT, document_ids)
+        self.refresh(db, self.COLLECTION, collection_ids)
+
+    def elements_changed(self, db: Session, element_ids: Iterable[int]) -> None:
+        """
+        Bump the change counter of every element whose threads were written.
+
+        Elements without a row yet are seeded at change_count 1 in the writer's
+        transaction, so their version moves past the unseeded "0." token.
+        """
+        element_ids = sorted(set(element_ids))
+        if not element_ids:
+            return
+
+        result = db.execute(
+            update(self.model)
+            .where(self.model.scope == self.ELEMENT, self.model.scope_id.in_(element_ids))
+            .values(change_count=self.model.change_count + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == len(element_ids):
+            return
+
+        existing = set(
+            db.execute(
+                select(self.model.scope_id).where(
+                    self.model.scope == self.ELEMENT, self.model.scope_id.in_(element_ids)
+                )
+            ).scalars()
+        )
+        missing = [element_id for element_id in element_ids if element_id not in existing]
+        counts = self._count_from_source(db, self.ELEMENT, missing)
+        self._insert_missing(db, self._rows(self.ELEMENT, counts, dict.fromkeys(missing, 1)))
+
+    def drop(self, db: Session, scope: str, scope_ids: Iterable[int]) -> None:
+        """Delete the rows of removed elements, documents or collections."""
+        scope_ids = list(scope_ids)
+        if not scope_ids:
+            return
+
+        db.execute(
+            delete(self.model)
+            .where(self.model.scope == scope, self.model.scope_id.in_(scope_ids))
+            .execution_options(synchronize_session=False)
+        )
+
+    # ==================== Read Operations ====================
+
+    def get_counts(
+        self, db: Session, scope: str, scope_ids: Iterable[int]
+    ) -> Dict[int, Dict[str, int]]:
+        """
+        Counters for a set of elements, documents or collections, keyed by ID.
+
+        Rows that do not exist yet are counted from source once and stored on
+        a session of their own, so read paths never write in, or commit, the
+        caller's transaction and the next read is a single indexed lookup.
+        """
+        scope_ids = list(scope_ids)
+        if not scope_ids:
+            return {}
+
+        rows = db.execute(
+            select(self.model.scope_id, *[getattr(self.model, c) for c in self.COUNT_COLUMNS])
+            .where(self.model.scope == scope, self.model.scope_id.in_(scope_ids))
+        ).all()
+        counts = {
+            row.scope_id: {column: getattr(row, column) for column in self.COUNT_COLUMNS}
+            for row in rows
+        }
+
+        missing = [scope_id for scope_id in scope_ids if scope_id not in counts]
+        if missing:
+            counts.update(self._seed(db, scope, missing))
+
+        return counts
+
+    def element_version(self, db: Session, element_id: int) -> str:
+        """
+        Version token for the annotations shown on an element.
+
+        One indexed lookup on the element's counter row; a missing row is
+        seeded first.
+        """
+        query = select(
+            self.model.change_count, self.model.annotation_count
+        ).where(self.model.scope == self.ELEMENT, self.model.scope_id == element_id)
+
+        row = db.execute(query).first()
+        if row is not None:
+            return f"{row.change_count}.{row.annotation_count}"
+
+        counts = self.get_counts(db, self.ELEMENT, [element_id])[element_id]
+        return f"0.{counts['annotation_count']}"
+
+    # ==================== Reconciliation ====================
+
+    def reconcile(self, db: Session, scopes: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        Recompute every counter from source and repair rows that drifted.
+
+        Inserts missing rows, corrects wrong counts, and deletes rows whose
+        element, document or collection no longer exists. Commits and returns
+        the number of repaired rows per scope. A write that races the job is
+        corrected on the next run.
+        """
+        repaired = {}
+
+        for scope in scopes or self.SCOPES:
+            entity_ids = set(db.execute(self._entity_ids(scope)).scalars())
+            actual = self._count_from_source(db, scope, None)
+            stored = {
+                row.scope_id: row
+                for row in db.execute(
+                    select(
+                        self.model.scope_id,
+                        *[getattr(self.model, c) for c in self.COUNT_COLUMNS],
+                    ).where(self.model.scope == scope)
+                )
+            }
+
+            inserts, updates = {}, {}
+            for scope_id in entity_ids:
+                counts = actual.get(scope_id) or self._zero()
+                row = stored.get(scope_id)
+                if row is None:
+                    inserts[scope_id] = counts
+                elif any(getattr(row, c) != counts[c] for c in self.COUNT_COLUMNS):
+                    updates[scope_id] = counts
+            orphans = [scope_id for scope_id in stored if scope_id not in entity_ids]
+
+            if inserts:
+                db.execute(insert(self.model), self._rows(scope, inserts))
+            if updates:
+                db.execute(update(self.model), self._rows(scope, updates))
+            self.drop(db, scope, orphans)
+
+            repaired[scope] = len(inserts) + len(updates) + len(orphans)
+
+        db.commit()
+        return repaired
+
+
+# Singleton instance for easy importing
+annotation_counter_service = AnnotationCounterService()
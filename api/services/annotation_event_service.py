@@ -0,0 +1,322 @@
+# services/annotation_event_service.py
+
+import asyncio
+import json
+import logging
+import os
+import select as select_module
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+from sqlalchemy import select, text
+
+from models.models import Annotation as AnnotationModel, DocumentElement
+
+logger = logging.getLogger(__name__)
+
+
+class EventSubscription:
+    """
+    One client's queue of pending annotation events.
+
+    Events are coalesced by annotation ID while they wait, so repeated writes
+    to one annotation reach the client once. If more than `max_pending`
+    annotations pile up the queue is dropped and the client gets a single
+    resync event instead, so a slow client costs bounded memory.
+    """
+
+    def __init__(
+        self,
+        channel: str,
+        classroom_id: Optional[int],
+        max_pending: int,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ):
+        self.channel = channel
+        self.classroom_id = classroom_id
+        self.max_pending = max_pending
+        self._pending: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._overflowed = False
+        self._lock = threading.Lock()
+        self._loop = loop
+        self._ready = asyncio.Event()
+
+    def _visible(self, event: Dict[str, Any]) -> bool:
+        """Classroom comments and their threads are only sent to that classroom."""
+        return event["classroom_id"] is None or event["classroom_id"] == self.classroom_id
+
+    def push(self, event: Dict[str, Any]) -> None:
+        if not self._visible(event):
+            return
+
+        with self._lock:
+            if self._overflowed:
+                return
+
+            annotation_id = event["annotation_id"]
+            previous = self._pending.pop(annotation_id, None)
+            if previous is not None and previous["type"] == "created":
+                if event["type"] == "deleted":
+                    # Created and deleted before the client saw it
+                    return
+                event = {**event, "type": "created"}
+            self._pending[annotation_id] = event
+
+            if len(self._pending) > self.max_pending:
+                self._pending.clear()
+                self._overflowed = True
+
+        self._notify()
+
+    def _notify(self) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        else:
+            self._ready.set()
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """Take every pending event, or a single resync event after an overflow."""
+        with self._lock:
+            self._ready.clear()
+            if self._overflowed:
+                self._overflowed = False
+                return [{"type": "resync", "channel": self.channel}]
+            events = list(self._pending.values())
+            self._pending.clear()
+            return events
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait until events are pending; False on timeout."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+class LocalEventBackend:
+    """Delivers events within this process only; for single-worker runs and tests."""
+
+    def __init__(self):
+        self._dispatch: Optional[Callable[[Dict[str, Any]], None]] = None
+
+    def start(self, dispatch: Callable[[Dict[str, Any]], None]) -> None:
+        self._dispatch = dispatch
+
+    def stage(self, db: Session, events: List[Dict[str, Any]]) -> None:
+        # Delivered by publish once the write has committed
+        pass
+
+    def publish(self, events: List[Dict[str, Any]]) -> None:
+        # Nobody has subscribed in this process yet
+        if self._dispatch is None:
+            return
+        for event in events:
+            self._dispatch(event)
+
+
+class PostgresEventBackend:
+    """
+    Delivers events to every worker through Postgres LISTEN/NOTIFY.
+
+    Staging sends one NOTIFY per event inside the writer's own transaction,
+    so Postgres delivers them only if that transaction commits and no extra
+    connection is used. A listener thread in each worker, started on the
+    first subscription, feeds notifications to the local bus.
+    Events published while a worker is reconnecting are lost to that worker's
+    clients, which catch up through delta sync.
+    """
+
+    CHANNEL = "annotation_events"
+    POLL_SECONDS = 5
+    RECONNECT_SECONDS = 2
+
+    def __init__(self):
+        self._dispatch: Optional[Callable[[Dict[str, Any]], None]] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, dispatch: Callable[[Dict[str, Any]], None]) -> None:
+        self._dispatch = dispatch
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._listen, name="annotation-events", daemon=True
+            )
+            self._thread.start()
+
+    def stage(self, db: Session, events: List[Dict[str, Any]]) -> None:
+        # A savepoint keeps a failed NOTIFY from aborting the write itself
+        with db.begin_nested():
+            for event in events:
+                db.execute(
+                    text("SELECT pg_notify(:channel, :payload)"),
+                    {"channel": self.CHANNEL, "payload": json.dumps(event)},
+                )
+
+    def publish(self, events: List[Dict[str, Any]]) -> None:
+        # Sent by the commit of the transaction they were staged in
+        pass
+
+    def _listen(self) -> None:
+        from database import engine
+
+        while True:
+            raw = None
+            try:
+                raw = engine.raw_connection()
+                connection = raw.driver_connection
+                connection.autocommit = True
+                connection.cursor().execute(f"LISTEN {self.CHANNEL}")
+
+                while True:
+                    if select_module.select([connection], [], [], self.POLL_SECONDS)[0]:
+                        connection.poll()
+                        while connection.notifies:
+                            notify = connection.notifies.pop(0)
+                            self._dispatch(json.loads(notify.payload))
+            except Exception:
+                logger.exception("Annotation event listener failed; reconnecting")
+                time.sleep(self.RECONNECT_SECONDS)
+            finally:
+                if raw is not None:
+                    raw.invalidate()
+
+
+class AnnotationEventService:
+    """
+    In-process pub/sub for live annotation updates.
+
+    AnnotationService and FlagService publish created, updated and deleted
+    events after they commit. Each event goes to the channel of every document
+    whose element threads include the annotation and, for classroom
+    annotations, to the classroom channel. The backend carries events between
+    workers; ANNOTATION_EVENTS_BACKEND selects `local` (default) or `postgres`.
+    """
+
+    # Annotations queued per client before it is told to resync instead
+    MAX_PENDING = 200
+
+    def __init__(self, backend=None):
+        self.backend = backend or self._default_backend()
+        self._subscriptions: Dict[str, Set[EventSubscription]] = {}
+        self._lock = threading.Lock()
+        self._started = False
+
+    def _default_backend(self):
+        if os.environ.get("ANNOTATION_EVENTS_BACKEND", "local") == "postgres":
+            return PostgresEventBackend()
+        return LocalEventBackend()
+
+    # ==================== Helper Methods ====================
+
+    def document_channel(self, document_id: int) -> str:
+        return f"document:{document_id}"
+
+    def classroom_channel(self, classroom_id: int) -> str:
+        return f"classroom:{classroom_id}"
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if not self._started:
+                self.backend.start(self.dispatch)
+                self._started = True
+
+    # ==================== Subscriptions ====================
+
+    def subscribe(
+        self,
+        channel: str,
+        classroom_id: Optional[int],
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ) -> EventSubscription:
+        self._ensure_started()
+        subscription = EventSubscription(channel, classroom_id, self.MAX_PENDING, loop)
+        with self._lock:
+            self._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: EventSubscription) -> None:
+        with self._lock:
+            subscribers = self._subscriptions.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscriptions[subscription.channel]
+
+    def dispatch(self, event: Dict[str, Any]) -> None:
+        """Hand an event to the local subscribers of its channels."""
+        with self._lock:
+            subscribers = [
+                subscription
+                for channel in event["channels"]
+                for subscription in self._subscriptions.get(channel, ())
+            ]
+        for subscription in subscribers:
+            subscription.push(event)
+
+    # ==================== Publishing ====================
+
+    def build(
+        self,
+        db: Session,
+        event_type: str,
+        changes: Iterable[Tuple[AnnotationModel, Iterable[int]]],
+    ) -> List[Dict[str, Any]]:
+        """Build and stage events for annotations before commit; publish them after."""
+        changes = [(annotation, set(element_ids)) for annotation, element_ids in changes]
+        element_ids = set().union(*(ids for _, ids in changes)) if changes else set()
+
+        documents = {}
+        if element_ids:
+            documents = dict(
+                db.execute(
+                    select(DocumentElement.id, DocumentElement.document_id).where(
+                        DocumentElement.id.in_(element_ids)
+                    )
+                ).all()
+            )
+
+        events = []
+        for annotation, ids in changes:
+            document_ids = sorted(
+                {documents[i] for i in ids if documents.get(i) is not None}
+            )
+            channels = [self.document_channel(d) for d in document_ids]
+            if annotation.classroom_id is not None:
+                channels.append(self.classroom_channel(annotation.classroom_id))
+            if not channels:
+                continue
+
+            events.append(
+                {
+                    "type": event_type,
+                    "annotation_id": annotation.id,
+                    "motivation": annotation.motivation,
+                    "classroom_id": annotation.classroom_id,
+                    "document_ids": document_ids,
+                    "document_element_ids": sorted(ids),
+                    "channels": channels,
+                }
+            )
+
+        if events:
+            try:
+                self.backend.stage(db, events)
+            except Exception:
+                logger.exception("Failed to stage annotation events")
+        return events
+
+    def publish(self, events: List[Dict[str, Any]]) -> None:
+        """Send built events; a delivery failure never fails the write that caused it."""
+        if not events:
+            return
+        try:
+            self.backend.publish(events)
+        except Exception:
+            logger.exception("Failed to publish annotation events")
+
+
+# Singleton instance for easy importing
+annotation_event_service = AnnotationEventService()
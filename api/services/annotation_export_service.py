@@ -0,0 +1,200 @@
+# services/annotation_export_service.py
+
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from sqlalchemy import select, or_, and_
+
+from models.models import (
+    Annotation as AnnotationModel,
+    DocumentCollection as DocumentCollectionModel,
+    User,
+)
+from services.base_service import BaseService
+
+
+class AnnotationExportService(BaseService[AnnotationModel]):
+    """
+    Service for streaming a collection's annotations as W3C Web Annotations.
+
+    Rows are read as plain columns through a server-side cursor (`yield_per`)
+    and written out in fixed-size chunks, so memory use does not depend on the
+    size of the collection.
+    """
+
+    FORMATS = ("ndjson", "jsonld")
+    MEDIA_TYPES = {
+        "ndjson": "application/x-ndjson",
+        "jsonld": 'application/ld+json; profile="http://www.w3.org/ns/anno.jsonld"',
+    }
+
+    W3C_CONTEXT = "http://www.w3.org/ns/anno.jsonld"
+
+    # Rows fetched per cursor round trip and written per response chunk
+    BATCH_SIZE = 1000
+
+    # Motivations that carry the classroom they were written in
+    CLASSROOM_SCOPED_MOTIVATIONS = ["commenting", "replying", "flagging", "upvoting"]
+
+    def __init__(self):
+        super().__init__(AnnotationModel)
+
+    # ==================== Helper Methods ====================
+
+    def _verify_collection_exists(self, db: Session, collection_id: int) -> None:
+        """Raises HTTPException 404 if the collection does not exist."""
+        exists = db.execute(
+            select(DocumentCollectionModel.id).where(
+                DocumentCollectionModel.id == collection_id
+            )
+        ).first()
+
+        if exists is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Document collection not found",
+            )
+
+    def _build_query(
+        self,
+        collection_id: int,
+        motivation: Optional[str],
+        classroom_id: Optional[int],
+        since: Optional[datetime],
+    ):
+        """Column-only select of a collection's annotations, ordered by ID."""
+        if classroom_id is not None:
+            classroom_scope = self.model.classroom_id == classroom_id
+        else:
+            classroom_scope = self.model.classroom_id.is_(None)
+
+        query = (
+            select(
+                self.model.id,
+                self.model.type,
+                self.model.motivation,
+                self.model.body,
+                self.model.target,
+                self.model.created,
+                self.model.modified,
+                self.model.generator,
+                self.model.generated,
+                self.model.document_collection_id,
+                self.model.document_id,
+                self.model.document_element_id,
+                self.model.classroom_id,
+                self.model.creator_id,
+                User.first_name,
+                User.last_name,
+            )
+            .outerjoin(User, self.model.creator_id == User.id)
+            .where(self.model.document_collection_id == collection_id)
+            .where(
+                or_(
+                    self.model.motivation.not_in(self.CLASSROOM_SCOPED_MOTIVATIONS),
+                    and_(
+                        self.model.motivation.in_(self.CLASSROOM_SCOPED_MOTIVATIONS),
+                        classroom_scope,
+                    ),
+                )
+            )
+            .order_by(self.model.id)
+        )
+
+        if motivation:
+            query = query.where(self.model.motivation == motivation)
+
+        if since is not None:
+            query = query.where(self.model.modified >= since)
+
+        return query.execution_options(yield_per=self.BATCH_SIZE)
+
+    def _isoformat(self, value: Optional[datetime]) -> Optional[str]:
+        return value.isoformat() if value is not None else None
+
+    def _to_w3c(self, row) -> Dict[str, Any]:
+        """Map an exported row to a W3C Web Annotation."""
+        name = " ".join(part for part in (row.first_name, row.last_name) if part)
+
+        return {
+            "id": f"Annotation/{row.id}",
+            "type": row.type or "Annotation",
+            "motivation": row.motivation,
+            "body": row.body,
+            "target": row.target,
+            "creator": {"id": f"Users/{row.creator_id}", "type": "Person", "name": name},
+            "created": self._isoformat(row.created),
+            "modified": self._isoformat(row.modified),
+            "generator": row.generator,
+            "generated": self._isoformat(row.generated),
+            "document_collection_id": row.document_collection_id,
+            "document_id": row.document_id,
+            "document_element_id": row.document_element_id,
+            "classroom_id": row.classroom_id,
+        }
+
+    # ==================== Export Operations ====================
+
+    def export(
+        self,
+        db: Session,
+        collection_id: int,
+        format: str = "ndjson",
+        motivation: Optional[str] = None,
+        classroom_id: Optional[int] = None,
+        since: Optional[datetime] = None,
+    ) -> Iterator[bytes]:
+        """
+        Stream a collection's annotations as NDJSON or a JSON-LD AnnotationCollection.
+
+        Validation happens before the first chunk is produced, so a missing
+        collection or unknown format still surfaces as a normal HTTP error.
+
+        Raises HTTPException 400 for an unknown format.
+        Raises HTTPException 404 if the collection does not exist.
+        """
+        if format not in self.FORMATS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unsupported export format '{format}'. Use one of: {', '.join(self.FORMATS)}",
+            )
+
+        self._verify_collection_exists(db, collection_id)
+        query = self._build_query(collection_id, motivation, classroom_id, since)
+
+        if format == "ndjson":
+            return self._stream_ndjson(db, query)
+        return self._stream_jsonld(db, query, collection_id)
+
+    def _stream_ndjson(self, db: Session, query) -> Iterator[bytes]:
+        """One standalone JSON-LD annotation per line."""
+        for partition in db.execute(query).partitions():
+            yield "".join(
+                json.dumps({"@context": self.W3C_CONTEXT, **self._to_w3c(row)}) + "\n"
+                for row in partition
+            ).encode("utf-8")
+
+    def _stream_jsonld(self, db: Session, query, collection_id: int) -> Iterator[bytes]:
+        """A single AnnotationCollection whose first page holds every annotation."""
+        yield (
+            f'{{"@context": {json.dumps(self.W3C_CONTEXT)}, '
+            f'"id": "Collections/{collection_id}/annotations", '
+            '"type": "AnnotationCollection", '
+            '"first": {"type": "AnnotationPage", "items": ['
+        ).encode("utf-8")
+
+        separator = ""
+        for partition in db.execute(query).partitions():
+            chunk = []
+            for row in partition:
+                chunk.append(separator + json.dumps(self._to_w3c(row)))
+                separator = ","
+            yield "".join(chunk).encode("utf-8")
+
+        yield b"]}}"
+
+
+# Singleton instance for easy importing
+annotation_export_service = AnnotationExportService()
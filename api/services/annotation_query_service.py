@@ -1,24 +1,72 @@
 # services/annotation_query_service.py
 
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Iterable, Optional, Set, Union
 from collections import defaultdict
-from fastapi import HTTPException
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, and_, or_
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session, joinedload, load_only, selectinload
+from sqlalchemy import Select, select, literal, and_, or_, case, distinct, func
 
 from models.models import (
     Annotation as AnnotationModel,
     DocumentElement as DocumentElementModel,
     Document,
+    User,
 )
 from services.base_service import BaseService
+from services.annotation_target_service import annotation_target_service
 
 
 class AnnotationQueryService(BaseService[AnnotationModel]):
     """Service for complex annotation queries."""
 
+    # How many levels of replies/flags/upvotes to follow below an element's annotations
+    THREAD_DEPTH = 1
+
+    # Motivations whose visibility follows the annotation they target
+    INHERITED_MOTIVATIONS = ["replying", "flagging", "upvoting"]
+
+    # Columns read when serializing annotations (owner_id is never returned)
+    RESPONSE_COLUMN_NAMES = [
+        "id",
+        "context",
+        "document_collection_id",
+        "document_id",
+        "document_element_id",
+        "creator_id",
+        "classroom_id",
+        "type",
+        "motivation",
+        "generator",
+        "generated",
+        "body",
+        "target",
+        "status",
+        "annotation_type",
+        "created",
+        "modified",
+    ]
+
+    # Upper bound on element IDs accepted by a single batch request
+    MAX_BATCH_ELEMENTS = 1000
+
+    # Upper bound on annotation IDs accepted by a single aggregates request
+    MAX_BATCH_ANNOTATIONS = 1000
+
+    # Seconds a cached linked-text result is served; bounds staleness across workers
+    LINKED_TEXT_TTL = 300
+
+    # Seconds a cached pending-flag count is served; bounds staleness across workers
+    FLAG_COUNT_TTL = 30
+
     def __init__(self):
         super().__init__(AnnotationModel)
+        self._linked_text_lock = threading.Lock()
+        self._linked_text_cache: Dict[int, tuple] = {}
+        self._flag_count_lock = threading.Lock()
+        self._flag_count_cache: Dict[Optional[int], tuple] = {}
 
     # ==================== Helper Methods ====================
 
@@ -26,12 +74,11 @@ class AnnotationQueryService(BaseService[AnnotationModel]):
         """Build the source URI for a document element."""
         return f"DocumentElements/{document_element_id}"
 
-    def _build_jsonb_path_expr(self, uri: str) -> str:
-        """
-        Build JSONB path expression for finding targets.
-        Handles both flat targets and nested (one level deep).
-        """
-        return f'$[*] ? ((@.source == "{uri}") || (@[*].source == "{uri}"))'
+    def _targets_element(self, document_element_id: int):
+        """Filter clause for annotations that target a document element."""
+        return AnnotationModel.id.in_(
+            annotation_target_service.annotation_ids_for_element(document_element_id)
+        )
 
     def _extract_element_id_from_source(self, source: str) -> Optional[int]:
         """
@@ -49,15 +96,87 @@ class AnnotationQueryService(BaseService[AnnotationModel]):
         except (ValueError, IndexError, AttributeError):
             return None
 
+    def _response_columns(self) -> List[Any]:
+        """Annotation columns needed to serialize an `Annotation` response."""
+        return [
+            getattr(AnnotationModel, name) for name in self.RESPONSE_COLUMN_NAMES
+        ]
+
+    def _build_thread_cte(
+        self, element_ids: Union[List[int], Select], max_depth: int
+    ):
+        """
+        Build a recursive CTE of (annotation_id, element_id, depth) rows.
+
+        Depth 0 holds annotations targeting the given elements; each further
+        level holds annotations targeting the previous level (replies, flags,
+        upvotes, tags). Every step is an index probe on annotation_targets.
+        """
+        targets = annotation_target_service.model
+
+        thread = (
+            select(
+                targets.annotation_id.label("annotation_id"),
+                targets.source_id.label("element_id"),
+                literal(0).label("depth"),
+            )
+            .where(
+                targets.source_kind == annotation_target_service.DOCUMENT_ELEMENT,
+                targets.source_id.in_(element_ids),
+            )
+            .cte("annotation_thread", recursive=True)
+        )
+
+        replies = (
+            select(
+                targets.annotation_id,
+                thread.c.element_id,
+                thread.c.depth + 1,
+            )
+            .join(
+                thread,
+                and_(
+                    targets.source_kind == annotation_target_service.ANNOTATION,
+                    targets.source_id == thread.c.annotation_id,
+                ),
+            )
+            .where(thread.c.depth < max_depth)
+        )
+
+        return thread.union(replies)
+
+    def _apply_visibility_filter(self, query, classroom_id: Optional[int]):
+        """
+        Apply classroom visibility rules to a thread query.
+
+        Comments are classroom-specific; replies, flags and upvotes inherit
+        visibility from their parent; scholarly, linking, external_reference
+        and tagging annotations are always global.
+        """
+        if classroom_id is not None:
+            comment_scope = AnnotationModel.classroom_id == classroom_id
+        else:
+            comment_scope = AnnotationModel.classroom_id.is_(None)
+
+        return query.filter(
+            or_(
+                and_(AnnotationModel.motivation == "commenting", comment_scope),
+                AnnotationModel.motivation.in_(self.INHERITED_MOTIVATIONS),
+                and_(
+                    AnnotationModel.motivation.not_in(
+                        ["commenting", *self.INHERITED_MOTIVATIONS]
+                    ),
+                    AnnotationModel.motivation.is_not(None),
+                ),
+            )
+        )
+
     # ==================== Query Methods ====================
 
     def get_links_for_element(
         self, db: Session, document_element_id: int, classroom_id: Optional[int]
     ) -> List[AnnotationModel]:
         """Get linking annotations that reference a specific document element."""
-        uri = self._build_source_uri(document_element_id)
-        path_expr = self._build_jsonb_path_expr(uri)
-
         query = (
             self.get_base_query(db)
             .options(joinedload(AnnotationModel.creator))
@@ -65,92 +184,31 @@ class AnnotationQueryService(BaseService[AnnotationModel]):
         )
 
         query = self.apply_classroom_filter(query, classroom_id)
-        query = query.filter(func.jsonb_path_exists(AnnotationModel.target, path_expr))
+        query = query.filter(self._targets_element(document_element_id))
 
         return query.all()
 
     def get_by_motivation(
-        self, db: Session, document_element_id: int, classroom_id: Optional[int]
+        self,
+        db: Session,
+        document_element_id: int,
+        classroom_id: Optional[int],
+        max_depth: int = THREAD_DEPTH,
     ) -> Dict[str, List[AnnotationModel]]:
-        """Get annotations grouped by motivation for a document element."""
-        uri = self._build_source_uri(document_element_id)
-        path_expr = self._build_jsonb_path_expr(uri)
-
-        # First, get all annotation IDs that target this document element
-        base_query = self.get_base_query(db).filter(
-            func.jsonb_path_exists(AnnotationModel.target, path_expr)
-        )
-        base_annotations = base_query.all()
-        base_annotation_ids = [anno.id for anno in base_annotations]
-
-        # Build query for annotations targeting either:
-        # 1. The document element directly
-        # 2. Annotations that target the document element (for replies/flags/upvotes)
-        query = self.get_base_query(db).options(joinedload(AnnotationModel.creator))
-
-        if base_annotation_ids:
-            # Create path expressions for annotation targets
-            target_conditions = [
-                func.jsonb_path_exists(AnnotationModel.target, path_expr)
-            ]
-
-            for anno_id in base_annotation_ids:
-                anno_path_expr = f'$[*] ? ((@.source == "Annotation/{anno_id}") || (@[*].source == "Annotation/{anno_id}"))'
-                target_conditions.append(
-                    func.jsonb_path_exists(AnnotationModel.target, anno_path_expr)
-                )
+        """
+        Get annotations grouped by motivation for a document element.
 
-            query = query.filter(or_(*target_conditions))
-        else:
-            # No base annotations, just filter by document element
-            query = query.filter(
-                func.jsonb_path_exists(AnnotationModel.target, path_expr)
-            )
+        Includes annotations targeting the element directly plus their replies,
+        flags, upvotes and tags, resolved in a single query up to `max_depth`.
+        """
+        thread = self._build_thread_cte([document_element_id], max_depth)
 
-        # Apply classroom filtering
-        if classroom_id is not None:
-            query = query.filter(
-                or_(
-                    # Comments are classroom-specific
-                    and_(
-                        AnnotationModel.motivation == "commenting",
-                        AnnotationModel.classroom_id == classroom_id,
-                    ),
-                    # Replies, flags, upvotes inherit visibility from parent (no filter needed)
-                    AnnotationModel.motivation.in_(
-                        ["replying", "flagging", "upvoting"]
-                    ),
-                    # Scholarly, linking, external_reference, tagging are always global
-                    and_(
-                        AnnotationModel.motivation.not_in(
-                            ["commenting", "replying", "flagging", "upvoting"]
-                        ),
-                        AnnotationModel.motivation.is_not(None),
-                    ),
-                )
-            )
-        else:
-            # Show comments made outside classrooms + all other annotations
-            query = query.filter(
-                or_(
-                    # Comments without classroom
-                    and_(
-                        AnnotationModel.motivation == "commenting",
-                        AnnotationModel.classroom_id.is_(None),
-                    ),
-                    # Replies, flags, upvotes (no classroom filter)
-                    AnnotationModel.motivation.in_(
-                        ["replying", "flagging", "upvoting"]
-                    ),
-                    # All other global motivations
-                    and_(
-                        AnnotationModel.motivation.not_in(
-                            ["commenting", "replying", "flagging", "upvoting"]
-                        ),
-                        AnnotationModel.motivation.is_not(None),
-                    ),
-                )
-            )
+        query = self.get_base_query(db).options(
+            load_only(*self._response_columns()),
+            joinedload(AnnotationModel.creator).selectinload(User.roles),
+        )
+        query = query.filter(AnnotationModel.id.in_(select(thread.c.annotation_id)))
+        query = self._apply_visibility_filter(query, classroom_id)
 
         annotations = query.all()
 
@@ -161,159 +219,324 @@ class AnnotationQueryService(BaseService[AnnotationModel]):
 
         return dict(grouped_annotations)
 
-    def get_linked_text_info(
-        self, db: Session, document_element_id: int
-    ) -> Dict[str, Any]:
+    def get_by_elements(
+        self,
+        db: Session,
+        element_ids: Union[List[int], Select],
+        classroom_id: Optional[int],
+        max_depth: int = THREAD_DEPTH,
+        modified_since: Optional[datetime] = None,
+    ) -> Dict[int, Dict[str, List[AnnotationModel]]]:
         """
-        Returns only the specific documents and elements that are linked.
+        Get annotations for many document elements, keyed by element ID and then
+        by motivation.
+
+        `element_ids` may be a list of IDs or a select of IDs. Threads for all
+        elements are resolved in one query and creators are loaded once with a
+        shared IN lookup, so the cost does not grow with one round trip per
+        element and motivation. With `modified_since`, only annotations created
+        or modified at or after that time are returned.
         """
-        uri = self._build_source_uri(document_element_id)
-        path_expr = self._build_jsonb_path_expr(uri)
+        thread = self._build_thread_cte(element_ids, max_depth)
 
-        # Query for linking annotations that reference this element
         query = (
-            self.get_base_query(db)
-            .options(joinedload(AnnotationModel.creator))
-            .filter(AnnotationModel.motivation == "linking")
-            .filter(func.jsonb_path_exists(AnnotationModel.target, path_expr))
+            db.query(thread.c.element_id, AnnotationModel)
+            .join(thread, thread.c.annotation_id == AnnotationModel.id)
+            .options(
+                load_only(*self._response_columns()),
+                selectinload(AnnotationModel.creator).selectinload(User.roles),
+            )
         )
+        # Same rules as get_by_motivation, so a batch matches the per-element calls it replaces
+        query = self._apply_visibility_filter(query, classroom_id)
+        if modified_since is not None:
+            query = query.filter(AnnotationModel.modified >= modified_since)
+        query = query.order_by(thread.c.element_id, AnnotationModel.id)
+
+        # The same annotation can reach an element at more than one depth
+        seen = set()
+        grouped: Dict[int, Dict[str, List[AnnotationModel]]] = defaultdict(
+            lambda: defaultdict(list)
+        )
+        for element_id, annotation in query.all():
+            if (element_id, annotation.id) in seen:
+                continue
+            seen.add((element_id, annotation.id))
+            grouped[element_id][annotation.motivation].append(annotation)
 
-        matching_annotations = query.all()
+        return {
+            element_id: dict(by_motivation)
+            for element_id, by_motivation in grouped.items()
+        }
 
-        if not matching_annotations:
-            return {
-                "source_element_id": document_element_id,
-                "linked_documents": [],
-                "total_links": 0,
-            }
+    def get_by_document(
+        self, db: Session, document_id: int, classroom_id: Optional[int]
+    ) -> Dict[int, Dict[str, List[AnnotationModel]]]:
+        """
+        Get annotations for every element of a document, keyed by element ID and
+        then by motivation.
 
-        # Extract unique element IDs from all targets
-        element_ids = set()
-        for annotation in matching_annotations:
-            if annotation.target:
-                for target in annotation.target:
-                    if isinstance(target, list):
-                        for sub_target in target:
-                            element_id = self._extract_element_id_from_source(
-                                sub_target.get("source", "")
-                            )
-                            if element_id and element_id != document_element_id:
-                                element_ids.add(element_id)
-                    else:
-                        element_id = self._extract_element_id_from_source(
-                            target.get("source", "")
-                        )
-                        if element_id and element_id != document_element_id:
-                            element_ids.add(element_id)
-
-        # Fetch only the specific elements we need
-        elements_query = (
-            db.query(DocumentElementModel)
-            .filter(DocumentElementModel.id.in_(list(element_ids)))
-            .all()
+        Raises HTTPException 404 if the document does not exist.
+        """
+        if db.query(Document.id).filter(Document.id == document_id).first() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Document not found"
+            )
+
+        element_ids = select(DocumentElementModel.id).where(
+            DocumentElementModel.document_id == document_id
         )
+        return self.get_by_elements(db, element_ids, classroom_id)
+
+    def get_aggregates(
+        self,
+        db: Session,
+        annotation_ids: List[int],
+        classroom_id: Optional[int],
+        user_id: Optional[int] = None,
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Reply, upvote and flag counts for many annotations, keyed by annotation ID.
 
-        # Get unique document IDs from these elements
-        document_ids = set(el.document_id for el in elements_query)
+        Counted with one GROUP BY over the annotation target index rather than by
+        loading the replies. `upvoted` says whether `user_id` upvoted the annotation.
+        Annotations that are missing or not visible in the classroom context get
+        zero counts.
+        """
+        targets = annotation_target_service.model
 
-        # Fetch only the specific documents we need
-        documents_query = (
-            db.query(Document).filter(Document.id.in_(list(document_ids))).all()
+        visible_ids = self._apply_visibility_filter(
+            select(AnnotationModel.id).where(AnnotationModel.id.in_(annotation_ids)),
+            classroom_id,
         )
 
-        # Create lookup maps
-        elements_map = {el.id: el for el in elements_query}
-        documents_map = {doc.id: doc for doc in documents_query}
+        def count_of(motivation: str):
+            return func.count(
+                distinct(case((AnnotationModel.motivation == motivation, AnnotationModel.id)))
+            )
 
-        # Build response with minimal data
-        linked_documents = {}
+        upvoted_by_user = func.count(
+            distinct(
+                case(
+                    (
+                        and_(
+                            AnnotationModel.motivation == "upvoting",
+                            AnnotationModel.creator_id == user_id,
+                        ),
+                        AnnotationModel.id,
+                    )
+                )
+            )
+        )
 
-        for annotation in matching_annotations:
-            if not annotation.target:
-                continue
+        rows = db.execute(
+            select(
+                targets.source_id,
+                count_of("replying"),
+                count_of("upvoting"),
+                count_of("flagging"),
+                upvoted_by_user,
+            )
+            .join(AnnotationModel, AnnotationModel.id == targets.annotation_id)
+            .where(
+                targets.source_kind == annotation_target_service.ANNOTATION,
+                targets.source_id.in_(visible_ids),
+                AnnotationModel.motivation.in_(self.INHERITED_MOTIVATIONS),
+            )
+            .group_by(targets.source_id)
+        ).all()
+
+        aggregates = {
+            annotation_id: {
+                "reply_count": 0,
+                "upvote_count": 0,
+                "flag_count": 0,
+                "upvoted": False,
+            }
+            for annotation_id in annotation_ids
+        }
+        for annotation_id, replies, upvotes, flags, upvoted in rows:
+            aggregates[annotation_id] = {
+                "reply_count": replies,
+                "upvote_count": upvotes,
+                "flag_count": flags,
+                "upvoted": user_id is not None and upvoted > 0,
+            }
 
-            # Track which documents we've already added this annotation to
-            processed_documents = set()
+        return aggregates
 
-            for target in annotation.target:
-                targets_to_process = target if isinstance(target, list) else [target]
+    def get_linked_text_info(
+        self, db: Session, document_element_id: int, version: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Returns only the specific documents and elements that are linked.
 
-                for single_target in targets_to_process:
-                    source = single_target.get("source", "")
-                    target_element_id = self._extract_element_id_from_source(source)
+        Results are cached per element until a linking annotation touching the
+        element is written (see invalidate_linked_text) or LINKED_TEXT_TTL expires.
+        When the caller passes the element's version, a cached result built at
+        another version is not served, so writes in other workers show at once.
+        """
+        with self._linked_text_lock:
+            cached = self._linked_text_cache.get(document_element_id)
+        if (
+            cached is not None
+            and time.monotonic() - cached[0] < self.LINKED_TEXT_TTL
+            and (version is None or cached[1] == version)
+        ):
+            return cached[2]
+
+        result = self._build_linked_text_info(db, document_element_id)
+
+        with self._linked_text_lock:
+            self._linked_text_cache[document_element_id] = (
+                time.monotonic(),
+                version,
+                result,
+            )
 
-                    if not target_element_id:
-                        continue
+        return result
 
-                    # Skip source element
-                    if target_element_id == document_element_id:
-                        continue
+    def thread_element_ids(self, db: Session, *target_lists: Optional[List]) -> Set[int]:
+        """Elements whose get_by_motivation threads show annotations with these targets."""
+        return annotation_target_service.thread_element_ids(
+            db, *target_lists, max_depth=self.THREAD_DEPTH
+        )
 
-                    element = elements_map.get(target_element_id)
-                    if not element:
-                        continue
+    def invalidate_linked_text(self, element_ids: Optional[Iterable[int]] = None) -> None:
+        """Drop cached linked-text info for the given elements, or for all elements."""
+        with self._linked_text_lock:
+            if element_ids is None:
+                self._linked_text_cache.clear()
+                return
+            for element_id in element_ids:
+                self._linked_text_cache.pop(element_id, None)
 
-                    document = documents_map.get(element.document_id)
-                    if not document:
-                        continue
+    def flag_count(self, db: Session, classroom_id: Optional[int]) -> int:
+        """
+        Count the flags in a classroom scope.
 
-                    doc_id = document.id
+        Counts are cached per classroom scope until a flag in that scope is
+        written (see invalidate_flag_count) or FLAG_COUNT_TTL expires. The
+        cache is per process, so writes through another worker can leave a
+        count up to FLAG_COUNT_TTL seconds stale.
+        """
+        with self._flag_count_lock:
+            cached = self._flag_count_cache.get(classroom_id)
+        if cached is not None and time.monotonic() - cached[0] < self.FLAG_COUNT_TTL:
+            return cached[1]
+
+        query = db.query(self.model).filter(self.model.motivation == "flagging")
+        count = self.apply_classroom_filter(query, classroom_id).count()
+
+        with self._flag_count_lock:
+            self._flag_count_cache[classroom_id] = (time.monotonic(), count)
+
+        return count
+
+    def invalidate_flag_count(
+        self, classroom_ids: Optional[Iterable[Optional[int]]] = None
+    ) -> None:
+        """Drop cached flag counts for the given classroom scopes, or for all."""
+        with self._flag_count_lock:
+            if classroom_ids is None:
+                self._flag_count_cache.clear()
+                return
+            for classroom_id in classroom_ids:
+                self._flag_count_cache.pop(classroom_id, None)
+
+    def _build_linked_text_info(
+        self, db: Session, document_element_id: int
+    ) -> Dict[str, Any]:
+        """Build the linked-text response in one pass over each annotation's targets."""
+        # Only the target JSON is needed; creators are not part of the response
+        matching_annotations = (
+            self.get_base_query(db)
+            .options(load_only(AnnotationModel.id, AnnotationModel.target))
+            .filter(AnnotationModel.motivation == "linking")
+            .filter(self._targets_element(document_element_id))
+            .all()
+        )
 
-                    # Skip if we've already added this annotation for this document
-                    if doc_id in processed_documents:
-                        continue
+        # Flatten each annotation's targets once: (element_id, target_info)
+        flattened = []
+        element_ids = set()
+        for annotation in matching_annotations:
+            targets = []
+            for single_target in annotation_target_service.iter_targets(
+                annotation.target
+            ):
+                source = single_target.get("source", "")
+                selector = single_target.get("selector") or {}
+                refined_by = selector.get("refined_by") or {}
+                element_id = self._extract_element_id_from_source(source)
+
+                targets.append(
+                    (
+                        element_id,
+                        selector.get("value", "Linked text"),
+                        {
+                            "sourceURI": source,
+                            "start": refined_by.get("start", 0),
+                            "end": refined_by.get("end", 0),
+                            "text": selector.get("value", ""),
+                        },
+                    )
+                )
+                if element_id and element_id != document_element_id:
+                    element_ids.add(element_id)
+            flattened.append((annotation.id, targets))
+
+        # Look up only the document columns the response needs
+        element_documents = {}
+        if element_ids:
+            rows = db.execute(
+                select(
+                    DocumentElementModel.id,
+                    Document.id,
+                    Document.title,
+                    Document.document_collection_id,
+                )
+                .join(Document, Document.id == DocumentElementModel.document_id)
+                .where(DocumentElementModel.id.in_(element_ids))
+            ).all()
+            element_documents = {row[0]: row[1:] for row in rows}
 
-                    processed_documents.add(doc_id)
+        linked_documents = {}
+        for annotation_id, targets in flattened:
+            all_targets = [target_info for _, _, target_info in targets]
 
-                    # Get selector info
-                    selector = single_target.get("selector", {})
-                    text_value = selector.get("value", "Linked text")
-                    refined_by = selector.get("refined_by", {})
+            # Track which documents we've already added this annotation to
+            processed_documents = set()
 
-                    # Build target info
-                    target_info = {
-                        "sourceURI": source,
-                        "start": refined_by.get("start", 0),
-                        "end": refined_by.get("end", 0),
-                        "text": text_value,
+            for element_id, text_value, target_info in targets:
+                if not element_id or element_id == document_element_id:
+                    continue
+
+                document = element_documents.get(element_id)
+                if document is None:
+                    continue
+
+                doc_id, title, collection_id = document
+                if doc_id in processed_documents:
+                    continue
+                processed_documents.add(doc_id)
+
+                if doc_id not in linked_documents:
+                    linked_documents[doc_id] = {
+                        "documentId": doc_id,
+                        "documentTitle": title,
+                        "collectionId": collection_id,
+                        "linkedTextOptions": [],
                     }
 
-                    # Group by document
-                    if doc_id not in linked_documents:
-                        linked_documents[doc_id] = {
-                            "documentId": doc_id,
-                            "documentTitle": document.title,
-                            "collectionId": document.document_collection_id,
-                            "linkedTextOptions": [],
-                        }
-
-                    # Build all targets info for this annotation
-                    all_targets = []
-                    for t in annotation.target:
-                        targets_list = t if isinstance(t, list) else [t]
-                        for single_t in targets_list:
-                            t_source = single_t.get("source", "")
-                            t_selector = single_t.get("selector", {})
-                            t_refined = t_selector.get("refined_by", {})
-
-                            all_targets.append(
-                                {
-                                    "sourceURI": t_source,
-                                    "start": t_refined.get("start", 0),
-                                    "end": t_refined.get("end", 0),
-                                    "text": t_selector.get("value", ""),
-                                }
-                            )
-
-                    # Add this as a linked text option
-                    linked_documents[doc_id]["linkedTextOptions"].append(
-                        {
-                            "linkedText": text_value,
-                            "linkingAnnotationId": annotation.id,
-                            "targetInfo": target_info,
-                            "allTargets": all_targets,
-                        }
-                    )
+                linked_documents[doc_id]["linkedTextOptions"].append(
+                    {
+                        "linkedText": text_value,
+                        "linkingAnnotationId": annotation_id,
+                        "targetInfo": {**target_info, "text": text_value},
+                        "allTargets": all_targets,
+                    }
+                )
 
         return {
             "source_element_id": document_element_id,
@@ -0,0 +1,97 @@
+# services/annotation_serializer.py
+
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from models.models import Annotation as AnnotationModel, User
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+class AnnotationSerializer:
+    """
+    Fast serialization path for annotation list responses.
+
+    The `response_model` path re-validates every annotation through the
+    `Annotation` schema, including the body, the target union and the embedded
+    creator, before dumping it. This path builds the same JSON shape directly
+    from the loaded rows and encodes it with orjson when installed.
+
+    `body` and `target` are emitted as stored: they were validated by
+    `AnnotationCreate` on write and are not validated again on the way out.
+    """
+
+    MEDIA_TYPE = "application/json"
+
+    # ==================== Helper Methods ====================
+
+    def _datetime(self, value: Optional[datetime]) -> Optional[str]:
+        return value.isoformat() if value is not None else None
+
+    def _user(self, user: Optional[User]) -> Optional[Dict[str, Any]]:
+        if user is None:
+            return None
+        return {
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "email": user.email,
+            "username": user.username,
+            "user_metadata": user.user_metadata,
+            "viewed_tutorial": user.viewed_tutorial,
+            "id": user.id,
+            "is_active": user.is_active,
+            "roles": [
+                {"name": role.name, "description": role.description, "id": role.id}
+                for role in user.roles or []
+            ],
+        }
+
+    # ==================== Serialization ====================
+
+    def annotation(self, annotation: AnnotationModel) -> Dict[str, Any]:
+        """One annotation in the shape of the `Annotation` response schema."""
+        return {
+            "context": annotation.context,
+            "document_collection_id": annotation.document_collection_id,
+            "document_id": annotation.document_id,
+            "document_element_id": annotation.document_element_id,
+            "creator_id": annotation.creator_id,
+            "classroom_id": annotation.classroom_id,
+            "type": annotation.type,
+            "motivation": annotation.motivation,
+            "generator": annotation.generator,
+            "body": annotation.body,
+            "target": annotation.target,
+            "status": annotation.status,
+            "annotation_type": annotation.annotation_type,
+            "id": annotation.id,
+            "created": self._datetime(annotation.created),
+            "modified": self._datetime(annotation.modified),
+            "generated": self._datetime(annotation.generated),
+            "creator": self._user(annotation.creator),
+        }
+
+    def annotations(self, annotations: Iterable[AnnotationModel]) -> List[Dict[str, Any]]:
+        """A list of annotations, as returned by `List[Annotation]` endpoints."""
+        return [self.annotation(annotation) for annotation in annotations]
+
+    def grouped(self, grouped: Dict[Any, Any]) -> Dict[Any, Any]:
+        """Annotations grouped by key (motivation, element), nested to any depth."""
+        return {
+            key: self.grouped(value) if isinstance(value, dict) else self.annotations(value)
+            for key, value in grouped.items()
+        }
+
+    def dumps(self, payload: Any) -> bytes:
+        """Encode a payload of plain dicts and lists as JSON bytes."""
+        if orjson is not None:
+            return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(payload, separators=(",", ":")).encode()
+
+
+# Singleton instance for easy importing
+annotation_serializer = AnnotationSerializer()
@@ -1,38 +1,130 @@
 # services/annotation_service.py
 
 import os
-from typing import List, Optional
+import threading
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 from fastapi import HTTPException
+from pydantic import ValidationError
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import text
-
-from models.models import Annotation as AnnotationModel, User, Group
+from sqlalchemy import text, exists, select, insert
+
+from models.models import (
+    Annotation as AnnotationModel,
+    DocumentCollection,
+    DocumentElement as DocumentElementModel,
+    Document,
+    User,
+    group_members,
+)
 from schemas.annotations import AnnotationCreate, AnnotationPatch, AnnotationAddTarget
 from services.base_service import BaseService
+from services.annotation_target_service import annotation_target_service
+from services.annotation_write_service import annotation_write_service
+
+
+class AnnotationIdAllocator:
+    """
+    Thread-safe hi/lo allocator for annotation body and target IDs.
+
+    IDs are reserved from annotation_body_id_seq and annotation_target_id_seq
+    in blocks and handed out from memory, so most creates issue no sequence
+    query at all. Each worker process reserves its own values from the
+    sequences, so blocks never overlap across uvicorn workers. IDs left in a
+    block when the process exits are never used, which only leaves gaps.
+
+    Without an explicit schema, the sequences' schema is read from DB_SCHEMA
+    when the first block is reserved.
+    """
+
+    def __init__(self, block_size: int, schema: Optional[str] = None):
+        self.block_size = max(1, block_size)
+        self.schema = schema
+        self._lock = threading.Lock()
+        self._body_ids: deque = deque()
+        self._target_ids: deque = deque()
+        self._query = None
+
+    def _sequence_query(self):
+        """The block query for both sequences, built on first use."""
+        if self._query is None:
+            schema = self.schema or os.environ.get("DB_SCHEMA")
+            if not schema:
+                raise RuntimeError("DB_SCHEMA must be set to allocate annotation IDs")
+            self._query = text(
+                f"SELECT "
+                f"ARRAY(SELECT nextval('{schema}.annotation_body_id_seq') "
+                f"FROM generate_series(1, :body_count)), "
+                f"ARRAY(SELECT nextval('{schema}.annotation_target_id_seq') "
+                f"FROM generate_series(1, :target_count))"
+            )
+        return self._query
+
+    def _fetch(
+        self, db: Session, body_count: int, target_count: int
+    ) -> Tuple[List[int], List[int]]:
+        """Take new values from both sequences in one round trip."""
+        return db.execute(
+            self._sequence_query(),
+            {"body_count": body_count, "target_count": target_count},
+        ).one()
+
+    def reserve(
+        self, db: Session, body_count: int, target_count: int
+    ) -> Tuple[List[int], List[int]]:
+        """
+        Take body and target IDs, refilling both pools in one round trip if either runs short.
+        """
+        with self._lock:
+            body_short = body_count - len(self._body_ids)
+            target_short = target_count - len(self._target_ids)
+
+            if body_short > 0 or target_short > 0:
+                body_ids, target_ids = self._fetch(
+                    db,
+                    body_short + self.block_size if body_short > 0 else 0,
+                    target_short + self.block_size if target_short > 0 else 0,
+                )
+                self._body_ids.extend(body_ids)
+                self._target_ids.extend(target_ids)
+
+            return (
+                [self._body_ids.popleft() for _ in range(body_count)],
+                [self._target_ids.popleft() for _ in range(target_count)],
+            )
 
 
 class AnnotationService(BaseService[AnnotationModel]):
     """Service for annotation CRUD operations."""
 
+    # Upper bound on annotations accepted by a single bulk create
+    MAX_BULK_ANNOTATIONS = 5000
+
+    # IDs reserved per sequence round trip; override with ANNOTATION_ID_BLOCK_SIZE
+    ID_BLOCK_SIZE = 50
+
     def __init__(self):
         super().__init__(AnnotationModel)
+        self.id_allocator = AnnotationIdAllocator(
+            int(os.environ.get("ANNOTATION_ID_BLOCK_SIZE", self.ID_BLOCK_SIZE))
+        )
 
     # ==================== ID Generation ====================
 
     def generate_body_id(self, db: Session) -> int:
-        """Generate a unique body ID using the sequence."""
-        schema = os.environ.get("DB_SCHEMA")
-        result = db.execute(text(f"SELECT nextval('{schema}.annotation_body_id_seq')"))
-        return result.scalar_one()
+        """Take a unique body ID from the in-process block."""
+        return self.id_allocator.reserve(db, 1, 0)[0][0]
 
     def generate_target_id(self, db: Session) -> int:
-        """Generate a unique target ID using the sequence."""
-        schema = os.environ.get("DB_SCHEMA")
-        result = db.execute(
-            text(f"SELECT nextval('{schema}.annotation_target_id_seq')")
-        )
-        return result.scalar_one()
+        """Take a unique target ID from the in-process block."""
+        return self.id_allocator.reserve(db, 0, 1)[1][0]
+
+    def reserve_ids(
+        self, db: Session, body_count: int, target_count: int
+    ) -> Tuple[List[int], List[int]]:
+        """Reserve many body and target IDs, with at most one sequence round trip."""
+        return self.id_allocator.reserve(db, body_count, target_count)
 
     # ==================== Helper Methods ====================
 
@@ -46,16 +138,98 @@ class AnnotationService(BaseService[AnnotationModel]):
                 result.append(target.model_dump(by_alias=True, exclude_none=True))
         return result
 
+    def _iter_targets(self, targets: List) -> Iterator:
+        """Yield every target model, flattening nested target lists."""
+        for target in targets:
+            if isinstance(target, list):
+                yield from target
+            else:
+                yield target
+
     def _prepare_targets_for_create(
         self, db: Session, targets: List, user: User
     ) -> None:
         """Generate IDs and set creator for targets (mutates in place)."""
-        for target in targets:
-            if isinstance(target, list):
-                for sub_target in target:
-                    sub_target.id = self.generate_target_id(db)
+        for target in self._iter_targets(targets):
+            target.id = self.generate_target_id(db)
+
+    def _set_primary_target(self, db_annotation: AnnotationModel) -> None:
+        """Keep the primary target columns in step with the target JSON."""
+        for column, value in annotation_target_service.primary_ids(
+            db_annotation.target
+        ).items():
+            setattr(db_annotation, column, value)
+
+    def _build_row(
+        self, annotation: AnnotationCreate, user: User, classroom_id: Optional[int]
+    ) -> Dict[str, Any]:
+        """Column values for a new annotation whose body and target IDs are set."""
+        now = datetime.now()
+        target = self._dump_targets(annotation.target)
+        return {
+            "document_collection_id": annotation.document_collection_id,
+            "document_id": annotation.document_id,
+            "document_element_id": annotation.document_element_id,
+            "creator_id": user.id,
+            "classroom_id": classroom_id,
+            "type": annotation.type,
+            "motivation": annotation.motivation,
+            "generator": annotation.generator,
+            "generated": now,
+            "body": annotation.body.model_dump(by_alias=True),
+            "target": target,
+            **annotation_target_service.primary_ids(target),
+            "status": annotation.status,
+            "annotation_type": annotation.annotation_type,
+            "context": annotation.context,
+            "created": now,
+            "modified": now,
+        }
+
+    def _format_validation_error(self, error: ValidationError) -> str:
+        return "; ".join(
+            f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}"
+            for e in error.errors()
+        )
+
+    def _check_references(
+        self,
+        db: Session,
+        items: List[Tuple[int, AnnotationCreate]],
+        errors: List[Dict[str, Any]],
+    ) -> List[Tuple[int, AnnotationCreate]]:
+        """
+        Drop items that reference a missing collection, document or element.
+
+        Runs one lookup per referenced table and records an error for each dropped item.
+        """
+        references = (
+            ("document_collection_id", DocumentCollection),
+            ("document_id", Document),
+            ("document_element_id", DocumentElementModel),
+        )
+
+        missing = {}
+        for field, model in references:
+            ids = {getattr(annotation, field) for _, annotation in items} - {None}
+            if ids:
+                found = set(db.execute(select(model.id).where(model.id.in_(ids))).scalars())
+                missing[field] = ids - found
+
+        valid = []
+        for index, annotation in items:
+            bad = [
+                field
+                for field, _ in references
+                if getattr(annotation, field) in missing.get(field, ())
+            ]
+            if bad:
+                errors.append(
+                    {"index": index, "detail": f"Not found: {', '.join(bad)}"}
+                )
             else:
-                target.id = self.generate_target_id(db)
+                valid.append((index, annotation))
+        return valid
 
     # ==================== CRUD Operations ====================
 
@@ -77,31 +251,90 @@ class AnnotationService(BaseService[AnnotationModel]):
         self._prepare_targets_for_create(db, annotation.target, user)
         annotation.creator_id = user.id
 
-        db_annotation = self.model(
-            document_collection_id=annotation.document_collection_id,
-            document_id=annotation.document_id,
-            document_element_id=annotation.document_element_id,
-            creator_id=user.id,
-            classroom_id=classroom_id,
-            type=annotation.type,
-            motivation=annotation.motivation,
-            generator=annotation.generator,
-            generated=datetime.now(),
-            body=annotation.body.model_dump(by_alias=True),
-            target=self._dump_targets(annotation.target),
-            status=annotation.status,
-            annotation_type=annotation.annotation_type,
-            context=annotation.context,
-            created=datetime.now(),
-            modified=datetime.now(),
-        )
+        db_annotation = self.model(**self._build_row(annotation, user, classroom_id))
 
         db.add(db_annotation)
-        db.commit()
+        db.flush()
+        annotation_write_service.after_write(db, [None], [db_annotation])
         db.refresh(db_annotation)
 
         return db_annotation
 
+    def bulk_create(
+        self,
+        db: Session,
+        items: List[Dict[str, Any]],
+        user: User,
+        classroom_id: Optional[int],
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Create many annotations in one transaction.
+
+        Items are validated one by one; invalid items are reported by index and
+        the rest are inserted. Body and target IDs for the whole batch come from
+        the ID allocator in at most one sequence query, and the rows are written with one multi-row
+        INSERT ... RETURNING.
+
+        Raises HTTPException 400 if the batch exceeds MAX_BULK_ANNOTATIONS.
+        """
+        if len(items) > self.MAX_BULK_ANNOTATIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {self.MAX_BULK_ANNOTATIONS} annotations per request",
+            )
+
+        if not classroom_id or classroom_id == 0:
+            classroom_id = None
+
+        errors: List[Dict[str, Any]] = []
+        valid: List[Tuple[int, AnnotationCreate]] = []
+        for index, item in enumerate(items):
+            try:
+                annotation = AnnotationCreate.model_validate(item)
+            except ValidationError as e:
+                errors.append({"index": index, "detail": self._format_validation_error(e)})
+                continue
+
+            if annotation.body is None or not annotation.target:
+                errors.append(
+                    {"index": index, "detail": "An annotation needs a body and at least one target"}
+                )
+                continue
+
+            valid.append((index, annotation))
+
+        valid = self._check_references(db, valid, errors)
+        errors.sort(key=lambda error: error["index"])
+
+        if not valid:
+            return {"created": [], "errors": errors}
+
+        target_count = sum(
+            len(list(self._iter_targets(annotation.target))) for _, annotation in valid
+        )
+        body_ids, target_ids = self.reserve_ids(db, len(valid), target_count)
+        target_ids = iter(target_ids)
+
+        rows = []
+        for (_, annotation), body_id in zip(valid, body_ids):
+            annotation.body.id = body_id
+            for target in self._iter_targets(annotation.target):
+                target.id = next(target_ids)
+            rows.append(self._build_row(annotation, user, classroom_id))
+
+        created = db.execute(
+            insert(self.model).returning(self.model, sort_by_parameter_order=True),
+            rows,
+        ).scalars().all()
+
+        result = [
+            {"index": index, "id": db_annotation.id}
+            for (index, _), db_annotation in zip(valid, created)
+        ]
+        annotation_write_service.after_write(db, [None] * len(created), created)
+
+        return {"created": result, "errors": errors}
+
     def get_by_id(
         self, db: Session, annotation_id: int, classroom_id: Optional[int]
     ) -> AnnotationModel:
@@ -132,8 +365,14 @@ class AnnotationService(BaseService[AnnotationModel]):
         document_element_id: Optional[int] = None,
         skip: int = 0,
         limit: int = 100,
+        cursor: Optional[str] = None,
     ) -> List[AnnotationModel]:
-        """Get annotations with optional filtering and pagination."""
+        """
+        Get annotations with optional filtering and pagination.
+
+        Pages are ordered by id; pass the previous page's next cursor to
+        continue after it. `skip` is only honoured when no cursor is given.
+        """
         query = self.get_base_query(db).options(joinedload(AnnotationModel.creator))
 
         # Apply motivation filter first
@@ -150,10 +389,12 @@ class AnnotationService(BaseService[AnnotationModel]):
                 query = query.filter(AnnotationModel.classroom_id == classroom_id)
 
                 # For classroom context, only show annotations from classroom members
-                classroom = db.query(Group).filter(Group.id == classroom_id).first()
-                if classroom:
-                    member_ids = [member.id for member in classroom.members]
-                    query = query.filter(AnnotationModel.creator_id.in_(member_ids))
+                query = query.filter(
+                    exists().where(
+                        group_members.c.group_id == classroom_id,
+                        group_members.c.user_id == AnnotationModel.creator_id,
+                    )
+                )
         # For non-comment annotations (scholarly, linking, external_reference)
         # Don't apply any classroom filtering - they're global
 
@@ -164,7 +405,8 @@ class AnnotationService(BaseService[AnnotationModel]):
             )
 
         # Apply pagination
-        query = query.offset(skip).limit(limit)
+        query = self.apply_keyset(query, cursor, [AnnotationModel.id], skip)
+        query = query.limit(limit)
 
         return query.all()
 
@@ -188,6 +430,7 @@ class AnnotationService(BaseService[AnnotationModel]):
         if not db_annotation:
             raise HTTPException(status_code=404, detail="Annotation not found")
 
+        previous = annotation_write_service.snapshot(db_annotation)
         if payload.body:
             current_body = dict(db_annotation.body)
             current_body["value"] = payload.body
@@ -198,7 +441,7 @@ class AnnotationService(BaseService[AnnotationModel]):
             db_annotation.motivation = payload.motivation
             db_annotation.modified = datetime.now()
 
-        db.commit()
+        annotation_write_service.after_write(db, [previous], [db_annotation])
         db.refresh(db_annotation)
 
         return db_annotation
@@ -219,8 +462,7 @@ class AnnotationService(BaseService[AnnotationModel]):
         if not db_annotation:
             raise HTTPException(status_code=404, detail="Annotation not found")
 
-        db.delete(db_annotation)
-        db.commit()
+        annotation_write_service.after_write(db, [db_annotation], [None])
 
     # ==================== Target Operations ====================
 
@@ -253,10 +495,11 @@ class AnnotationService(BaseService[AnnotationModel]):
         for target in targets_to_add:
             target["id"] = self.generate_target_id(db)
 
+        previous = annotation_write_service.snapshot(db_annotation)
         db_annotation.target = [*db_annotation.target, *targets_to_add]
         db_annotation.modified = datetime.now()
-
-        db.commit()
+        self._set_primary_target(db_annotation)
+        annotation_write_service.after_write(db, [previous], [db_annotation])
         db.refresh(db_annotation)
 
         return db_annotation
@@ -314,14 +557,14 @@ class AnnotationService(BaseService[AnnotationModel]):
 
         # If no targets remain, delete the annotation
         if not updated_targets:
-            db.delete(db_annotation)
-            db.commit()
+            annotation_write_service.after_write(db, [db_annotation], [None])
             return None
 
+        previous = annotation_write_service.snapshot(db_annotation)
         db_annotation.target = updated_targets
         db_annotation.modified = datetime.now()
-
-        db.commit()
+        self._set_primary_target(db_annotation)
+        annotation_write_service.after_write(db, [previous], [db_annotation])
         db.refresh(db_annotation)
 
         return db_annotation
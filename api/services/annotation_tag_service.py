@@ -0,0 +1,120 @@
+# services/annotation_tag_service.py
+
+from typing import Any, Dict, Iterable, List, Optional
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, func
+
+from models.models import (
+    AnnotationTag as AnnotationTagModel,
+    Annotation as AnnotationModel,
+    DocumentCollection,
+)
+from services.base_service import BaseService
+from services.annotation_target_service import annotation_target_service
+
+
+class AnnotationTagService(BaseService[AnnotationTagModel]):
+    """
+    Service for the tag index.
+
+    Every `tagging` annotation is mirrored as one row per object it tags in
+    `annotation_tags`, holding the normalized tag text. Search tag filters
+    and collection tag clouds read the index instead of scanning annotation
+    bodies.
+    """
+
+    TAG_MOTIVATION = "tagging"
+    MAX_TAG_LENGTH = 255
+
+    # Tags shown in a collection's tag cloud by default
+    TAG_CLOUD_LIMIT = 100
+
+    def __init__(self):
+        super().__init__(AnnotationTagModel)
+
+    # ==================== Helper Methods ====================
+
+    def normalize(self, tag: Any) -> Optional[str]:
+        """Trimmed, single-spaced, lower-case tag text; None if empty."""
+        if not isinstance(tag, str):
+            return None
+        normalized = " ".join(tag.split()).lower()[: self.MAX_TAG_LENGTH]
+        return normalized or None
+
+    def normalize_all(self, tags: Optional[Iterable[Any]]) -> List[str]:
+        """Distinct normalized tags, sorted, with empty ones dropped."""
+        return sorted({t for t in (self.normalize(tag) for tag in tags or []) if t})
+
+    def build_rows(self, annotation: AnnotationModel) -> List[AnnotationTagModel]:
+        """Build index rows for a tagging annotation; none for other motivations."""
+        if annotation.motivation != self.TAG_MOTIVATION:
+            return []
+
+        tag = self.normalize((annotation.body or {}).get("value"))
+        if tag is None:
+            return []
+
+        rows = []
+        for target in annotation_target_service.iter_targets(annotation.target):
+            parsed = annotation_target_service.parse_source(target.get("source"))
+            if parsed is None or parsed[0] not in annotation_target_service.INDEXED_KINDS:
+                continue
+
+            rows.append(
+                self.model(
+                    annotation_id=annotation.id,
+                    tag=tag,
+                    source_kind=parsed[0],
+                    source_id=parsed[1],
+                    document_collection_id=annotation.document_collection_id,
+                )
+            )
+        return rows
+
+    # ==================== Index Maintenance ====================
+
+    def sync(
+        self, db: Session, annotation: AnnotationModel, was_tagging: bool = False
+    ) -> None:
+        """Rebuild an annotation's index rows; a no-op unless it is or was tagging."""
+        if annotation.motivation != self.TAG_MOTIVATION and not was_tagging:
+            return
+        self.clear(db, annotation.id)
+        db.add_all(self.build_rows(annotation))
+
+    def clear(self, db: Session, annotation_id: int) -> None:
+        """Remove all index rows of an annotation."""
+        db.execute(delete(self.model).where(self.model.annotation_id == annotation_id))
+
+    # ==================== Read Operations ====================
+
+    def tag_cloud(
+        self, db: Session, collection_id: int, limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        The most used tags in a collection, with how many times each was applied.
+
+        Raises HTTPException 404 if the collection does not exist.
+        """
+        exists = db.execute(
+            select(DocumentCollection.id).where(DocumentCollection.id == collection_id)
+        ).first()
+        if exists is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Collection not found"
+            )
+
+        count = func.count(self.model.id).label("count")
+        rows = db.execute(
+            select(self.model.tag, count)
+            .where(self.model.document_collection_id == collection_id)
+            .group_by(self.model.tag)
+            .order_by(count.desc(), self.model.tag)
+            .limit(limit or self.TAG_CLOUD_LIMIT)
+        ).all()
+        return [{"tag": tag, "count": tag_count} for tag, tag_count in rows]
+
+
+# Singleton instance for easy importing
+annotation_tag_service = AnnotationTagService()
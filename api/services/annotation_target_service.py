@@ -0,0 +1,190 @@
+# services/annotation_target_service.py
+
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, literal
+
+from models.models import AnnotationTarget as AnnotationTargetModel
+from services.base_service import BaseService
+
+
+class AnnotationTargetService(BaseService[AnnotationTargetModel]):
+    """
+    Service for the normalized annotation target index.
+
+    Every target stored in `annotations.target` is mirrored as one row in
+    `annotation_targets`, so lookups such as "annotations on element N" or
+    "replies to annotation M" become B-tree index scans instead of JSONB walks.
+    """
+
+    DOCUMENT_ELEMENT = "DocumentElements"
+    ANNOTATION = "Annotation"
+    INDEXED_KINDS = (DOCUMENT_ELEMENT, ANNOTATION)
+
+    # Same pattern as the annotation_targets backfill, so both index the same sources
+    SOURCE_PATTERN = re.compile(r"(DocumentElements|Annotation)/([0-9]+)")
+    # source_id is an int4 column
+    MAX_SOURCE_ID = 2**31 - 1
+
+    def __init__(self):
+        super().__init__(AnnotationTargetModel)
+
+    # ==================== Helper Methods ====================
+
+    def parse_source(self, source: Any) -> Optional[Tuple[str, int]]:
+        """
+        Split a source URI into (kind, id).
+        Expected formats: 'DocumentElements/{id}', '/DocumentElements/{id}', 'Annotation/{id}'
+
+        Returns None if the source does not reference an indexable object,
+        including IDs too large for the index's integer column.
+        """
+        if not isinstance(source, str):
+            return None
+
+        match = self.SOURCE_PATTERN.fullmatch(source.strip("/"))
+        if match is None:
+            return None
+
+        source_id = int(match.group(2))
+        if source_id > self.MAX_SOURCE_ID:
+            return None
+        return match.group(1), source_id
+
+    def iter_targets(self, targets: Optional[List]) -> Iterator[Dict[str, Any]]:
+        """Yield every target dict, flattening nested (one level deep) target lists."""
+        for target in targets or []:
+            if isinstance(target, list):
+                for sub_target in target:
+                    if isinstance(sub_target, dict):
+                        yield sub_target
+            elif isinstance(target, dict):
+                yield target
+
+    def element_ids(self, targets: Optional[List]) -> Set[int]:
+        """IDs of the document elements referenced by a list of targets."""
+        element_ids = set()
+        for target in self.iter_targets(targets):
+            parsed = self.parse_source(target.get("source"))
+            if parsed and parsed[0] == self.DOCUMENT_ELEMENT:
+                element_ids.add(parsed[1])
+        return element_ids
+
+    def primary_ids(self, targets: Optional[List]) -> Dict[str, Optional[int]]:
+        """
+        Values for the annotation columns that denormalize the primary (first) target.
+
+        Returns `target_element_id` and `target_annotation_id`; at most one is set.
+        """
+        ids = {"target_element_id": None, "target_annotation_id": None}
+        primary = next(self.iter_targets(targets), None)
+        parsed = self.parse_source(primary.get("source")) if primary else None
+
+        if parsed and parsed[0] == self.DOCUMENT_ELEMENT:
+            ids["target_element_id"] = parsed[1]
+        elif parsed and parsed[0] == self.ANNOTATION:
+            ids["target_annotation_id"] = parsed[1]
+        return ids
+
+    def build_rows(
+        self, annotation_id: int, targets: Optional[List]
+    ) -> List[AnnotationTargetModel]:
+        """Build index rows for every indexable target of an annotation."""
+        rows = []
+        for target in self.iter_targets(targets):
+            parsed = self.parse_source(target.get("source"))
+            if parsed is None or parsed[0] not in self.INDEXED_KINDS:
+                continue
+
+            selector = target.get("selector") or {}
+            refined_by = selector.get("refined_by") or {}
+
+            rows.append(
+                self.model(
+                    annotation_id=annotation_id,
+                    target_id=target.get("id"),
+                    source_kind=parsed[0],
+                    source_id=parsed[1],
+                    start=refined_by.get("start"),
+                    end=refined_by.get("end"),
+                )
+            )
+        return rows
+
+    # ==================== Index Maintenance ====================
+
+    def sync(self, db: Session, annotation_id: int, targets: Optional[List]) -> None:
+        """Replace the index rows of an annotation with rows built from its targets."""
+        self.clear(db, annotation_id)
+        db.add_all(self.build_rows(annotation_id, targets))
+
+    def clear(self, db: Session, annotation_id: int) -> None:
+        """Remove all index rows of an annotation."""
+        db.execute(delete(self.model).where(self.model.annotation_id == annotation_id))
+
+    # ==================== Query Builders ====================
+
+    def annotation_ids_for(self, source_kind: str, source_ids: Iterable[int]):
+        """Select the IDs of annotations that target any of the given sources."""
+        return select(self.model.annotation_id).where(
+            self.model.source_kind == source_kind,
+            self.model.source_id.in_(list(source_ids)),
+        )
+
+    def annotation_ids_for_element(self, document_element_id: int):
+        """Select the IDs of annotations that target a document element."""
+        return self.annotation_ids_for(self.DOCUMENT_ELEMENT, [document_element_id])
+
+    def thread_element_ids(
+        self, db: Session, *target_lists: Optional[List], max_depth: int = 1
+    ) -> Set[int]:
+        """
+        Elements whose annotation threads include annotations with these targets.
+
+        Direct element targets count as-is; annotation targets (replies, flags,
+        upvotes) are walked up the index, at most `max_depth` hops, to the
+        elements their thread roots target.
+        """
+        element_ids, parent_ids = set(), set()
+        for targets in target_lists:
+            for target in self.iter_targets(targets):
+                parsed = self.parse_source(target.get("source"))
+                if parsed and parsed[0] == self.DOCUMENT_ELEMENT:
+                    element_ids.add(parsed[1])
+                elif parsed and parsed[0] == self.ANNOTATION:
+                    parent_ids.add(parsed[1])
+
+        if not parent_ids:
+            return element_ids
+
+        ancestors = (
+            select(
+                self.model.annotation_id.label("annotation_id"),
+                literal(1).label("hops"),
+            )
+            .where(self.model.annotation_id.in_(parent_ids))
+            .cte("thread_ancestors", recursive=True)
+        )
+        ancestors = ancestors.union(
+            select(self.model.source_id, ancestors.c.hops + 1)
+            .join(ancestors, self.model.annotation_id == ancestors.c.annotation_id)
+            .where(
+                self.model.source_kind == self.ANNOTATION,
+                ancestors.c.hops < max_depth,
+            )
+        )
+
+        element_ids.update(
+            db.execute(
+                select(self.model.source_id).where(
+                    self.model.source_kind == self.DOCUMENT_ELEMENT,
+                    self.model.annotation_id.in_(select(ancestors.c.annotation_id)),
+                )
+            ).scalars()
+        )
+        return element_ids
+
+
+# Singleton instance for easy importing
+annotation_target_service = AnnotationTargetService()
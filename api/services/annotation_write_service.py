@@ -0,0 +1,169 @@
+# services/annotation_write_service.py
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from sqlalchemy.orm import Session
+
+from models.models import Annotation as AnnotationModel
+from services.annotation_target_service import annotation_target_service
+from services.annotation_tag_service import annotation_tag_service
+from services.annotation_counter_service import annotation_counter_service
+from services.link_graph_service import link_graph_service
+from services.annotation_query_service import annotation_query_service
+from services.annotation_change_service import annotation_change_service
+from services.annotation_event_service import annotation_event_service
+from services.search_service import search_service
+
+
+@dataclass(frozen=True)
+class AnnotationState:
+    """The columns the write hooks read from an annotation, copied at one moment."""
+
+    id: int
+    motivation: Optional[str]
+    target: Any
+    classroom_id: Optional[int]
+
+
+class AnnotationWriteService:
+    """
+    Hooks that keep indexes, counters and caches in step with annotation writes.
+
+    Every annotation writer calls after_write with each annotation's state
+    before the write and the annotation after it. Creates pass None as the
+    state before, edits pass snapshot() taken before changing the row, and
+    deletes pass the annotation itself with None after.
+    """
+
+    def snapshot(self, annotation: AnnotationModel) -> AnnotationState:
+        """Copy what the write hooks need from an annotation before it changes."""
+        return AnnotationState(
+            id=annotation.id,
+            motivation=annotation.motivation,
+            target=annotation.target,
+            classroom_id=annotation.classroom_id,
+        )
+
+    def after_write(
+        self,
+        db: Session,
+        before: Sequence[Optional[Any]],
+        after: Sequence[Optional[AnnotationModel]],
+    ) -> None:
+        """
+        Run the hooks for each (before, after) pair, commit, then update the
+        in-process caches and publish events. Annotations with None after are
+        deleted here, once their hooks have read them.
+        """
+        changes, events = self._before_commit(db, before, after)
+        db.commit()
+        self._after_commit(db, changes, events)
+
+    # ==================== Hooks ====================
+
+    def _before_commit(
+        self,
+        db: Session,
+        before: Sequence[Optional[Any]],
+        after: Sequence[Optional[AnnotationModel]],
+    ) -> Tuple[List[Tuple[Any, Any]], List[Dict[str, Any]]]:
+        """Write the index, counter, tombstone and event rows in the writer's transaction."""
+        created = []
+        touched: Set[int] = set()
+        changes = []
+        built: Dict[str, List] = {"created": [], "updated": [], "deleted": []}
+
+        for old, new in zip(before, after):
+            old_ids = (
+                annotation_query_service.thread_element_ids(db, old.target)
+                if old is not None
+                else set()
+            )
+            if new is None:
+                new_ids = set()
+            elif old is not None and old.target == new.target:
+                new_ids = old_ids
+            else:
+                new_ids = annotation_query_service.thread_element_ids(db, new.target)
+            touched |= old_ids | new_ids
+
+            if old is None:
+                db.add_all(annotation_target_service.build_rows(new.id, new.target))
+                db.add_all(annotation_tag_service.build_rows(new))
+                created.append(new)
+                built["created"].append((new, new_ids))
+            elif new is None:
+                annotation_target_service.clear(db, old.id)
+                annotation_tag_service.clear(db, old.id)
+                annotation_counter_service.annotation_removed(db, old)
+                annotation_change_service.annotation_removed(db, old, old_ids)
+                built["deleted"].append((old, old_ids))
+            else:
+                if old.target != new.target:
+                    annotation_target_service.sync(db, new.id, new.target)
+                annotation_tag_service.sync(
+                    db,
+                    new,
+                    was_tagging=old.motivation == annotation_tag_service.TAG_MOTIVATION,
+                )
+                annotation_counter_service.motivation_changed(db, new, old.motivation)
+                # A new motivation can hide the annotation from some clients everywhere
+                hidden = old_ids if old.motivation != new.motivation else old_ids - new_ids
+                annotation_change_service.annotation_removed(db, old, hidden)
+                # Elements the annotation left are told too, so they drop it
+                built["updated"].append((new, old_ids | new_ids))
+
+            changes.append(
+                (
+                    None if old is None else self.snapshot(old),
+                    None if new is None else self.snapshot(new),
+                )
+            )
+
+        annotation_counter_service.annotations_added(db, created)
+        annotation_counter_service.elements_changed(db, touched)
+        events = []
+        for event_type, annotations in built.items():
+            if annotations:
+                events += annotation_event_service.build(db, event_type, annotations)
+
+        for old, new in zip(before, after):
+            if new is None:
+                db.delete(old)
+        return changes, events
+
+    def _after_commit(
+        self,
+        db: Session,
+        changes: List[Tuple[Optional[AnnotationState], Optional[AnnotationState]]],
+        events: List[Dict[str, Any]],
+    ) -> None:
+        """Bring the link graph and caches up to date with the committed rows."""
+        motivations = []
+        linked_elements: Set[int] = set()
+        flag_classrooms = set()
+        for old, new in changes:
+            states = [state for state in (old, new) if state is not None]
+            touched = {state.motivation for state in states}
+            motivations += touched
+
+            if "linking" in touched:
+                if new is None:
+                    link_graph_service.remove_annotation(old.id)
+                else:
+                    link_graph_service.apply_annotation(db, new)
+                for state in states:
+                    linked_elements |= annotation_target_service.element_ids(state.target)
+            if "flagging" in touched:
+                flag_classrooms |= {state.classroom_id for state in states}
+
+        if linked_elements:
+            annotation_query_service.invalidate_linked_text(linked_elements)
+        if flag_classrooms:
+            annotation_query_service.invalidate_flag_count(flag_classrooms)
+        search_service.annotations_changed(motivations)
+        annotation_event_service.publish(events)
+
+
+# Singleton instance for easy importing
+annotation_write_service = AnnotationWriteService()
@@ -1,6 +1,11 @@
 # services/base_service.py
 
-from typing import TypeVar, Generic, Optional, Type
+import base64
+import binascii
+import json
+from typing import Any, List, TypeVar, Generic, Optional, Sequence, Type
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session, Query
 
 ModelType = TypeVar("ModelType")
@@ -13,6 +18,7 @@ class BaseService(Generic[ModelType]):
     Provides:
     - Classroom filtering logic
     - Common query building utilities
+    - Keyset (cursor) pagination helpers
     """
     
     def __init__(self, model: Type[ModelType]):
@@ -39,4 +45,66 @@ class BaseService(Generic[ModelType]):
     
     def get_base_query(self, db: Session) -> Query:
         """Get a base query for the model."""
-        return db.query(self.model)
\ No newline at end of file
+        return db.query(self.model)
+    
+    # ==================== Keyset Pagination ====================
+    
+    def encode_cursor(self, *values: Any) -> str:
+        """Encode the sort key of the last row of a page as an opaque cursor."""
+        raw = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+    
+    def decode_cursor(self, cursor: str, size: int) -> List[Any]:
+        """
+        Decode a cursor produced by encode_cursor.
+        
+        Raises HTTPException 400 if the cursor is malformed.
+        """
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        except (binascii.Error, UnicodeError, ValueError):
+            values = None
+        
+        if not isinstance(values, list) or len(values) != size:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        
+        return values
+    
+    def apply_keyset(
+        self,
+        query,
+        cursor: Optional[str],
+        columns: Sequence[Any],
+        skip: int = 0
+    ):
+        """
+        Order a query by `columns` (ending in a unique column, usually id) and
+        continue after `cursor`.
+        
+        With a cursor the page starts with a row-value comparison that an index
+        on the same columns can seek to; without one, `skip` is applied as an
+        offset for backward compatibility.
+        """
+        query = query.order_by(*columns)
+        
+        if cursor:
+            values = self.decode_cursor(cursor, len(columns))
+            if len(columns) == 1:
+                return query.filter(columns[0] > values[0])
+            return query.filter(tuple_(*columns) > tuple_(*values))
+        
+        return query.offset(skip)
+    
+    def cursor_key(self, item: Any) -> Sequence[Any]:
+        """Sort key of a row, matching the columns passed to apply_keyset."""
+        return (item.id,)
+    
+    def get_next_cursor(self, items: Sequence[Any], limit: int) -> Optional[str]:
+        """Cursor for the page after `items`, or None if this was the last page."""
+        if not items or len(items) < limit:
+            return None
+        return self.encode_cursor(*self.cursor_key(items[-1]))
@@ -20,6 +20,10 @@ from schemas.document_collections import (
     CollectionDisplayOrderItem
 )
 from services.base_service import BaseService
+from services.link_graph_service import link_graph_service
+from services.annotation_query_service import annotation_query_service
+from services.annotation_counter_service import annotation_counter_service
+from services.search_service import search_service
 
 
 class DocumentCollectionService(BaseService[DocumentCollectionModel]):
@@ -112,41 +116,6 @@ class DocumentCollectionService(BaseService[DocumentCollectionModel]):
             .filter(Document.document_collection_id == collection_id)
         ).scalar_one()
     
-    def _get_element_count(self, db: Session, collection_id: int) -> int:
-        """Get the count of elements across all documents in a collection."""
-        return db.execute(
-            select(func.count())
-            .select_from(DocumentElement)
-            .join(Document, DocumentElement.document_id == Document.id)
-            .filter(Document.document_collection_id == collection_id)
-        ).scalar_one()
-    
-    def _get_scholarly_annotation_count(self, db: Session, collection_id: int) -> int:
-        """Get the count of scholarly annotations in a collection."""
-        return db.execute(
-            select(func.count())
-            .select_from(AnnotationModel)
-            .join(DocumentElement, AnnotationModel.document_element_id == DocumentElement.id)
-            .join(Document, DocumentElement.document_id == Document.id)
-            .filter(
-                Document.document_collection_id == collection_id,
-                AnnotationModel.motivation.in_(['scholarly', 'highlighting', 'bookmarking', 'classifying'])
-            )
-        ).scalar_one()
-    
-    def _get_comment_count(self, db: Session, collection_id: int) -> int:
-        """Get the count of comments in a collection."""
-        return db.execute(
-            select(func.count())
-            .select_from(AnnotationModel)
-            .join(DocumentElement, AnnotationModel.document_element_id == DocumentElement.id)
-            .join(Document, DocumentElement.document_id == Document.id)
-            .filter(
-                Document.document_collection_id == collection_id,
-                AnnotationModel.motivation == 'commenting'
-            )
-        ).scalar_one()
-    
     def _cascade_delete_collection_content(
         self, 
         db: Session, 
@@ -177,11 +146,17 @@ class DocumentCollectionService(BaseService[DocumentCollectionModel]):
                     DocumentElement.document_id.in_(document_ids)
                 )
             )
+            annotation_counter_service.drop(
+                db, annotation_counter_service.ELEMENT, element_ids
+            )
         
         # Delete all documents
         db.execute(
             delete(Document).where(Document.id.in_(document_ids))
         )
+        annotation_counter_service.drop(
+            db, annotation_counter_service.DOCUMENT, document_ids
+        )
 
 # ==================== Collection Metadata Schema Operations ====================
 
@@ -255,6 +230,10 @@ class DocumentCollectionService(BaseService[DocumentCollectionModel]):
         db_collection.modified_by_id = collection.created_by_id
         
         db.add(db_collection)
+        db.flush()
+        annotation_counter_service.scope_created(
+            db, annotation_counter_service.COLLECTION, db_collection.id
+        )
         db.commit()
         db.refresh(db_collection)
         
@@ -272,11 +251,14 @@ class DocumentCollectionService(BaseService[DocumentCollectionModel]):
         """
         collection = self._get_collection_by_id(db, collection_id, with_users=True)
         
-        # Add statistics
-        setattr(collection, "document_count", self._get_document_count(db, collection_id))
-        setattr(collection, "element_count", self._get_element_count(db, collection_id))
-        setattr(collection, "scholarly_annotation_count", self._get_scholarly_annotation_count(db, collection_id))
-        setattr(collection, "comment_count", self._get_comment_count(db, collection_id))
+        # Add statistics from the maintained counters
+        counts = annotation_counter_service.get_counts(
+            db, annotation_counter_service.COLLECTION, [collection_id]
+        )[collection_id]
+        setattr(collection, "document_count", counts["document_count"])
+        setattr(collection, "element_count", counts["element_count"])
+        setattr(collection, "scholarly_annotation_count", counts["scholarly_count"])
+        setattr(collection, "comment_count", counts["comment_count"])
         
         return collection
     
@@ -412,6 +394,7 @@ class DocumentCollectionService(BaseService[DocumentCollectionModel]):
         
         db.commit()
         db.refresh(db_collection)
+        search_service.documents_changed()
         
         return db_collection
     
@@ -446,6 +429,7 @@ class DocumentCollectionService(BaseService[DocumentCollectionModel]):
         
         db.commit()
         db.refresh(db_collection)
+        search_service.documents_changed()
         
         return db_collection
     
@@ -483,7 +467,13 @@ class DocumentCollectionService(BaseService[DocumentCollectionModel]):
             self._cascade_delete_collection_content(db, list(document_ids))
         
         db.delete(db_collection)
+        annotation_counter_service.drop(
+            db, annotation_counter_service.COLLECTION, [collection_id]
+        )
         db.commit()
+        link_graph_service.invalidate()
+        annotation_query_service.invalidate_linked_text()
+        search_service.documents_changed()
     
     # ==================== Document Operations ====================
     
@@ -547,8 +537,15 @@ class DocumentCollectionService(BaseService[DocumentCollectionModel]):
             db.execute(
                 delete(Document).where(Document.document_collection_id == collection_id)
             )
+            annotation_counter_service.drop(
+                db, annotation_counter_service.DOCUMENT, document_ids
+            )
         
+        annotation_counter_service.refresh(
+            db, annotation_counter_service.COLLECTION, [collection_id]
+        )
         db.commit()
+        search_service.documents_changed()
 
 
 # Singleton instance for easy importing
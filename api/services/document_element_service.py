@@ -1,6 +1,6 @@
 # services/document_element_service.py
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session, joinedload
@@ -19,6 +19,10 @@ from schemas.document_elements import (
     DocumentElementPartialUpdate
 )
 from services.base_service import BaseService
+from services.link_graph_service import link_graph_service
+from services.annotation_query_service import annotation_query_service
+from services.annotation_counter_service import annotation_counter_service
+from services.search_service import search_service
 
 
 # Import document_service for word processing utilities
@@ -36,6 +40,22 @@ class DocumentElementService(BaseService[DocumentElementModel]):
     
     # ==================== Helper Methods ====================
     
+    # Sort value for elements without an element_order (keeps them last, as
+    # PostgreSQL orders NULLs after every integer)
+    ELEMENT_ORDER_LAST = 2147483647
+    
+    def _element_order(self):
+        """SQL expression for the element's position within its document."""
+        return func.coalesce(
+            DocumentElementModel.hierarchy["element_order"].as_integer(),
+            self.ELEMENT_ORDER_LAST
+        )
+    
+    def cursor_key(self, element: DocumentElementModel) -> Tuple[int, int]:
+        """Keyset sort key (element_order, id), matching _element_order."""
+        order = (element.hierarchy or {}).get("element_order")
+        return (int(order) if order is not None else self.ELEMENT_ORDER_LAST, element.id)
+    
     def _verify_document_exists(self, db: Session, document_id: int) -> Document:
         """
         Verify a document exists by ID.
@@ -89,6 +109,12 @@ class DocumentElementService(BaseService[DocumentElementModel]):
             .filter(AnnotationModel.document_element_id == element_id)
         ).scalar_one()
     
+    def _elements_deleted(self) -> None:
+        """Drop cached links and search results after elements are deleted."""
+        link_graph_service.invalidate()
+        annotation_query_service.invalidate_linked_text()
+        search_service.documents_changed()
+    
     # ==================== CRUD Operations ====================
     
     def create(
@@ -106,7 +132,10 @@ class DocumentElementService(BaseService[DocumentElementModel]):
         db_element = DocumentElementModel(**element.model_dump())
         
         db.add(db_element)
+        db.flush()
+        annotation_counter_service.element_created(db, db_element)
         db.commit()
+        search_service.documents_changed()
         db.refresh(db_element)
         
         return db_element
@@ -129,9 +158,15 @@ class DocumentElementService(BaseService[DocumentElementModel]):
         skip: int = 0,
         limit: int = 100,
         document_id: Optional[int] = None,
-        content_query: Optional[str] = None
+        content_query: Optional[str] = None,
+        cursor: Optional[str] = None
     ) -> List[DocumentElementModel]:
-        """Get elements with optional filtering and pagination."""
+        """
+        Get elements with optional filtering and pagination.
+        
+        Pages are ordered by (element_order, id); `skip` is only honoured when
+        no cursor is given.
+        """
         query = select(DocumentElementModel)
         
         if document_id:
@@ -143,9 +178,9 @@ class DocumentElementService(BaseService[DocumentElementModel]):
             )
         
         # Sort by element_order inside hierarchy JSONB field
-        query = query.order_by(DocumentElementModel.hierarchy["element_order"].as_integer())
-        
-        query = query.offset(skip).limit(limit)
+        query = self.apply_keyset(
+            query, cursor, [self._element_order(), DocumentElementModel.id], skip
+        ).limit(limit)
         
         return db.execute(query).scalars().all()
     
@@ -165,13 +200,21 @@ class DocumentElementService(BaseService[DocumentElementModel]):
         if element.document_id:
             self._verify_document_exists(db, element.document_id)
         
+        previous_document_id = db_element.document_id
         update_data = element.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_element, key, value)
         
         db_element.modified = datetime.now()
         
+        if db_element.document_id != previous_document_id:
+            db.flush()
+            annotation_counter_service.refresh_documents(
+                db, [previous_document_id, db_element.document_id]
+            )
+        
         db.commit()
+        search_service.documents_changed()
         db.refresh(db_element)
         
         return db_element
@@ -192,13 +235,21 @@ class DocumentElementService(BaseService[DocumentElementModel]):
         if element.document_id:
             self._verify_document_exists(db, element.document_id)
         
+        previous_document_id = db_element.document_id
         update_data = element.model_dump(exclude_unset=True, exclude_none=True)
         for key, value in update_data.items():
             setattr(db_element, key, value)
         
         db_element.modified = datetime.now()
         
+        if db_element.document_id != previous_document_id:
+            db.flush()
+            annotation_counter_service.refresh_documents(
+                db, [previous_document_id, db_element.document_id]
+            )
+        
         db.commit()
+        search_service.documents_changed()
         db.refresh(db_element)
         
         return db_element
@@ -236,7 +287,13 @@ class DocumentElementService(BaseService[DocumentElementModel]):
             )
         
         db.delete(db_element)
+        db.flush()
+        annotation_counter_service.drop(
+            db, annotation_counter_service.ELEMENT, [element_id]
+        )
+        annotation_counter_service.refresh_documents(db, [db_element.document_id])
         db.commit()
+        self._elements_deleted()
     
     # ==================== Content/Hierarchy Operations ====================
     
@@ -257,6 +314,7 @@ class DocumentElementService(BaseService[DocumentElementModel]):
         db_element.modified = datetime.now()
         
         db.commit()
+        search_service.documents_changed()
         db.refresh(db_element)
         
         return db_element
@@ -317,26 +375,14 @@ class DocumentElementService(BaseService[DocumentElementModel]):
         """
         self._verify_document_exists(db, document_id)
         
-        element_count = db.execute(
-            select(func.count())
-            .select_from(DocumentElementModel)
-            .filter(DocumentElementModel.document_id == document_id)
-        ).scalar_one()
-        
-        annotation_count = db.execute(
-            select(func.count())
-            .select_from(AnnotationModel)
-            .join(
-                DocumentElementModel,
-                AnnotationModel.document_element_id == DocumentElementModel.id
-            )
-            .filter(DocumentElementModel.document_id == document_id)
-        ).scalar_one()
+        counts = annotation_counter_service.get_counts(
+            db, annotation_counter_service.DOCUMENT, [document_id]
+        )[document_id]
         
         return {
             "document_id": document_id,
-            "element_count": element_count,
-            "annotation_count": annotation_count
+            "element_count": counts["element_count"],
+            "annotation_count": counts["annotation_count"]
         }
     
     def delete_all_by_document(
@@ -373,8 +419,13 @@ class DocumentElementService(BaseService[DocumentElementModel]):
                 DocumentElementModel.document_id == document_id
             )
         )
+        annotation_counter_service.drop(
+            db, annotation_counter_service.ELEMENT, element_ids
+        )
+        annotation_counter_service.refresh_documents(db, [document_id])
         
         db.commit()
+        self._elements_deleted()
     
     # ==================== Annotation Operations ====================
     
@@ -447,7 +498,10 @@ class DocumentElementService(BaseService[DocumentElementModel]):
                     db.add(db_element)
                     created_elements.append(db_element)
                 
+                db.flush()
+                annotation_counter_service.refresh_documents(db, [document_id])
                 db.commit()
+                search_service.documents_changed()
                 
                 for element in created_elements:
                     db.refresh(element)
@@ -22,6 +22,10 @@ from schemas.documents import (
     DocumentPartialUpdate
 )
 from services.base_service import BaseService
+from services.link_graph_service import link_graph_service
+from services.annotation_query_service import annotation_query_service
+from services.annotation_counter_service import annotation_counter_service
+from services.search_service import search_service
 
 
 class DocumentService(BaseService[DocumentModel]):
@@ -271,28 +275,6 @@ class DocumentService(BaseService[DocumentModel]):
             .filter(DocumentElement.document_id == document_id)
         ).scalar_one()
     
-    def _get_scholarly_annotation_count(self, db: Session, document_id: int) -> int:
-        """Get the count of scholarly annotations for a document."""
-        return db.execute(
-            select(func.count())
-            .select_from(AnnotationModel)
-            .filter(
-                AnnotationModel.document_id == document_id,
-                AnnotationModel.motivation.in_(['scholarly', 'highlighting', 'bookmarking', 'classifying'])
-            )
-        ).scalar_one()
-    
-    def _get_comment_count(self, db: Session, document_id: int) -> int:
-        """Get the count of comments for a document."""
-        return db.execute(
-            select(func.count())
-            .select_from(AnnotationModel)
-            .filter(
-                AnnotationModel.document_id == document_id,
-                AnnotationModel.motivation == 'commenting'
-            )
-        ).scalar_one()
-    
     def _cascade_delete_document_content(
         self,
         db: Session,
@@ -312,6 +294,9 @@ class DocumentService(BaseService[DocumentModel]):
             db.execute(
                 delete(DocumentElement).where(DocumentElement.document_id == document_id)
             )
+            annotation_counter_service.drop(
+                db, annotation_counter_service.ELEMENT, element_ids
+            )
     
     def _cascade_delete_documents_content(
         self,
@@ -335,6 +320,9 @@ class DocumentService(BaseService[DocumentModel]):
             db.execute(
                 delete(DocumentElement).where(DocumentElement.document_id.in_(document_ids))
             )
+            annotation_counter_service.drop(
+                db, annotation_counter_service.ELEMENT, element_ids
+            )
     
     # ==================== CRUD Operations ====================
     
@@ -355,6 +343,8 @@ class DocumentService(BaseService[DocumentModel]):
         db_document = DocumentModel(**document.model_dump())
         
         db.add(db_document)
+        db.flush()
+        annotation_counter_service.document_created(db, db_document)
         db.commit()
         db.refresh(db_document)
         
@@ -383,9 +373,14 @@ class DocumentService(BaseService[DocumentModel]):
         skip: int = 0,
         limit: int = 100,
         title: Optional[str] = None,
-        collection_id: Optional[int] = None
+        collection_id: Optional[int] = None,
+        cursor: Optional[str] = None
     ) -> List[DocumentModel]:
-        """Get documents with optional filtering and pagination."""
+        """
+        Get documents with optional filtering and pagination.
+        
+        Pages are ordered by id; `skip` is only honoured when no cursor is given.
+        """
         query = select(DocumentModel)
         
         if title:
@@ -393,7 +388,7 @@ class DocumentService(BaseService[DocumentModel]):
         if collection_id:
             query = query.filter(DocumentModel.document_collection_id == collection_id)
         
-        query = query.offset(skip).limit(limit)
+        query = self.apply_keyset(query, cursor, [DocumentModel.id], skip).limit(limit)
         
         return db.execute(query).scalars().all()
     
@@ -418,13 +413,26 @@ class DocumentService(BaseService[DocumentModel]):
             collection_id = document.document_collection_id or db_document.document_collection_id
             self._check_duplicate_title(db, document.title, collection_id, exclude_id=document_id)
         
+        previous_collection_id = db_document.document_collection_id
         update_data = document.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_document, key, value)
         
+        if db_document.document_collection_id != previous_collection_id:
+            db.flush()
+            annotation_counter_service.refresh(
+                db,
+                annotation_counter_service.COLLECTION,
+                [previous_collection_id, db_document.document_collection_id],
+            )
+        
         db.commit()
         db.refresh(db_document)
         
+        # Linked-text info embeds document titles and collection IDs
+        annotation_query_service.invalidate_linked_text()
+        search_service.documents_changed()
+        
         return db_document
     
     def partial_update(
@@ -448,13 +456,26 @@ class DocumentService(BaseService[DocumentModel]):
             collection_id = document.document_collection_id or db_document.document_collection_id
             self._check_duplicate_title(db, document.title, collection_id, exclude_id=document_id)
         
+        previous_collection_id = db_document.document_collection_id
         update_data = document.model_dump(exclude_unset=True, exclude_none=True)
         for key, value in update_data.items():
             setattr(db_document, key, value)
         
+        if db_document.document_collection_id != previous_collection_id:
+            db.flush()
+            annotation_counter_service.refresh(
+                db,
+                annotation_counter_service.COLLECTION,
+                [previous_collection_id, db_document.document_collection_id],
+            )
+        
         db.commit()
         db.refresh(db_document)
         
+        # Linked-text info embeds document titles and collection IDs
+        annotation_query_service.invalidate_linked_text()
+        search_service.documents_changed()
+        
         return db_document
     
     def delete(
@@ -476,7 +497,19 @@ class DocumentService(BaseService[DocumentModel]):
             self._cascade_delete_document_content(db, document_id)
         
         db.delete(db_document)
+        db.flush()
+        annotation_counter_service.drop(
+            db, annotation_counter_service.DOCUMENT, [document_id]
+        )
+        annotation_counter_service.refresh(
+            db,
+            annotation_counter_service.COLLECTION,
+            [db_document.document_collection_id],
+        )
         db.commit()
+        link_graph_service.invalidate()
+        annotation_query_service.invalidate_linked_text()
+        search_service.documents_changed()
     
     def bulk_delete(
         self,
@@ -513,7 +546,18 @@ class DocumentService(BaseService[DocumentModel]):
             self._cascade_delete_documents_content(db, document_ids)
         
         db.execute(delete(DocumentModel).where(DocumentModel.id.in_(document_ids)))
+        annotation_counter_service.drop(
+            db, annotation_counter_service.DOCUMENT, document_ids
+        )
+        annotation_counter_service.refresh(
+            db,
+            annotation_counter_service.COLLECTION,
+            [doc.document_collection_id for doc in existing_documents],
+        )
         db.commit()
+        link_graph_service.invalidate()
+        annotation_query_service.invalidate_linked_text()
+        search_service.documents_changed()
     
     # ==================== Element Operations ====================
     
@@ -563,6 +607,8 @@ class DocumentService(BaseService[DocumentModel]):
         """
         Get documents in a collection with annotation statistics.
         
+        Counts are read from the maintained counter rows, one lookup per page.
+        
         Raises HTTPException 404 if collection not found.
         """
         self._verify_collection_exists(db, collection_id)
@@ -574,11 +620,17 @@ class DocumentService(BaseService[DocumentModel]):
             .limit(limit)
         ).scalars().all()
         
+        counts = annotation_counter_service.get_counts(
+            db,
+            annotation_counter_service.DOCUMENT,
+            [document.id for document in documents]
+        )
+        
         result = []
         for document in documents:
-            scholarly_count = self._get_scholarly_annotation_count(db, document.id)
-            comment_count = self._get_comment_count(db, document.id)
-            element_count = self._get_element_count(db, document.id)
+            scholarly_count = counts[document.id]["scholarly_count"]
+            comment_count = counts[document.id]["comment_count"]
+            element_count = counts[document.id]["element_count"]
             
             result.append({
                 "id": document.id,
@@ -648,8 +700,12 @@ class DocumentService(BaseService[DocumentModel]):
                 db.add(db_element)
                 created_elements.append(db_element)
 
+            db.flush()
+            annotation_counter_service.refresh_documents(db, [db_document.id])
+
             # Commit the entire transaction
             db.commit()
+            search_service.documents_changed()
 
             # Refresh to get all IDs
             db.refresh(db_document)
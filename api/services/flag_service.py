@@ -2,10 +2,12 @@
 
 from typing import List, Optional, Dict, Any
 from fastapi import HTTPException
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, aliased, joinedload
 
 from models.models import Annotation as AnnotationModel, User
 from services.base_service import BaseService
+from services.annotation_query_service import annotation_query_service
+from services.annotation_write_service import annotation_write_service
 
 
 class FlagService(BaseService[AnnotationModel]):
@@ -26,27 +28,8 @@ class FlagService(BaseService[AnnotationModel]):
             raise HTTPException(status_code=403, detail="Admin access required")
     
     def _get_flagged_annotation_id(self, flag: AnnotationModel) -> Optional[int]:
-        """Extract the flagged annotation ID from a flag's target."""
-        target_source = flag.target[0].get('source') if flag.target else None
-        if target_source and target_source.startswith('Annotation/'):
-            return int(target_source.split('/')[-1])
-        return None
-    
-    def _get_flagged_annotation(
-        self, 
-        db: Session, 
-        flag: AnnotationModel
-    ) -> Optional[AnnotationModel]:
-        """Get the annotation that a flag is pointing to."""
-        flagged_id = self._get_flagged_annotation_id(flag)
-        if flagged_id:
-            return (
-                db.query(AnnotationModel)
-                .options(joinedload(AnnotationModel.creator))
-                .filter(AnnotationModel.id == flagged_id)
-                .first()
-            )
-        return None
+        """The flagged annotation ID, kept on the flag's primary target column."""
+        return flag.target_annotation_id
     
     def _build_flag_response(
         self, 
@@ -76,6 +59,44 @@ class FlagService(BaseService[AnnotationModel]):
             } if flagged_annotation else None,
         }
     
+    def _group_flags(self, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Collapse flag responses into one queue entry per flagged annotation.
+
+        Entries are ordered by their earliest flag, oldest first. Flags whose
+        target no longer exists each get an entry of their own.
+        """
+        groups: Dict[Any, Dict[str, Any]] = {}
+        for entry in entries:
+            flagged = entry["flagged_annotation"]
+            key = flagged["id"] if flagged else ("flag", entry["flag_id"])
+            group = groups.setdefault(
+                key,
+                {
+                    "flagged_annotation": flagged,
+                    "flag_count": 0,
+                    "first_flagged_at": None,
+                    "reasons": [],
+                    "flags": [],
+                },
+            )
+            group["flag_count"] += 1
+            group["flags"].append(
+                {k: v for k, v in entry.items() if k != "flagged_annotation"}
+            )
+            if entry["flag_reason"] and entry["flag_reason"] not in group["reasons"]:
+                group["reasons"].append(entry["flag_reason"])
+            flagged_at = entry["flagged_at"]
+            if flagged_at and (
+                group["first_flagged_at"] is None or flagged_at < group["first_flagged_at"]
+            ):
+                group["first_flagged_at"] = flagged_at
+
+        return sorted(
+            groups.values(),
+            key=lambda g: (g["first_flagged_at"] is None, g["first_flagged_at"] or ""),
+        )
+    
     # ==================== Query Operations ====================
     
     def get_count(
@@ -87,47 +108,50 @@ class FlagService(BaseService[AnnotationModel]):
         """
         Get count of pending flags.
         
+        Counts are cached per classroom scope; see
+        AnnotationQueryService.flag_count.
         Raises HTTPException 403 if user is not an admin.
         """
         self._check_admin_permission(user)
-        
-        query = db.query(AnnotationModel).filter(
-            AnnotationModel.motivation == "flagging"
-        )
-        query = self.apply_classroom_filter(query, classroom_id)
-        
-        return query.count()
+        return annotation_query_service.flag_count(db, classroom_id)
     
     def list(
         self,
         db: Session,
         classroom_id: Optional[int],
-        user: User
+        user: User,
+        grouped: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Get all flags with enriched data.
         
-        Returns flags with the flagged annotation data.
+        Returns flags with the flagged annotation data, newest first, loaded
+        in one query joining each flag to its target and both creators. With
+        `grouped`, returns one entry per flagged annotation instead.
         Raises HTTPException 403 if user is not an admin.
         """
         self._check_admin_permission(user)
         
+        flagged = aliased(AnnotationModel)
         query = (
-            self.get_base_query(db)
-            .options(joinedload(AnnotationModel.creator))
+            db.query(AnnotationModel, flagged)
+            .outerjoin(flagged, flagged.id == AnnotationModel.target_annotation_id)
+            .options(
+                joinedload(AnnotationModel.creator),
+                joinedload(flagged.creator),
+            )
             .filter(AnnotationModel.motivation == "flagging")
         )
         query = self.apply_classroom_filter(query, classroom_id)
-        query = query.order_by(AnnotationModel.created.desc())
+        query = query.order_by(AnnotationModel.created.desc(), AnnotationModel.id.desc())
         
-        flags = query.all()
-        
-        # Enrich with flagged annotation data
-        result = []
-        for flag in flags:
-            flagged_annotation = self._get_flagged_annotation(db, flag)
-            result.append(self._build_flag_response(flag, flagged_annotation))
+        result = [
+            self._build_flag_response(flag, flagged_annotation)
+            for flag, flagged_annotation in query.all()
+        ]
         
+        if grouped:
+            return self._group_flags(result)
         return result
     
     # ==================== Flag Operations ====================
@@ -167,9 +191,7 @@ class FlagService(BaseService[AnnotationModel]):
         self._check_admin_permission(user)
         
         flag = self.get_flag_by_id(db, flag_id)
-        
-        db.delete(flag)
-        db.commit()
+        annotation_write_service.after_write(db, [flag], [None])
         
         return {"success": True, "message": "Flag removed"}
     
@@ -206,13 +228,9 @@ class FlagService(BaseService[AnnotationModel]):
         # Find ALL flags that point to this same comment
         flags_to_delete = self._find_flags_for_annotation(db, flagged_id)
         
-        # Delete all flags pointing to this comment
-        for f in flags_to_delete:
-            db.delete(f)
-        
-        # Delete the flagged comment
-        db.delete(flagged_annotation)
-        db.commit()
+        # Delete all flags pointing to this comment, then the comment itself
+        deleted = [*flags_to_delete, flagged_annotation]
+        annotation_write_service.after_write(db, deleted, [None] * len(deleted))
         
         return {
             "success": True,
@@ -225,20 +243,10 @@ class FlagService(BaseService[AnnotationModel]):
         annotation_id: int
     ) -> List[AnnotationModel]:
         """Find all flags that point to a specific annotation."""
-        all_flags = db.query(AnnotationModel).filter(
+        return db.query(AnnotationModel).filter(
+            AnnotationModel.target_annotation_id == annotation_id,
             AnnotationModel.motivation == "flagging"
         ).all()
-        
-        target_annotation_ref = f"Annotation/{annotation_id}"
-        flags_to_delete = []
-        
-        for f in all_flags:
-            if f.target and len(f.target) > 0:
-                flag_target_source = f.target[0].get('source', '')
-                if flag_target_source == target_annotation_ref:
-                    flags_to_delete.append(f)
-        
-        return flags_to_delete
 
 
 # Singleton instance for easy importing
@@ -0,0 +1,408 @@
+# services/link_graph_service.py
+
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models.models import (
+    Annotation as AnnotationModel,
+    DocumentElement as DocumentElementModel,
+)
+from services.base_service import BaseService
+from services.annotation_target_service import annotation_target_service
+
+logger = logging.getLogger(__name__)
+
+
+class LinkGraphService(BaseService[AnnotationModel]):
+    """
+    In-memory index of the intertext link graph.
+
+    Nodes are document elements; two elements share an edge for every linking
+    annotation that targets both. The graph is built from annotation_targets at
+    startup (see start) and then kept current by AnnotationService, so read
+    endpoints are answered from memory without querying annotations.
+
+    Each worker process holds its own copy. Writes made by other workers are
+    picked up by a background rebuild every REBUILD_INTERVAL seconds. Writes
+    applied while a rebuild reads the database are replayed onto the new
+    graph, so none is lost to the swap.
+    """
+
+    LINKING = "linking"
+
+    # Seconds between background rebuilds from the database
+    REBUILD_INTERVAL = 300
+
+    # Seconds shutdown waits for a running rebuild to finish
+    STOP_TIMEOUT_SECONDS = 5
+
+    # Upper bound on k-hop expansion depth
+    MAX_HOPS = 5
+
+    def __init__(self):
+        super().__init__(AnnotationModel)
+        self._lock = threading.RLock()
+        # One build at a time; readers keep using the current graph meanwhile
+        self._build_lock = threading.Lock()
+        self._loaded_at: Optional[float] = None
+        # Writes applied while a build is reading: (annotation ID, element IDs
+        # or None if removed, element ID -> document ID)
+        self._replay: Optional[
+            List[Tuple[int, Optional[Set[int]], Dict[int, Optional[int]]]]
+        ] = None
+        self._refresher: Optional[threading.Thread] = None
+        self._refresh_now = threading.Event()
+        self._stopping = False
+        self._reset()
+
+    def _reset(self) -> None:
+        # linking annotation ID -> element IDs it targets
+        self._annotation_elements: Dict[int, Set[int]] = {}
+        # element ID -> neighbour element ID -> linking annotation IDs
+        self._adjacency: Dict[int, Dict[int, Set[int]]] = defaultdict(
+            lambda: defaultdict(set)
+        )
+        # element ID -> document ID, and document ID -> linked element IDs
+        self._element_documents: Dict[int, Optional[int]] = {}
+        self._document_elements: Dict[int, Set[int]] = defaultdict(set)
+
+    # ==================== Graph Maintenance ====================
+
+    def build(self, db: Session) -> None:
+        """Rebuild the whole graph from the target index."""
+        with self._build_lock:
+            self._build(db)
+
+    def _build(self, db: Session) -> None:
+        """Read the target index, then swap in the new graph. Call holding _build_lock."""
+        with self._lock:
+            self._replay = []
+        try:
+            rows = self._read_links(db)
+        except Exception:
+            with self._lock:
+                self._replay = None
+            raise
+
+        elements_by_annotation: Dict[int, Set[int]] = defaultdict(set)
+        element_documents: Dict[int, Optional[int]] = {}
+        for annotation_id, element_id, document_id in rows:
+            elements_by_annotation[annotation_id].add(element_id)
+            element_documents[element_id] = document_id
+
+        with self._lock:
+            self._reset()
+            self._element_documents.update(element_documents)
+            for annotation_id, element_ids in elements_by_annotation.items():
+                self._add_edges(annotation_id, element_ids)
+
+            # Writes committed after the read above are not in its rows
+            for annotation_id, element_ids, documents in self._replay:
+                self._remove_edges(annotation_id)
+                if element_ids is not None:
+                    self._element_documents.update(documents)
+                    self._add_edges(annotation_id, element_ids)
+            self._replay = None
+            self._loaded_at = time.monotonic()
+
+    def _read_links(self, db: Session) -> List[Tuple[int, int, Optional[int]]]:
+        """(annotation ID, element ID, document ID) of every linking target."""
+        targets = annotation_target_service.model
+
+        return db.execute(
+            select(
+                targets.annotation_id,
+                targets.source_id,
+                DocumentElementModel.document_id,
+            )
+            .join(self.model, self.model.id == targets.annotation_id)
+            .outerjoin(
+                DocumentElementModel, DocumentElementModel.id == targets.source_id
+            )
+            .where(
+                self.model.motivation == self.LINKING,
+                targets.source_kind == annotation_target_service.DOCUMENT_ELEMENT,
+            )
+        ).all()
+
+    def start(self, session_factory: Callable[[], Session]) -> None:
+        """
+        Build the graph and keep rebuilding it in the background.
+
+        Call once at application startup. A failed first build is logged and
+        retried by the background thread rather than failing startup.
+        """
+        try:
+            with session_factory() as db:
+                self.build(db)
+        except Exception:
+            logger.exception("Link graph build failed; retrying in the background")
+
+        self._stopping = False
+        if self._refresher is None or not self._refresher.is_alive():
+            self._refresher = threading.Thread(
+                target=self._refresh,
+                args=(session_factory,),
+                name="link-graph-refresh",
+                daemon=True,
+            )
+            self._refresher.start()
+
+    def stop(self) -> None:
+        """Stop the background rebuilds. Call at application shutdown."""
+        self._stopping = True
+        self._refresh_now.set()
+        if self._refresher is not None:
+            self._refresher.join(timeout=self.STOP_TIMEOUT_SECONDS)
+            self._refresher = None
+
+    def _refresh(self, session_factory: Callable[[], Session]) -> None:
+        while True:
+            self._refresh_now.wait(self.REBUILD_INTERVAL)
+            self._refresh_now.clear()
+            if self._stopping:
+                return
+            try:
+                with session_factory() as db:
+                    self.build(db)
+            except Exception:
+                logger.exception("Link graph rebuild failed")
+
+    def invalidate(self) -> None:
+        """
+        Rebuild the graph after writes it cannot follow (e.g. bulk deletes).
+
+        With the background thread running the rebuild happens there, and
+        reads keep using the current graph until it is done; otherwise the
+        next read rebuilds it.
+        """
+        if self._refresher is not None and self._refresher.is_alive():
+            self._refresh_now.set()
+            return
+        with self._lock:
+            self._loaded_at = None
+
+    def apply_annotation(self, db: Session, annotation: AnnotationModel) -> None:
+        """
+        Bring the edges of one annotation in line with its committed state.
+
+        Call after commit. Non-linking annotations simply lose any edges they had.
+        Documents of newly linked elements are read before taking the lock, so
+        graph reads never wait on the query.
+        """
+        if self._loaded_at is None and self._replay is None:
+            return
+
+        element_ids = None
+        documents: Dict[int, Optional[int]] = {}
+        if annotation.motivation == self.LINKING:
+            element_ids = set(annotation_target_service.element_ids(annotation.target))
+            with self._lock:
+                missing = [e for e in element_ids if e not in self._element_documents]
+            documents = self._read_documents(db, missing)
+
+        with self._lock:
+            if self._loaded_at is None and self._replay is None:
+                return
+
+            for element_id, document_id in documents.items():
+                self._element_documents.setdefault(element_id, document_id)
+            self._record(annotation.id, element_ids)
+
+            if self._loaded_at is None:
+                return
+            self._remove_edges(annotation.id)
+            if element_ids is not None:
+                self._add_edges(annotation.id, element_ids)
+
+    def remove_annotation(self, annotation_id: int) -> None:
+        """Drop every edge contributed by an annotation. Call after commit."""
+        with self._lock:
+            self._record(annotation_id, None)
+            if self._loaded_at is not None:
+                self._remove_edges(annotation_id)
+
+    # ==================== Helper Methods ====================
+
+    def _ensure_loaded(self, db: Session) -> None:
+        # Only when start() was never called or could not build: concurrent
+        # first reads wait for one build instead of each running their own
+        if self._loaded_at is not None:
+            return
+        with self._build_lock:
+            if self._loaded_at is None:
+                self._build(db)
+
+    def _record(self, annotation_id: int, element_ids: Optional[Set[int]]) -> None:
+        """Log a write for replay if a build is reading. Call holding the lock."""
+        if self._replay is not None:
+            documents = {e: self._element_documents.get(e) for e in element_ids or ()}
+            self._replay.append((annotation_id, element_ids, documents))
+
+    def _read_documents(
+        self, db: Session, element_ids: List[int]
+    ) -> Dict[int, Optional[int]]:
+        """Element ID -> document ID, None for elements that no longer exist."""
+        if not element_ids:
+            return {}
+
+        found = dict(
+            db.execute(
+                select(DocumentElementModel.id, DocumentElementModel.document_id).where(
+                    DocumentElementModel.id.in_(element_ids)
+                )
+            ).all()
+        )
+        return {element_id: found.get(element_id) for element_id in element_ids}
+
+    def _add_edges(self, annotation_id: int, element_ids: Set[int]) -> None:
+        self._annotation_elements[annotation_id] = set(element_ids)
+        if len(element_ids) < 2:
+            return
+
+        for element_id in element_ids:
+            document_id = self._element_documents.get(element_id)
+            if document_id is not None:
+                self._document_elements[document_id].add(element_id)
+
+            for other_id in element_ids:
+                if other_id != element_id:
+                    self._adjacency[element_id][other_id].add(annotation_id)
+
+    def _remove_edges(self, annotation_id: int) -> None:
+        element_ids = self._annotation_elements.pop(annotation_id, set())
+
+        for element_id in element_ids:
+            neighbours = self._adjacency.get(element_id)
+            if neighbours is None:
+                continue
+
+            for other_id in element_ids:
+                annotation_ids = neighbours.get(other_id)
+                if annotation_ids is None:
+                    continue
+                annotation_ids.discard(annotation_id)
+                if not annotation_ids:
+                    del neighbours[other_id]
+
+            if not neighbours:
+                del self._adjacency[element_id]
+                document_id = self._element_documents.get(element_id)
+                if document_id is not None:
+                    self._document_elements[document_id].discard(element_id)
+
+    # ==================== Query Methods ====================
+
+    def neighbours(self, db: Session, document_element_id: int) -> List[Dict[str, Any]]:
+        """Elements linked directly to an element, with the linking annotation IDs."""
+        self._ensure_loaded(db)
+
+        with self._lock:
+            return [
+                {
+                    "element_id": other_id,
+                    "document_id": self._element_documents.get(other_id),
+                    "annotation_ids": sorted(annotation_ids),
+                }
+                for other_id, annotation_ids in sorted(
+                    self._adjacency.get(document_element_id, {}).items()
+                )
+            ]
+
+    def expand(
+        self, db: Session, document_element_id: int, hops: int
+    ) -> Dict[str, Any]:
+        """
+        Breadth-first expansion up to `hops` links away from an element.
+
+        Returns every reached element with its distance, plus the edges between them.
+        """
+        self._ensure_loaded(db)
+        hops = max(0, min(hops, self.MAX_HOPS))
+
+        with self._lock:
+            distances = {document_element_id: 0}
+            queue = deque([document_element_id])
+
+            while queue:
+                element_id = queue.popleft()
+                if distances[element_id] == hops:
+                    continue
+                for other_id in self._adjacency.get(element_id, {}):
+                    if other_id not in distances:
+                        distances[other_id] = distances[element_id] + 1
+                        queue.append(other_id)
+
+            edges = [
+                {
+                    "source": element_id,
+                    "target": other_id,
+                    "annotation_ids": sorted(annotation_ids),
+                }
+                for element_id in sorted(distances)
+                for other_id, annotation_ids in sorted(
+                    self._adjacency.get(element_id, {}).items()
+                )
+                if element_id < other_id and other_id in distances
+            ]
+
+            return {
+                "element_id": document_element_id,
+                "hops": hops,
+                "nodes": [
+                    {
+                        "element_id": element_id,
+                        "document_id": self._element_documents.get(element_id),
+                        "distance": distance,
+                    }
+                    for element_id, distance in sorted(
+                        distances.items(), key=lambda item: (item[1], item[0])
+                    )
+                ],
+                "edges": edges,
+            }
+
+    def document_summary(self, db: Session, document_id: int) -> Dict[str, Any]:
+        """Per-document link summary: linked elements and the documents they reach."""
+        self._ensure_loaded(db)
+
+        with self._lock:
+            element_ids = sorted(self._document_elements.get(document_id, ()))
+            annotation_ids: Set[int] = set()
+            linked_documents: Dict[Optional[int], Set[int]] = defaultdict(set)
+            elements = []
+
+            for element_id in element_ids:
+                neighbours = self._adjacency.get(element_id, {})
+                elements.append(
+                    {"element_id": element_id, "neighbour_count": len(neighbours)}
+                )
+                for other_id, link_ids in neighbours.items():
+                    annotation_ids.update(link_ids)
+                    other_document_id = self._element_documents.get(other_id)
+                    if other_document_id != document_id:
+                        linked_documents[other_document_id].update(link_ids)
+
+            return {
+                "document_id": document_id,
+                "linked_element_count": len(element_ids),
+                "link_count": len(annotation_ids),
+                "elements": elements,
+                "linked_documents": [
+                    {"document_id": other_id, "link_count": len(link_ids)}
+                    for other_id, link_ids in sorted(
+                        linked_documents.items(),
+                        key=lambda item: (item[0] is None, item[0] or 0),
+                    )
+                ],
+            }
+
+
+# Singleton instance for easy importing
+link_graph_service = LinkGraphService()
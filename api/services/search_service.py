@@ -1,12 +1,25 @@
 # services/search_service.py
 
-from typing import List, Dict, Any, Optional
+import heapq
+import html
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime
+from itertools import islice
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass, field
 from fastapi import HTTPException
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
 from services.base_service import BaseService
+from services.annotation_tag_service import annotation_tag_service
 from models.models import Annotation as AnnotationModel
 
 
@@ -44,9 +57,19 @@ class Query:
     sortBy: str
     sortOrder: str
     limit: int
+    cursor: Optional[str] = None
+    countMode: str = "none"
+    snippets: bool = False
+    tagOperator: str = "OR"
     pgroonga_query: str = field(init=False)
 
+    SORT_FIELDS = ("relevance", "title", "created", "modified")
+
     def __post_init__(self):
+        self.sortBy = self.sortBy.lower()
+        if self.sortBy not in self.SORT_FIELDS:
+            raise ValueError(f"sortBy must be one of {', '.join(self.SORT_FIELDS)}")
+
         if len(self.parsedQuery) == 0:
             raise ValueError("No elements in parsed query")
         self.parsedQuery = [Term(**t) for t in self.parsedQuery]
@@ -76,59 +99,128 @@ class Query:
         return " ".join(parts)
 
 
+class SearchResultCache:
+    """
+    Thread-safe LRU cache of search results with a TTL and a byte budget.
+
+    Each entry records the write generations (documents, annotations) its
+    result depends on, as they were before it was computed. Writes in this
+    process bump their generation, so entries computed before the write are
+    not served again; writes in other workers show once the TTL expires.
+    Sizes are measured as encoded JSON.
+    """
+
+    DOCUMENTS = "documents"
+    ANNOTATIONS = "annotations"
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple, tuple]" = OrderedDict()
+        self._generations = {self.DOCUMENTS: 0, self.ANNOTATIONS: 0}
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _drop(self, key: Tuple) -> None:
+        _, _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _current(self, kinds: Tuple[str, ...]) -> Tuple[int, ...]:
+        return tuple(self._generations[kind] for kind in kinds)
+
+    def generations(self, kinds: Tuple[str, ...]) -> Tuple[int, ...]:
+        """Snapshot the write generations; take it before computing a result."""
+        with self._lock:
+            return self._current(kinds)
+
+    def bump(self, kind: str) -> None:
+        """Invalidate every entry that depends on documents or annotations."""
+        with self._lock:
+            self._generations[kind] += 1
+
+    def get(self, key: Tuple, kinds: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, generations, _, value = entry
+                if (
+                    time.monotonic() - stored_at < self.ttl_seconds
+                    and generations == self._current(kinds)
+                ):
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return value
+                self._drop(key)
+            self._misses += 1
+            return None
+
+    def put(self, key: Tuple, generations: Tuple[int, ...], value: Dict[str, Any]) -> None:
+        size = len(json.dumps(value, default=str))
+        # One result larger than a quarter of the budget would flush the rest
+        if size > self.max_bytes // 4:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic(), generations, size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else None,
+                "evictions": self._evictions,
+            }
+
+
 class SearchService(BaseService[AnnotationModel]):
     """Service for search operations using PGroonga full-text search."""
 
-    # SQL queries for different search types
-    ELEMENT_QUERY = text(
-        """
-    WITH ranked_elements AS (
-        SELECT
-            null as annotation_id,
-            de.id as element_id,
-            de.document_id,
-            d.document_collection_id as collection_id,
-            de.content ->> 'text' as content,
-            d.title as document_title,
-            dc.title as collection_title,
-            'element' as type,
-            null as motivation,
-            'DocumentElements/' || de.id as source,
-            de.created,
-            pgroonga_score(de.tableoid, de.ctid) as relevance_score
+    # Keeps rows tagged with at least :tag_required of :tags, read from the
+    # tag index; the tag must be on the result itself (element or annotation)
+    TAG_FILTER = """
+        AND (CAST(:tag_count AS integer) = 0 OR {id_column} IN (
+            SELECT t.source_id FROM app.annotation_tags t
+            WHERE t.source_kind = '{source_kind}'
+            AND t.tag = ANY(CAST(:tags AS text[]))
+            GROUP BY t.source_id
+            HAVING count(DISTINCT t.tag) >= :tag_required
+        ))
+    """
+
+    # Rows matched by each search type; shared by the page and count queries
+    ELEMENT_MATCH = """
         FROM app.document_elements de
         JOIN app.documents d ON de.document_id = d.id
         JOIN app.document_collections dc on d.document_collection_id = dc.id
         WHERE (de.content->>'text') &@~ :query
-    )
-    SELECT * FROM ranked_elements
-    ORDER BY
-        CASE WHEN :descending THEN relevance_score END DESC,
-        CASE WHEN NOT :descending THEN relevance_score END ASC,
-        CASE WHEN :descending THEN created END DESC,
-        CASE WHEN NOT :descending THEN created END ASC
-    LIMIT :limit;
-    """
-    )
+    """ + TAG_FILTER.format(id_column="de.id", source_kind="DocumentElements")
 
-    COMMENTS_QUERY = text(
-        """
-    WITH ranked_annotations AS (
-        SELECT 
-            a.id as annotation_id,
-            split_part(a.target -> 0 ->> 'source', '/', 2)::int as element_id,
-            d.id as document_id,
-            d.document_collection_id as collection_id,
-            a.body ->> 'value' as content,
-            d.title as document_title,
-            dc.title as collection_title,
-            'annotation' as type,
-            a.target -> 0 ->> 'source' as source,
-            motivation,
-            a.created,
-            pgroonga_score(a.tableoid, a.ctid) as relevance_score
+    COMMENTS_MATCH = """
         FROM app.annotations a 
-        JOIN app.documents d ON split_part(a.target -> 0 ->> 'source', '/', 2)::int = d.id
+        JOIN app.document_elements de ON a.target_element_id = de.id
+        JOIN app.documents d ON de.document_id = d.id
         JOIN app.document_collections dc on d.document_collection_id = dc.id
         WHERE (a.body->>'value') &@~ :query
         AND a.motivation IN ('commenting')
@@ -136,58 +228,187 @@ class SearchService(BaseService[AnnotationModel]):
             (:classroom_id IS NULL AND a.classroom_id IS NULL) OR
             (a.classroom_id = :classroom_id)
         )
-    )
-    SELECT * FROM ranked_annotations
-    ORDER BY 
-        CASE WHEN :descending THEN relevance_score END DESC,
-        CASE WHEN NOT :descending THEN relevance_score END ASC,
-        CASE WHEN :descending THEN created END DESC,
-        CASE WHEN NOT :descending THEN created END ASC
-    LIMIT :limit;
+    """ + TAG_FILTER.format(id_column="a.id", source_kind="Annotation")
+
+    ANNOTATIONS_MATCH = """
+        FROM app.annotations a 
+        JOIN app.document_elements de ON a.target_element_id = de.id
+        JOIN app.documents d ON de.document_id = d.id
+        JOIN app.document_collections dc on d.document_collection_id = dc.id
+        WHERE (a.body->>'value') &@~ :query
+        AND a.motivation IN ('scholarly')
+    """ + TAG_FILTER.format(id_column="a.id", source_kind="Annotation")
+
+    # Select lists of each search type's page query; {sort_expression} is
+    # the expression results are ordered by (see SORT_EXPRESSIONS)
+    ELEMENT_SELECT = f"""
+        SELECT
+            null as annotation_id,
+            de.id as element_id,
+            de.document_id,
+            d.document_collection_id as collection_id,
+            CASE WHEN :snippets THEN left(de.content ->> 'text', :snippet_width)
+                ELSE de.content ->> 'text' END as content,
+            CASE WHEN :snippets THEN pgroonga_snippet_html(
+                de.content ->> 'text', pgroonga_query_extract_keywords(:query), :snippet_width
+            ) END as snippets_html,
+            d.title as document_title,
+            dc.title as collection_title,
+            'element' as type,
+            null as motivation,
+            'DocumentElements/' || de.id as source,
+            de.created,
+            pgroonga_score(de.tableoid, de.ctid) as relevance_score,
+            {{sort_expression}} as sort_value
+        {ELEMENT_MATCH}
     """
-    )
 
-    ANNOTATIONS_QUERY = text(
-        """
-    WITH ranked_annotations AS (
-        SELECT 
+    ANNOTATION_COLUMNS = """
+        SELECT
             a.id as annotation_id,
-            split_part(a.target -> 0 ->> 'source', '/', 2)::int as element_id,
+            a.target_element_id as element_id,
             de.document_id as document_id,
             d.document_collection_id as collection_id,
-            a.body ->> 'value' as content,
+            CASE WHEN :snippets THEN left(a.body ->> 'value', :snippet_width)
+                ELSE a.body ->> 'value' END as content,
+            CASE WHEN :snippets THEN pgroonga_snippet_html(
+                a.body ->> 'value', pgroonga_query_extract_keywords(:query), :snippet_width
+            ) END as snippets_html,
             d.title as document_title,
             dc.title as collection_title,
             'annotation' as type,
             a.target -> 0 ->> 'source' as source,
             motivation,
             a.created,
-            pgroonga_score(a.tableoid, a.ctid) as relevance_score
-        FROM app.annotations a 
-        JOIN app.document_elements de ON split_part(a.target -> 0 ->> 'source', '/', 2)::int = de.id
-        JOIN app.documents d ON de.document_id = d.id
-        JOIN app.document_collections dc on d.document_collection_id = dc.id
-        WHERE (a.body->>'value') &@~ :query
-        AND a.motivation IN ('scholarly')
-    )
-    SELECT * FROM ranked_annotations
-    ORDER BY 
-        CASE WHEN :descending THEN relevance_score END DESC,
-        CASE WHEN NOT :descending THEN relevance_score END ASC,
-        CASE WHEN :descending THEN created END DESC,
-        CASE WHEN NOT :descending THEN created END ASC
+            pgroonga_score(a.tableoid, a.ctid) as relevance_score,
+            {sort_expression} as sort_value
+    """
+
+    COMMENTS_SELECT = ANNOTATION_COLUMNS + COMMENTS_MATCH
+    ANNOTATIONS_SELECT = ANNOTATION_COLUMNS + ANNOTATIONS_MATCH
+
+    # Expression each sortBy orders a table's rows by, with the SQL type of
+    # its cursor value. None is NULL and titles compare by code point, so
+    # per-type lists merge in Python in the order SQL sorted them. Title,
+    # created and modified are backed by (expression, id) indexes
+    SORT_EXPRESSIONS = {
+        "element": {
+            "relevance": ("pgroonga_score(de.tableoid, de.ctid)", "double precision"),
+            "title": ("coalesce(d.title, '') COLLATE \"C\"", "text"),
+            "created": ("coalesce(de.created, 'epoch'::timestamp)", "timestamp"),
+            "modified": ("coalesce(de.modified, 'epoch'::timestamp)", "timestamp"),
+        },
+        "annotation": {
+            "relevance": ("pgroonga_score(a.tableoid, a.ctid)", "double precision"),
+            "title": ("coalesce(d.title, '') COLLATE \"C\"", "text"),
+            "created": ("coalesce(a.created, 'epoch'::timestamp)", "timestamp"),
+            "modified": ("coalesce(a.modified, 'epoch'::timestamp)", "timestamp"),
+        },
+    }
+
+    # Relevance is only known once a row has matched, so relevance pages
+    # filter and sort the scored matches; :after_id is resolved per type by
+    # _keyset_params
+    RELEVANCE_PAGE = """
+    WITH matches AS ({select})
+    SELECT * FROM matches
+    WHERE CAST(:after_value AS double precision) IS NULL
+        OR (sort_value, {id_column}) {comparison} (:after_value, :after_id)
+    ORDER BY sort_value {direction}, {id_column} {direction}
     LIMIT :limit;
     """
-    )
 
-    QUERY_MAP = {
-        "documents": ELEMENT_QUERY,
-        "comments": COMMENTS_QUERY,
-        "annotations": ANNOTATIONS_QUERY,
+    # Other sorts filter and order on the indexed expression itself, so
+    # ORDER BY ... LIMIT can walk the index and stop after :limit matches
+    INDEXED_PAGE = """
+    {select}
+        AND (CAST(:after_value AS {value_type}) IS NULL
+            OR ({sort_expression}, {id_expression}) {comparison}
+                (CAST(:after_value AS {value_type}), :after_id))
+    ORDER BY {sort_expression} {direction}, {id_expression} {direction}
+    LIMIT :limit;
+    """
+
+    # Select list, id expression and id column of each search type
+    PAGE_QUERY_PARTS = {
+        "documents": (ELEMENT_SELECT, "de.id", "element_id"),
+        "comments": (COMMENTS_SELECT, "a.id", "annotation_id"),
+        "annotations": (ANNOTATIONS_SELECT, "a.id", "annotation_id"),
+    }
+
+    # The `type` each search type's rows carry; part of the cursor key
+    RESULT_TYPE_MAP = {
+        "documents": "element",
+        "comments": "annotation",
+        "annotations": "annotation",
+    }
+
+    # Exact counts scan every match; estimates read the planner's row estimate
+    COUNT_QUERY_MAP = {
+        "documents": text(f"SELECT count(*) {ELEMENT_MATCH}"),
+        "comments": text(f"SELECT count(*) {COMMENTS_MATCH}"),
+        "annotations": text(f"SELECT count(*) {ANNOTATIONS_MATCH}"),
     }
 
+    ESTIMATE_QUERY_MAP = {
+        "documents": text(f"EXPLAIN (FORMAT JSON) SELECT 1 {ELEMENT_MATCH}"),
+        "comments": text(f"EXPLAIN (FORMAT JSON) SELECT 1 {COMMENTS_MATCH}"),
+        "annotations": text(f"EXPLAIN (FORMAT JSON) SELECT 1 {ANNOTATIONS_MATCH}"),
+    }
+
+    # Stands in for "every row" / "no row" when a cursor's tie falls in another type
+    MAX_ROW_ID = 2**63 - 1
+
+    # Seconds each per-type query may run before the search fails with 504,
+    # counted from when the query starts rather than from when it was queued.
+    # Postgres enforces it through statement_timeout; the client-side check,
+    # QUERY_TIMEOUT_GRACE_SECONDS later, only covers other databases
+    QUERY_TIMEOUT_SECONDS = 5
+    QUERY_TIMEOUT_GRACE_SECONDS = 1
+
+    # Seconds a per-type query may wait for a free worker before the search
+    # fails with 503, so with the timeout above every search is bounded end to end
+    QUEUE_TIMEOUT_SECONDS = 5
+
+    # How often waiting searches check their queries' age
+    WAIT_POLL_SECONDS = 0.1
+
+    # Per-type queries in flight across all requests; each holds a pooled connection
+    MAX_CONCURRENT_QUERIES = 8
+
+    # Result cache bounds; the TTL bounds staleness across workers
+    CACHE_MAX_ENTRIES = 1000
+    CACHE_MAX_BYTES = 64 * 1024 * 1024
+    CACHE_TTL_SECONDS = 60
+
+    # Characters of context around each snippet keyword, and between snippets
+    SNIPPET_WIDTH = 200
+    SNIPPET_SEPARATOR = " … "
+
+    # How pgroonga_snippet_html marks a keyword inside HTML-escaped text
+    KEYWORD_MARKUP = re.compile(r'<span class="keyword">(.*?)</span>', re.DOTALL)
+
+    # Motivations whose annotations appear in, or filter, search results
+    SEARCHED_MOTIVATIONS = ("commenting", "scholarly", "tagging")
+
     def __init__(self):
         super().__init__(AnnotationModel)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.MAX_CONCURRENT_QUERIES, thread_name_prefix="search"
+        )
+        self.cache = SearchResultCache(
+            self.CACHE_MAX_ENTRIES,
+            int(os.environ.get("SEARCH_CACHE_MAX_BYTES", self.CACHE_MAX_BYTES)),
+            self.CACHE_TTL_SECONDS,
+        )
+        self.page_queries = {
+            (query_type, sort_by, descending): self._build_page_query(
+                query_type, sort_by, descending
+            )
+            for query_type in self.PAGE_QUERY_PARTS
+            for sort_by in Query.SORT_FIELDS
+            for descending in (True, False)
+        }
 
     # ==================== Helper Methods ====================
 
@@ -204,39 +425,233 @@ class SearchService(BaseService[AnnotationModel]):
                 status_code=400, detail=f"Invalid search query: {str(e)}"
             )
 
-    def _get_query_for_type(self, query_type: str):
+    def _build_page_query(self, query_type: str, sort_by: str, descending: bool):
+        """Compile the page query of one search type, sort field and direction."""
+        select, id_expression, id_column = self.PAGE_QUERY_PARTS[query_type]
+        sort_expression, value_type = self.SORT_EXPRESSIONS[
+            self.RESULT_TYPE_MAP[query_type]
+        ][sort_by]
+        page = self.RELEVANCE_PAGE if sort_by == "relevance" else self.INDEXED_PAGE
+        return text(
+            page.format(
+                select=select.format(sort_expression=sort_expression),
+                sort_expression=sort_expression,
+                value_type=value_type,
+                id_expression=id_expression,
+                id_column=id_column,
+                comparison="<" if descending else ">",
+                direction="DESC" if descending else "ASC",
+            )
+        )
+
+    def _get_query_for_type(self, query_type: str, sort_by: str, descending: bool):
         """
-        Get the SQL query for a search type.
+        Get the SQL page query for a search type, sort field and direction.
 
         Raises HTTPException 400 if search type is unrecognized.
         """
-        sql_query = self.QUERY_MAP.get(query_type)
+        sql_query = self.page_queries.get((query_type, sort_by, descending))
         if sql_query is None:
             raise HTTPException(
                 status_code=400, detail=f"Unrecognized search type: {query_type}"
             )
         return sql_query
 
+    def _keyset_params(
+        self, cursor_values: Optional[List[Any]], result_type: str, descending: bool
+    ) -> Dict[str, Any]:
+        """
+        Keyset bounds for one search type's query.
+
+        The cursor is the (sort value, type, id) of the last row served.
+        Rows of one type tie on sort value with the cursor row only if they sort
+        after it, so :after_id becomes that row's id for its own type, and for
+        other types a bound that admits every tied row or none.
+        """
+        if cursor_values is None:
+            return {"after_value": None, "after_id": None}
+
+        value, cursor_type, cursor_id = cursor_values
+        if result_type == cursor_type:
+            after_id = cursor_id
+        elif (result_type < cursor_type) == descending:
+            after_id = self.MAX_ROW_ID if descending else 0
+        else:
+            after_id = 0 if descending else self.MAX_ROW_ID
+        return {"after_value": value, "after_id": after_id}
+
+    def _row_key(self, row: Dict[str, Any]):
+        """Global sort key of a result row: sort value, then type, then its own id."""
+        row_id = row["annotation_id"] if row["type"] == "annotation" else row["element_id"]
+        return (row["sort_value"], row["type"], row_id)
+
+    def _encode_row_cursor(self, row: Dict[str, Any]) -> str:
+        """Cursor continuing after a row; timestamps travel as ISO strings."""
+        value, result_type, row_id = self._row_key(row)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        return self.encode_cursor(value, result_type, row_id)
+
     def _execute_search_query(
+        self, bind: Engine, sql_query, params: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """
+        Execute a single search or count query on its own pooled connection.
+
+        On PostgreSQL the query gets a statement_timeout, so the server ends
+        it after QUERY_TIMEOUT_SECONDS and its connection returns to the pool.
+        """
+        with bind.connect() as connection:
+            if connection.dialect.name == "postgresql":
+                connection.execute(
+                    text("SELECT set_config('statement_timeout', :timeout, true)"),
+                    {"timeout": f"{int(self.QUERY_TIMEOUT_SECONDS * 1000)}ms"},
+                )
+            rows = [row._asdict() for row in connection.execute(sql_query, params)]
+            connection.rollback()
+        return rows
+
+    def _run_query(
         self,
-        db: Session,
+        started: Dict[int, float],
+        index: int,
+        bind: Engine,
         sql_query,
-        pgroonga_query: str,
-        limit: int,
-        descending: bool,
-        classroom_id: Optional[int] = None,
-    ) -> List[Any]:
-        """Execute a single search query and return results."""
-        result = db.execute(
-            sql_query,
-            {
-                "query": pgroonga_query,
-                "limit": limit,
-                "descending": descending,
-                "classroom_id": classroom_id,
-            },
+        params: Dict[str, Any],
+    ) -> List[Dict[str, Any]]:
+        """Run a query on a worker, recording when it left the queue."""
+        started[index] = time.monotonic()
+        return self._execute_search_query(bind, sql_query, params)
+
+    def _await_queries(
+        self, futures: List[Future], submitted: float, started: Dict[int, float]
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Wait for every query, failing fast on the first error.
+
+        A query's timeout runs from when a worker picked it up, so time spent
+        queued behind other searches never causes a 504; the queue wait has
+        its own, shorter-lived bound instead.
+
+        Raises HTTPException 503 if a query waits QUEUE_TIMEOUT_SECONDS for a worker.
+        Raises HTTPException 504 if a started query outlives the timeout.
+        """
+        limit = self.QUERY_TIMEOUT_SECONDS + self.QUERY_TIMEOUT_GRACE_SECONDS
+        pending = set(futures)
+        while pending:
+            done, pending = wait(
+                pending, timeout=self.WAIT_POLL_SECONDS, return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                future.result()
+
+            now = time.monotonic()
+            waiting = [
+                index for index, future in enumerate(futures) if future in pending
+            ]
+            if any(now - started[index] > limit for index in waiting if index in started):
+                raise HTTPException(status_code=504, detail="Search timed out")
+            if now - submitted > self.QUEUE_TIMEOUT_SECONDS and any(
+                index not in started for index in waiting
+            ):
+                raise HTTPException(
+                    status_code=503,
+                    detail="Search is busy, try again shortly",
+                    headers={"Retry-After": "1"},
+                )
+        return [future.result() for future in futures]
+
+    def _count_from_rows(self, rows: List[Dict[str, Any]], estimated: bool) -> int:
+        """Read the count, or the planner's row estimate, from a count query's rows."""
+        value = next(iter(rows[0].values()))
+        if not estimated:
+            return value
+        plan = json.loads(value) if isinstance(value, str) else value
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def _cache_key(self, parsed_query: Query, classroom_id: Optional[int]) -> Tuple:
+        """Everything that shapes a search response, with the query text normalized."""
+        return (
+            re.sub(r"\s+", " ", parsed_query.pgroonga_query).strip(),
+            tuple(sorted(set(parsed_query.searchTypes))),
+            parsed_query.sortBy,
+            parsed_query.sortOrder.lower(),
+            parsed_query.limit,
+            parsed_query.cursor,
+            parsed_query.countMode,
+            parsed_query.snippets,
+            tuple(annotation_tag_service.normalize_all(parsed_query.tags)),
+            parsed_query.tagOperator.upper(),
+            classroom_id,
         )
-        return result.fetchall()
+
+    def _cache_kinds(self, parsed_query: Query, query_types: List[str]) -> Tuple[str, ...]:
+        """
+        The writes a search's results depend on; elements carry no annotations,
+        but tag filters are read from tagging annotations.
+        """
+        if parsed_query.tags or any(
+            self.RESULT_TYPE_MAP[t] == "annotation" for t in query_types
+        ):
+            return (SearchResultCache.DOCUMENTS, SearchResultCache.ANNOTATIONS)
+        return (SearchResultCache.DOCUMENTS,)
+
+    def _snippet(self, snippets_html: List[str]) -> Tuple[str, List[List[int]]]:
+        """
+        Plain-text snippet and keyword [start, end) offsets from the HTML
+        snippets pgroonga_snippet_html returns.
+        """
+        parts: List[str] = []
+        highlights: List[List[int]] = []
+        length = 0
+
+        def append(text_part: str) -> None:
+            nonlocal length
+            parts.append(text_part)
+            length += len(text_part)
+
+        for index, fragment in enumerate(snippets_html):
+            if index:
+                append(self.SNIPPET_SEPARATOR)
+            position = 0
+            for match in self.KEYWORD_MARKUP.finditer(fragment):
+                append(html.unescape(fragment[position : match.start()]))
+                keyword = html.unescape(match.group(1))
+                highlights.append([length, length + len(keyword)])
+                append(keyword)
+                position = match.end()
+            append(html.unescape(fragment[position:]))
+
+        return "".join(parts), highlights
+
+    def _apply_snippets(self, rows: List[Dict[str, Any]], snippets: bool) -> None:
+        """
+        Replace full content with a snippet and highlight offsets in place.
+
+        A match the keywords do not appear in verbatim (a fuzzy match) gets
+        the start of its content as the snippet, with no highlights.
+        """
+        for row in rows:
+            snippets_html = row.pop("snippets_html", None)
+            if not snippets:
+                continue
+            if snippets_html:
+                row["snippet"], row["highlights"] = self._snippet(snippets_html)
+            else:
+                row["snippet"], row["highlights"] = row["content"], []
+            row["content"] = None
+
+    def _merge_results(
+        self, result_lists: List[List[Dict[str, Any]]], limit: int, descending: bool
+    ) -> List[Dict[str, Any]]:
+        """
+        K-way merge per-type results into one list, truncated to `limit`.
+
+        Each list arrives sorted by the global key (see _row_key) in the
+        requested direction, so the merge never sorts the combined rows.
+        """
+        merged = heapq.merge(*result_lists, key=self._row_key, reverse=descending)
+        return list(islice(merged, limit))
 
     # ==================== Search Operations ====================
 
@@ -250,42 +665,141 @@ class SearchService(BaseService[AnnotationModel]):
         Execute a full-text search across specified content types.
         Filters classroom-specific content (comments) by classroom_id.
         Replies are not searched - they inherit visibility from parent comments.
+
+        Each search type runs concurrently on its own pooled connection, and
+        the results are merged by `sortBy` into one page of at most `limit`
+        rows. Title, created and modified sorts read their index in order;
+        their relevance_score is 0 whenever the planner does not use the
+        PGroonga index. `next_cursor` continues after the page. With countMode `exact`
+        or `estimated` the total number of matches is counted alongside. With
+        `snippets`, rows carry keyword-in-context snippets and highlight
+        offsets instead of their full content. `tags` keeps results tagged
+        with any (tagOperator OR) or all (AND) of the given tags.
+
+        Raises HTTPException 400 if the query or cursor is invalid.
+        Raises HTTPException 503 if the search queues longer than QUEUE_TIMEOUT_SECONDS.
+        Raises HTTPException 504 if a query exceeds QUERY_TIMEOUT_SECONDS.
         """
         # Parse and validate the query
         parsed_query = self._parse_query(query_dict)
         descending = parsed_query.sortOrder.lower() == "desc"
+        cursor_values = (
+            self.decode_cursor(parsed_query.cursor, 3) if parsed_query.cursor else None
+        )
+
+        # Validate every type before any query is started
+        query_types = list(dict.fromkeys(parsed_query.searchTypes))
+        sql_queries = [
+            self._get_query_for_type(query_type, parsed_query.sortBy, descending)
+            for query_type in query_types
+        ]
+
+        cache_key = self._cache_key(parsed_query, classroom_id)
+        cache_kinds = self._cache_kinds(parsed_query, query_types)
+        cached = self.cache.get(cache_key, cache_kinds)
+        if cached is not None:
+            return {**cached, "query": query_dict}
+        # Taken before querying so a write during the search invalidates it
+        generations = self.cache.generations(cache_kinds)
+        tags = annotation_tag_service.normalize_all(parsed_query.tags)
+
+        params = {
+            "query": parsed_query.pgroonga_query,
+            # One extra row tells whether there is a next page
+            "limit": parsed_query.limit + 1,
+            "classroom_id": classroom_id,
+            "snippets": parsed_query.snippets,
+            "snippet_width": self.SNIPPET_WIDTH,
+            "tags": tags,
+            "tag_count": len(tags),
+            # OR needs any one of the tags, AND needs all of them
+            "tag_required": len(tags) if parsed_query.tagOperator.upper() == "AND" else 1,
+        }
+
+        bind = db.get_bind()
+        queries = [
+            (
+                sql_query,
+                {
+                    **params,
+                    **self._keyset_params(
+                        cursor_values, self.RESULT_TYPE_MAP[query_type], descending
+                    ),
+                },
+            )
+            for query_type, sql_query in zip(query_types, sql_queries)
+        ]
+
+        estimated = parsed_query.countMode == "estimated"
+        count_map = self.ESTIMATE_QUERY_MAP if estimated else self.COUNT_QUERY_MAP
+        if parsed_query.countMode != "none":
+            queries += [(count_map[query_type], params) for query_type in query_types]
+
+        started: Dict[int, float] = {}
+        submitted = time.monotonic()
+        futures = [
+            self._executor.submit(
+                self._run_query, started, index, bind, sql_query, query_params
+            )
+            for index, (sql_query, query_params) in enumerate(queries)
+        ]
 
         try:
-            results = []
-
-            for query_type in parsed_query.searchTypes:
-                sql_query = self._get_query_for_type(query_type)
-
-                rows = self._execute_search_query(
-                    db=db,
-                    sql_query=sql_query,
-                    pgroonga_query=parsed_query.pgroonga_query,
-                    limit=parsed_query.limit,
-                    descending=descending,
-                    classroom_id=classroom_id,
-                )
-                results.extend(rows)
+            rows = self._await_queries(futures, submitted, started)
+            result_lists = rows[: len(query_types)]
+            count_rows = rows[len(query_types) :]
 
-            return {
+            results = self._merge_results(
+                result_lists, parsed_query.limit + 1, descending
+            )
+            next_cursor = None
+            if len(results) > parsed_query.limit:
+                results = results[: parsed_query.limit]
+                next_cursor = self._encode_row_cursor(results[-1])
+            self._apply_snippets(results, parsed_query.snippets)
+
+            total = None
+            if count_rows:
+                total = sum(self._count_from_rows(rows, estimated) for rows in count_rows)
+
+            response = {
                 "query": query_dict,
                 "total_results": len(results),
-                "results": [row._asdict() for row in results],
+                "results": results,
+                "next_cursor": next_cursor,
+                "total": total,
+                "total_estimated": estimated,
             }
+            self.cache.put(cache_key, generations, response)
+            return response
 
         except HTTPException:
             raise
         except Exception as e:
+            if "statement timeout" in str(e).lower():
+                raise HTTPException(status_code=504, detail="Search timed out")
             if "pgroonga" in str(e).lower():
                 raise HTTPException(
                     status_code=400,
                     detail=f"Invalid search query. PGroonga search error.",
                 )
             raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+        finally:
+            # Stops queries still queued; running ones end by statement_timeout
+            for future in futures:
+                future.cancel()
+
+
+    # ==================== Cache Invalidation ====================
+
+    def documents_changed(self) -> None:
+        """Invalidate cached results after element, document or collection writes."""
+        self.cache.bump(SearchResultCache.DOCUMENTS)
+
+    def annotations_changed(self, motivations: List[Optional[str]]) -> None:
+        """Invalidate cached results after writes to searched annotations."""
+        if any(m in self.SEARCHED_MOTIVATIONS for m in motivations):
+            self.cache.bump(SearchResultCache.ANNOTATIONS)
 
 
 # Singleton instance for easy importing
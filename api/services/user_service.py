@@ -106,16 +106,21 @@ class UserService(BaseService[UserModel]):
         limit: int = 100,
         first_name: Optional[str] = None,
         last_name: Optional[str] = None,
-        name_search: Optional[str] = None
+        name_search: Optional[str] = None,
+        cursor: Optional[str] = None
     ) -> List[UserModel]:
-        """Get users with optional filtering and pagination."""
+        """
+        Get users with optional filtering and pagination.
+        
+        Pages are ordered by id; `skip` is only honoured when no cursor is given.
+        """
         query = self._get_user_query(db)
         
         # Apply name filters
         query = self._apply_name_filters(query, first_name, last_name, name_search)
         
         # Apply pagination
-        query = query.offset(skip).limit(limit)
+        query = self.apply_keyset(query, cursor, [UserModel.id], skip).limit(limit)
         
         result = db.execute(query)
         return result.scalars().unique().all()
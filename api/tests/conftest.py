@@ -231,6 +231,9 @@ class TestAnnotation(TestBase):
     body = Column(JSON)  # JSON instead of JSONB
     target = Column(JSON)  # JSON instead of JSONB
 
+    target_element_id = Column(Integer, nullable=True)
+    target_annotation_id = Column(Integer, nullable=True)
+
     status = Column(String(50))
     annotation_type = Column(String(100))
     context = Column(String(255))
@@ -242,6 +245,61 @@ class TestAnnotation(TestBase):
     classroom = relationship("TestGroup", foreign_keys=[classroom_id])
 
 
+class TestAnnotationTarget(TestBase):
+    """Test-specific AnnotationTarget model without PostgreSQL-specific features."""
+
+    __tablename__ = "annotation_targets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    annotation_id = Column(Integer, ForeignKey("annotations.id"), nullable=False)
+    target_id = Column(Integer)
+    source_kind = Column(String(50), nullable=False)
+    source_id = Column(Integer, nullable=False)
+    start = Column(Integer, nullable=True)
+    end = Column(Integer, nullable=True)
+
+
+class TestAnnotationTag(TestBase):
+    """Test-specific AnnotationTag model without PostgreSQL-specific features."""
+
+    __tablename__ = "annotation_tags"
+
+    id = Column(Integer, primary_key=True)
+    annotation_id = Column(Integer, ForeignKey("annotations.id"), nullable=False)
+    tag = Column(String(255), nullable=False)
+    source_kind = Column(String(50), nullable=False)
+    source_id = Column(Integer, nullable=False)
+    document_collection_id = Column(Integer, nullable=True)
+
+
+class TestAnnotationCounter(TestBase):
+    """Test-specific AnnotationCounter model without PostgreSQL-specific features."""
+
+    __tablename__ = "annotation_counters"
+
+    scope = Column(String(20), primary_key=True)
+    scope_id = Column(Integer, primary_key=True)
+    scholarly_count = Column(Integer, nullable=False, default=0)
+    comment_count = Column(Integer, nullable=False, default=0)
+    annotation_count = Column(Integer, nullable=False, default=0)
+    element_count = Column(Integer, nullable=False, default=0)
+    document_count = Column(Integer, nullable=False, default=0)
+    change_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class TestAnnotationTombstone(TestBase):
+    """Test-specific AnnotationTombstone model without PostgreSQL-specific features."""
+
+    __tablename__ = "annotation_tombstones"
+
+    id = Column(Integer, primary_key=True)
+    annotation_id = Column(Integer, nullable=False)
+    document_id = Column(Integer, nullable=False)
+    document_element_id = Column(Integer, nullable=False)
+    classroom_id = Column(Integer, nullable=True)
+    deleted = Column(DateTime, nullable=False)
+
+
 class CASConfigurationModel(TestBase):
     """Test-specific CASConfiguration model without PostgreSQL-specific features."""
 
@@ -350,12 +408,36 @@ def AnnotationModel():
     return TestAnnotation
 
 
+@pytest.fixture
+def AnnotationTargetModel():
+    """Provide TestAnnotationTarget as AnnotationTargetModel for tests."""
+    return TestAnnotationTarget
+
+
+@pytest.fixture
+def AnnotationTagModel():
+    """Provide TestAnnotationTag as AnnotationTagModel for tests."""
+    return TestAnnotationTag
+
+
 @pytest.fixture
 def DocumentCollectionModel():
     """Provide TestDocumentCollection as DocumentCollectionModel for tests."""
     return TestDocumentCollection
 
 
+@pytest.fixture
+def DocumentModel():
+    """Provide TestDocument as DocumentModel for tests."""
+    return TestDocument
+
+
+@pytest.fixture
+def DocumentElementModel():
+    """Provide TestDocumentElement as DocumentElementModel for tests."""
+    return TestDocumentElement
+
+
 @pytest.fixture
 def Role():
     """Provide TestRole as Role for tests."""
@@ -740,6 +822,65 @@ def annotation_with_nested_targets(
 
 # ==================== Service Fixtures ====================
 
+@pytest.fixture(autouse=True)
+def annotation_counter_service(monkeypatch):
+    """
+    Keep the maintained statistics counters on the SQLite test tables.
+
+    Autouse because every annotation, element and document write updates them.
+    """
+    import services.annotation_counter_service as counter_module
+    from services.annotation_counter_service import annotation_counter_service
+
+    monkeypatch.setattr(counter_module, "AnnotationModel", TestAnnotation)
+    monkeypatch.setattr(counter_module, "DocumentCollection", TestDocumentCollection)
+    monkeypatch.setattr(counter_module, "DocumentElement", TestDocumentElement)
+    monkeypatch.setattr(counter_module, "Document", TestDocument)
+    monkeypatch.setattr(annotation_counter_service, "model", TestAnnotationCounter)
+
+    return annotation_counter_service
+
+
+@pytest.fixture(autouse=True)
+def annotation_change_service(monkeypatch):
+    """
+    Keep the delta sync deletion log on the SQLite test tables.
+
+    Autouse because every annotation delete writes tombstones.
+    """
+    import services.annotation_change_service as change_module
+    from services.annotation_change_service import annotation_change_service
+
+    monkeypatch.setattr(change_module, "AnnotationModel", TestAnnotation)
+    monkeypatch.setattr(change_module, "Document", TestDocument)
+    monkeypatch.setattr(change_module, "DocumentElement", TestDocumentElement)
+    monkeypatch.setattr(annotation_change_service, "model", TestAnnotationTombstone)
+
+    return annotation_change_service
+
+
+@pytest.fixture(autouse=True)
+def annotation_event_service(monkeypatch):
+    """
+    Build live annotation events from the SQLite test tables and deliver them
+    in-process, with no subscriptions left over from other tests.
+
+    Autouse because every annotation write publishes events.
+    """
+    import services.annotation_event_service as event_module
+    from services.annotation_event_service import (
+        annotation_event_service,
+        LocalEventBackend,
+    )
+
+    monkeypatch.setattr(event_module, "DocumentElement", TestDocumentElement)
+    monkeypatch.setattr(annotation_event_service, "backend", LocalEventBackend())
+    monkeypatch.setattr(annotation_event_service, "_subscriptions", {})
+    monkeypatch.setattr(annotation_event_service, "_started", False)
+
+    return annotation_event_service
+
+
 # Sequence counters for SQLite (PostgreSQL uses database sequences)
 _body_id_counter = 0
 _target_id_counter = 0
@@ -757,9 +898,11 @@ def annotation_service(db_session, monkeypatch):
     """
     Create AnnotationService instance configured for SQLite testing.
 
-    Patches ID generation methods to use simple counters instead of PostgreSQL sequences.
+    Answers the ID allocator's block query from simple counters instead of PostgreSQL sequences.
     """
     from services.annotation_service import AnnotationService
+    from services.annotation_target_service import annotation_target_service
+    from services.annotation_tag_service import annotation_tag_service
 
     # Reset counters for test isolation
     reset_sequence_counters()
@@ -769,19 +912,22 @@ def annotation_service(db_session, monkeypatch):
     # Patch the model to use TestAnnotation (service now uses self.model everywhere)
     service.model = TestAnnotation
 
-    # Patch ID generation methods to work with SQLite
-    def mock_generate_body_id(db: Session) -> int:
-        global _body_id_counter
-        _body_id_counter += 1
-        return _body_id_counter
-
-    def mock_generate_target_id(db: Session) -> int:
-        global _target_id_counter
-        _target_id_counter += 1
-        return _target_id_counter
-
-    monkeypatch.setattr(service, "generate_body_id", mock_generate_body_id)
-    monkeypatch.setattr(service, "generate_target_id", mock_generate_target_id)
+    # Keep the target index on the SQLite test table
+    monkeypatch.setattr(annotation_target_service, "model", TestAnnotationTarget)
+    monkeypatch.setattr(annotation_tag_service, "model", TestAnnotationTag)
+
+    # Answer the ID allocator's sequence query from counters; SQLite has no sequences
+    def mock_fetch_ids(db: Session, body_count: int, target_count: int):
+        global _body_id_counter, _target_id_counter
+        body_ids = list(range(_body_id_counter + 1, _body_id_counter + 1 + body_count))
+        target_ids = list(range(_target_id_counter + 1, _target_id_counter + 1 + target_count))
+        _body_id_counter += body_count
+        _target_id_counter += target_count
+        service.id_allocator.fetch_calls.append((body_count, target_count))
+        return body_ids, target_ids
+
+    service.id_allocator.fetch_calls = []
+    monkeypatch.setattr(service.id_allocator, "_fetch", mock_fetch_ids)
 
     original_list = service.list
 
@@ -349,6 +349,156 @@ class TestListAnnotationsEndpoint:
         assert call_kwargs[1]["skip"] == 0
         assert call_kwargs[1]["limit"] == 100
 
+class TestListAnnotationsCursor:
+    """Test keyset pagination on GET /api/v1/annotations."""
+
+    def test_next_cursor_header_on_full_page(self, client, sample_annotation_response):
+        """Should return X-Next-Cursor when the page is full."""
+        with patch(
+            'routers.annotations.annotation_service.list',
+            return_value=[sample_annotation_response]
+        ) as mock_list:
+            response = client.get(
+                "/api/v1/annotations/",
+                params={"limit": 1, "cursor": "WzFd"}
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["X-Next-Cursor"]
+        assert mock_list.call_args[1]["cursor"] == "WzFd"
+
+    def test_no_next_cursor_on_last_page(self, client, sample_annotation_response):
+        """Should omit X-Next-Cursor when fewer rows than the limit are returned."""
+        with patch(
+            'routers.annotations.annotation_service.list',
+            return_value=[sample_annotation_response]
+        ):
+            response = client.get("/api/v1/annotations/", params={"limit": 5})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert "X-Next-Cursor" not in response.headers
+
+
+class TestFastSerialization:
+    """Test the opt-in fast serialization path."""
+
+    def test_list_fast_keeps_cursor_header(self, client, sample_annotation_response):
+        """Should return the serializer's dicts and keep X-Next-Cursor."""
+        with patch(
+            'routers.annotations.annotation_service.list',
+            return_value=[sample_annotation_response]
+        ), patch(
+            'routers.annotations.annotation_serializer.annotations',
+            return_value=[{"id": 1}]
+        ) as mock_serialize:
+            response = client.get(
+                "/api/v1/annotations/", params={"limit": 1, "fast": True}
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == [{"id": 1}]
+        assert response.headers["content-type"] == "application/json"
+        assert response.headers["X-Next-Cursor"]
+        mock_serialize.assert_called_once_with([sample_annotation_response])
+
+    def test_by_motivation_fast_keeps_etag(self, client):
+        """Should carry the ETag on fast responses."""
+        with patch(
+            'routers.annotations.annotation_counter_service.element_version',
+            return_value="1.1"
+        ), patch(
+            'routers.annotations.annotation_query_service.get_by_motivation',
+            return_value={"commenting": []}
+        ):
+            response = client.get(
+                "/api/v1/annotations/by-motivation/5", params={"fast": True}
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"commenting": []}
+        assert response.headers["ETag"] == 'W/"5.1.1.None"'
+
+
+class TestStreamAnnotationEventsEndpoint:
+    """Test GET /api/v1/annotations/stream endpoint."""
+
+    def test_requires_document_or_classroom(self, client):
+        """Should return 400 when there is nothing to watch."""
+        response = client.get("/api/v1/annotations/stream")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    @pytest.mark.asyncio
+    async def test_open_stream_holds_no_connection(self, client, monkeypatch, tmp_path, User):
+        """Should return every pooled connection before streaming starts."""
+        import asyncio
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from sqlalchemy.pool import QueuePool
+        import dependencies.classroom as classroom_module
+
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'stream.db'}",
+            connect_args={"check_same_thread": False},
+            poolclass=QueuePool,
+        )
+        User.metadata.create_all(bind=engine)
+        with sessionmaker(bind=engine)() as db:
+            db.add(User(id=1, username="viewer", email="viewer@example.com"))
+            db.commit()
+
+        # A logged-in subscriber on the real dependencies, so resolving the
+        # user runs a query on this engine's pool
+        from database import get_db
+        from dependencies.classroom import get_classroom_context
+
+        monkeypatch.delitem(client.app.dependency_overrides, get_classroom_context)
+        monkeypatch.delitem(client.app.dependency_overrides, get_db)
+        monkeypatch.setattr("database.SessionLocal", sessionmaker(bind=engine))
+        monkeypatch.setattr(classroom_module, "SessionLocal", sessionmaker(bind=engine))
+        monkeypatch.setattr(classroom_module, "User", User)
+        monkeypatch.setattr(classroom_module, "get_session_user", lambda request: {"user_id": 1})
+
+        started = asyncio.Event()
+        disconnected = asyncio.Event()
+        received = []
+
+        async def receive():
+            if not received:
+                received.append(True)
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                started.set()
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": "/api/v1/annotations/stream",
+            "raw_path": b"/api/v1/annotations/stream",
+            "root_path": "",
+            "query_string": b"document_id=2",
+            "headers": [],
+            "client": ("testclient", 50000),
+            "server": ("testserver", 80),
+        }
+        stream = asyncio.create_task(client.app(scope, receive, send))
+        try:
+            await asyncio.wait_for(started.wait(), 5)
+            assert engine.pool.checkedout() == 0
+        finally:
+            disconnected.set()
+            stream.cancel()
+            await asyncio.gather(stream, return_exceptions=True)
+            engine.dispose()
+
+
 class TestGetAnnotationByIdEndpoint:
     """Test GET /api/v1/annotations/{annotation_id} endpoint."""
     
@@ -660,4 +810,249 @@ class TestRemoveTargetEndpoint:
         """Should return 422 when target_id query param is missing."""
         response = client.patch("/api/v1/annotations/remove-target/1")
         
-        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
\ No newline at end of file
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+class TestReadAnnotationsByElementsEndpoint:
+    """Test GET /api/v1/annotations/by-elements endpoint."""
+
+    def test_by_elements_success(self, client, sample_annotation_response):
+        """Should return annotations keyed by element and motivation."""
+        with patch(
+            'routers.annotations.annotation_query_service.get_by_elements',
+            return_value={1: {"commenting": [sample_annotation_response]}}
+        ) as mock_get:
+            response = client.get(
+                "/api/v1/annotations/by-elements",
+                params={"element_ids": [1, 2]}
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert list(data) == ["1"]
+        assert data["1"]["commenting"][0]["id"] == 1
+        assert mock_get.call_args[0][1] == [1, 2]
+
+    def test_by_elements_with_classroom_context(self, client_with_classroom):
+        """Should pass the classroom context to the service."""
+        with patch(
+            'routers.annotations.annotation_query_service.get_by_elements',
+            return_value={}
+        ) as mock_get:
+            response = client_with_classroom.get(
+                "/api/v1/annotations/by-elements",
+                params={"element_ids": [1]}
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert mock_get.call_args[0][2] == 1
+
+    def test_by_elements_missing_ids(self, client):
+        """Should return 422 when no element IDs are given."""
+        response = client.get("/api/v1/annotations/by-elements")
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+    def test_by_elements_too_many_ids(self, client):
+        """Should return 400 when the batch exceeds the element limit."""
+        with patch(
+            'routers.annotations.annotation_query_service.MAX_BATCH_ELEMENTS', 2
+        ):
+            response = client.get(
+                "/api/v1/annotations/by-elements",
+                params={"element_ids": [1, 2, 3]}
+            )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestConditionalElementEndpoints:
+    """Test ETag / If-None-Match on the per-element annotation endpoints."""
+
+    def test_by_motivation_sets_etag(self, client_with_classroom):
+        """Should tag the response with the element version and classroom."""
+        with patch(
+            'routers.annotations.annotation_counter_service.element_version',
+            return_value="3.7"
+        ), patch(
+            'routers.annotations.annotation_query_service.get_by_motivation',
+            return_value={}
+        ):
+            response = client_with_classroom.get("/api/v1/annotations/by-motivation/5")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["ETag"] == 'W/"5.3.7.1"'
+
+    def test_by_motivation_not_modified(self, client_with_classroom):
+        """Should answer 304 without loading annotations when the ETag matches."""
+        with patch(
+            'routers.annotations.annotation_counter_service.element_version',
+            return_value="3.7"
+        ), patch(
+            'routers.annotations.annotation_query_service.get_by_motivation'
+        ) as mock_get:
+            response = client_with_classroom.get(
+                "/api/v1/annotations/by-motivation/5",
+                headers={"If-None-Match": '"other", W/"5.3.7.1"'}
+            )
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.headers["ETag"] == 'W/"5.3.7.1"'
+        mock_get.assert_not_called()
+
+    def test_links_stale_etag_reloads(self, client):
+        """Should return fresh data when the client holds an older version."""
+        with patch(
+            'routers.annotations.annotation_counter_service.element_version',
+            return_value="4.7"
+        ), patch(
+            'routers.annotations.annotation_query_service.get_links_for_element',
+            return_value=[]
+        ) as mock_get:
+            response = client.get(
+                "/api/v1/annotations/links/5",
+                headers={"If-None-Match": 'W/"5.3.7"'}
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["ETag"] == 'W/"5.4.7"'
+        mock_get.assert_called_once()
+
+    def test_linked_text_info_not_modified(self, client):
+        """Should answer 304 for linked-text info when the ETag matches."""
+        with patch(
+            'routers.annotations.annotation_counter_service.element_version',
+            return_value="2.0"
+        ), patch(
+            'routers.annotations.annotation_query_service.get_linked_text_info'
+        ) as mock_get:
+            response = client.get(
+                "/api/v1/annotations/linked-text-info/5",
+                headers={"If-None-Match": 'W/"5.2.0"'}
+            )
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        mock_get.assert_not_called()
+
+
+class TestBulkCreateAnnotationsEndpoint:
+    """Test POST /api/v1/annotations/bulk endpoint."""
+
+    def test_bulk_create_success(self, client_with_classroom):
+        """Should pass the items and classroom to the service and return its report."""
+        report = {
+            "created": [{"index": 0, "id": 10}],
+            "errors": [{"index": 1, "detail": "body: Field required"}],
+        }
+        with patch(
+            'routers.annotations.annotation_service.bulk_create',
+            return_value=report
+        ) as mock_bulk:
+            response = client_with_classroom.post(
+                "/api/v1/annotations/bulk",
+                json={"annotations": [{"motivation": "scholarly"}, {}]}
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == report
+        assert mock_bulk.call_args[0][1] == [{"motivation": "scholarly"}, {}]
+        assert mock_bulk.call_args[0][3] == 1
+
+    def test_bulk_create_requires_list(self, client):
+        """Should return 422 when annotations is missing."""
+        response = client.post("/api/v1/annotations/bulk", json={})
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+
+class TestAnnotationAggregatesEndpoint:
+    """Test POST /api/v1/annotations/aggregates endpoint."""
+
+    def test_aggregates_success(self, client_with_classroom):
+        """Should return counts keyed by annotation ID."""
+        aggregates = {
+            1: {"reply_count": 2, "upvote_count": 5, "flag_count": 0, "upvoted": True},
+            2: {"reply_count": 0, "upvote_count": 0, "flag_count": 1, "upvoted": False},
+        }
+        with patch(
+            'routers.annotations.annotation_query_service.get_aggregates',
+            return_value=aggregates
+        ) as mock_get:
+            response = client_with_classroom.post(
+                "/api/v1/annotations/aggregates",
+                json={"annotation_ids": [1, 2]}
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["1"] == aggregates[1]
+        assert mock_get.call_args[0][1] == [1, 2]
+        assert mock_get.call_args[0][2] == 1
+
+    def test_aggregates_too_many_ids(self, client):
+        """Should return 400 when the batch exceeds the annotation limit."""
+        with patch(
+            'routers.annotations.annotation_query_service.MAX_BATCH_ANNOTATIONS', 2
+        ):
+            response = client.post(
+                "/api/v1/annotations/aggregates",
+                json={"annotation_ids": [1, 2, 3]}
+            )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestLinkGraphEndpoints:
+    """Test GET /api/v1/annotations/link-graph endpoints."""
+
+    def test_neighbours_success(self, client):
+        """Should return the linked elements of an element."""
+        neighbours = [{"element_id": 2, "document_id": 1, "annotation_ids": [5]}]
+        with patch(
+            'routers.annotations.link_graph_service.neighbours',
+            return_value=neighbours
+        ) as mock_neighbours:
+            response = client.get("/api/v1/annotations/link-graph/elements/1/neighbours")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == neighbours
+        assert mock_neighbours.call_args[0][1] == 1
+
+    def test_expand_passes_hops(self, client):
+        """Should pass the requested number of hops to the service."""
+        with patch(
+            'routers.annotations.link_graph_service.expand',
+            return_value={"element_id": 1, "hops": 3, "nodes": [], "edges": []}
+        ) as mock_expand:
+            response = client.get(
+                "/api/v1/annotations/link-graph/elements/1/expand",
+                params={"hops": 3}
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert mock_expand.call_args[0][1:] == (1, 3)
+
+    def test_expand_rejects_too_many_hops(self, client):
+        """Should return 422 when hops exceeds the maximum."""
+        response = client.get(
+            "/api/v1/annotations/link-graph/elements/1/expand",
+            params={"hops": 50}
+        )
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+    def test_document_summary_success(self, client):
+        """Should return the link summary for a document."""
+        summary = {
+            "document_id": 1,
+            "linked_element_count": 0,
+            "link_count": 0,
+            "elements": [],
+            "linked_documents": [],
+        }
+        with patch(
+            'routers.annotations.link_graph_service.document_summary',
+            return_value=summary
+        ):
+            response = client.get("/api/v1/annotations/link-graph/documents/1/summary")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == summary
@@ -719,3 +719,62 @@ class TestBatchUpdateDisplayOrderEndpoint:
         
         assert response.status_code == status.HTTP_200_OK
         mock_service.batch_update_display_order.assert_called_once()
+
+
+class TestExportCollectionAnnotationsEndpoint:
+    """Test GET /api/v1/collections/{collection_id}/annotations/export"""
+
+    @pytest.fixture
+    def export_client(self, mock_db_session):
+        """Test client with classroom and database dependencies overridden."""
+        from main import app
+        from database import get_db
+        from dependencies.classroom import get_classroom_context
+
+        app.dependency_overrides[get_db] = lambda: mock_db_session
+        app.dependency_overrides[get_classroom_context] = lambda: None
+        yield TestClient(app)
+        app.dependency_overrides.clear()
+
+    @patch("routers.document_collections.annotation_export_service.export")
+    def test_export_ndjson_streams_chunks(self, mock_export, export_client):
+        """Should stream the service's chunks as NDJSON."""
+        mock_export.return_value = iter([b'{"id": "Annotation/1"}\n', b'{"id": "Annotation/2"}\n'])
+
+        response = export_client.get(
+            "/api/v1/collections/1/annotations/export",
+            params={"motivation": "commenting", "since": "2024-01-01T00:00:00"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert "collection-1-annotations.ndjson" in response.headers["content-disposition"]
+        assert response.text.splitlines() == ['{"id": "Annotation/1"}', '{"id": "Annotation/2"}']
+        kwargs = mock_export.call_args.kwargs
+        assert kwargs["format"] == "ndjson"
+        assert kwargs["motivation"] == "commenting"
+        assert kwargs["since"] == datetime(2024, 1, 1)
+
+    @patch("routers.document_collections.annotation_export_service.export")
+    def test_export_jsonld(self, mock_export, export_client):
+        """Should use the JSON-LD media type."""
+        mock_export.return_value = iter([b"{}"])
+
+        response = export_client.get(
+            "/api/v1/collections/1/annotations/export",
+            params={"format": "jsonld"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("application/ld+json")
+
+    @patch("routers.document_collections.annotation_export_service.export")
+    def test_export_collection_not_found(self, mock_export, export_client):
+        """Should return 404 when the collection does not exist."""
+        mock_export.side_effect = HTTPException(
+            status_code=404, detail="Document collection not found"
+        )
+
+        response = export_client.get("/api/v1/collections/9999/annotations/export")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -94,6 +94,7 @@ class TestListElements:
             elem.hierarchy = {}
             elem.content = {}
         mock_service.list.return_value = mock_elements
+        mock_service.get_next_cursor.return_value = None
         
         response = client.get(
             "/api/v1/elements/",
@@ -109,6 +110,7 @@ class TestListElements:
         """Should filter by document_id."""
         mock_get_db.return_value = mock_db_session
         mock_service.list.return_value = []
+        mock_service.get_next_cursor.return_value = None
         
         response = client.get(
             "/api/v1/elements/?document_id=1",
@@ -126,6 +128,7 @@ class TestListElements:
         """Should pass content_query parameter."""
         mock_get_db.return_value = mock_db_session
         mock_service.list.return_value = []
+        mock_service.get_next_cursor.return_value = None
         
         response = client.get(
             "/api/v1/elements/?content_query=test",
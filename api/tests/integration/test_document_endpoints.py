@@ -113,6 +113,7 @@ class TestListDocuments:
         """Should list documents with default pagination."""
         mock_get_db.return_value = mock_db_session
         mock_service.list.return_value = [sample_document]
+        mock_service.get_next_cursor.return_value = None
         
         response = client.get(
             "/api/v1/documents",
@@ -129,6 +130,7 @@ class TestListDocuments:
         """Should filter documents by title."""
         mock_get_db.return_value = mock_db_session
         mock_service.list.return_value = [sample_document]
+        mock_service.get_next_cursor.return_value = None
         
         response = client.get(
             "/api/v1/documents?title=Test",
@@ -144,6 +146,7 @@ class TestListDocuments:
         """Should filter documents by collection_id."""
         mock_get_db.return_value = mock_db_session
         mock_service.list.return_value = [sample_document]
+        mock_service.get_next_cursor.return_value = None
         
         response = client.get(
             "/api/v1/documents?collection_id=1",
@@ -411,6 +414,67 @@ class TestGetDocumentsWithStats:
         assert response.status_code == 404
 
 
+class TestGetDocumentAnnotations:
+    """Test GET /{document_id}/annotations endpoint."""
+
+    @pytest.fixture
+    def annotations_client(self, mock_db_session):
+        """Test client with classroom and database dependencies overridden."""
+        from main import app
+        from database import get_db
+        from dependencies.classroom import get_classroom_context, get_current_user_optional
+
+        app.dependency_overrides[get_db] = lambda: mock_db_session
+        app.dependency_overrides[get_current_user_optional] = lambda: None
+        app.dependency_overrides[get_classroom_context] = lambda: 1
+        yield TestClient(app)
+        app.dependency_overrides.clear()
+
+    @patch('routers.documents.annotation_query_service')
+    def test_get_document_annotations_success(self, mock_service, annotations_client):
+        """Should return annotations keyed by element and motivation."""
+        mock_service.get_by_document.return_value = {}
+
+        response = annotations_client.get("/api/v1/documents/1/annotations")
+
+        assert response.status_code == 200
+        assert response.json() == {}
+        args = mock_service.get_by_document.call_args[0]
+        assert args[1:] == (1, 1)
+
+    @patch('routers.documents.annotation_query_service')
+    def test_get_document_annotations_not_found(self, mock_service, annotations_client):
+        """Should return 404 for non-existent document."""
+        from fastapi import HTTPException
+
+        mock_service.get_by_document.side_effect = HTTPException(
+            status_code=404,
+            detail="Document not found"
+        )
+
+        response = annotations_client.get("/api/v1/documents/9999/annotations")
+
+        assert response.status_code == 404
+
+    @patch('routers.documents.annotation_change_service')
+    def test_get_document_annotation_changes(self, mock_service, annotations_client):
+        """Should pass the sync token and classroom and return changes and tombstones."""
+        mock_service.get_changes.return_value = {
+            "annotations": {},
+            "deleted": [{"id": 5, "document_element_id": 2, "deleted": "2026-10-16T12:00:00"}],
+            "next_since": "token-2",
+        }
+
+        response = annotations_client.get(
+            "/api/v1/documents/1/annotations/changes", params={"since": "token-1"}
+        )
+
+        assert response.status_code == 200
+        assert response.json()["deleted"][0]["id"] == 5
+        assert response.json()["next_since"] == "token-2"
+        assert mock_service.get_changes.call_args[0][1:] == (1, 1, "token-1")
+
+
 class TestImportWordDocument:
     """Test POST /import-word-doc endpoint."""
     
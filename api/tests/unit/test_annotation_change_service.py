@@ -0,0 +1,196 @@
+# tests/unit/test_annotation_change_service.py
+import pytest
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+
+import services.annotation_query_service as query_service_module
+import services.flag_service as flag_service_module
+from schemas.annotations import AnnotationCreate, AnnotationPatch, Body, TextTarget
+
+
+@pytest.fixture
+def change_service(
+    annotation_change_service,
+    monkeypatch,
+    AnnotationModel,
+    User,
+    DocumentModel,
+    DocumentElementModel,
+):
+    """AnnotationChangeService with the query service bound to the SQLite test models."""
+    monkeypatch.setattr(query_service_module, "AnnotationModel", AnnotationModel)
+    monkeypatch.setattr(query_service_module, "User", User)
+    monkeypatch.setattr(query_service_module, "Document", DocumentModel)
+    monkeypatch.setattr(query_service_module, "DocumentElementModel", DocumentElementModel)
+    monkeypatch.setattr(annotation_change_service, "COMMIT_LAG", timedelta(0))
+    return annotation_change_service
+
+
+@pytest.fixture
+def create_annotation(annotation_service, db_session, test_user):
+    """Factory that creates an annotation through the service."""
+
+    def _create(motivation, *sources, classroom_id=None):
+        return annotation_service.create(
+            db=db_session,
+            annotation=AnnotationCreate(
+                creator_id=test_user.id,
+                motivation=motivation,
+                body=Body(type="TextualBody", value=motivation, format="text/plain", language="en"),
+                target=[TextTarget(type="TextTarget", source=s, selector=None) for s in sources],
+            ),
+            user=test_user,
+            classroom_id=classroom_id,
+        )
+
+    return _create
+
+
+def _ids(changes):
+    return sorted(
+        a.id
+        for by_motivation in changes["annotations"].values()
+        for annotations in by_motivation.values()
+        for a in annotations
+    )
+
+
+class TestGetChanges:
+    """Test delta sync of a document's annotations."""
+
+    def test_without_token_returns_everything(
+        self, change_service, db_session, test_document_with_elements, create_annotation
+    ):
+        """Should return every annotation and a token, but no tombstones."""
+        comment = create_annotation("commenting", "DocumentElements/1")
+
+        changes = change_service.get_changes(db_session, 2, None, None)
+
+        assert _ids(changes) == [comment.id]
+        assert changes["deleted"] == []
+        assert changes["next_since"]
+
+    def test_returns_only_changes_since_token(
+        self,
+        change_service,
+        annotation_service,
+        db_session,
+        test_document_with_elements,
+        create_annotation,
+    ):
+        """Should return new and modified annotations and tombstones for deletions."""
+        old = create_annotation("commenting", "DocumentElements/1")
+        doomed = create_annotation("commenting", "DocumentElements/2")
+        token = change_service.get_changes(db_session, 2, None, None)["next_since"]
+
+        reply = create_annotation("replying", f"Annotation/{old.id}")
+        annotation_service.delete(db_session, doomed.id, None)
+
+        changes = change_service.get_changes(db_session, 2, None, token)
+
+        assert _ids(changes) == [reply.id]
+        assert [(t["id"], t["document_element_id"]) for t in changes["deleted"]] == [
+            (doomed.id, 2)
+        ]
+
+    def test_removed_target_leaves_tombstone(
+        self,
+        change_service,
+        annotation_service,
+        db_session,
+        test_document_with_elements,
+        test_user,
+        create_annotation,
+    ):
+        """Should tombstone an annotation in the element thread it left."""
+        link = create_annotation("linking", "DocumentElements/1", "DocumentElements/3")
+        token = change_service.get_changes(db_session, 2, None, None)["next_since"]
+
+        annotation_service.remove_target(
+            db_session, link.id, link.target[1]["id"], test_user
+        )
+        changes = change_service.get_changes(db_session, 2, None, token)
+
+        assert list(changes["annotations"]) == [1]
+        assert [(t["id"], t["document_element_id"]) for t in changes["deleted"]] == [
+            (link.id, 3)
+        ]
+
+    def test_motivation_change_tombstones_where_hidden(
+        self,
+        change_service,
+        annotation_service,
+        db_session,
+        test_document_with_elements,
+        create_annotation,
+    ):
+        """Should tombstone an annotation for the clients an edit hides it from."""
+        note = create_annotation("scholarly", "DocumentElements/1", classroom_id=7)
+        tokens = {
+            classroom_id: change_service.get_changes(db_session, 2, classroom_id, None)[
+                "next_since"
+            ]
+            for classroom_id in (None, 7)
+        }
+
+        # Comments are only shown in their own classroom
+        annotation_service.update(
+            db_session, note.id, AnnotationPatch(motivation="commenting"), 7
+        )
+        outside = change_service.get_changes(db_session, 2, None, tokens[None])
+        inside = change_service.get_changes(db_session, 2, 7, tokens[7])
+
+        assert _ids(outside) == []
+        assert [(t["id"], t["document_element_id"]) for t in outside["deleted"]] == [
+            (note.id, 1)
+        ]
+        assert _ids(inside) == [note.id]
+        assert inside["deleted"] == []
+
+    def test_remove_comment_leaves_tombstones(
+        self,
+        change_service,
+        db_session,
+        monkeypatch,
+        test_document_with_elements,
+        admin_user,
+        test_role_admin,
+        create_annotation,
+        AnnotationModel,
+    ):
+        """Should tombstone the flagged comment and its flags."""
+        from services.flag_service import flag_service
+
+        monkeypatch.setattr(flag_service_module, "AnnotationModel", AnnotationModel)
+        admin_user.roles.append(test_role_admin)
+        db_session.commit()
+
+        comment = create_annotation("commenting", "DocumentElements/1")
+        flag = create_annotation("flagging", f"Annotation/{comment.id}")
+        token = change_service.get_changes(db_session, 2, None, None)["next_since"]
+
+        flag_service.remove_comment(db_session, flag.id, admin_user)
+        changes = change_service.get_changes(db_session, 2, None, token)
+
+        assert sorted(t["id"] for t in changes["deleted"]) == sorted([comment.id, flag.id])
+
+    def test_invalid_and_expired_tokens(
+        self, change_service, db_session, test_document_with_elements
+    ):
+        """Should reject malformed tokens and tokens older than the deletion log."""
+        with pytest.raises(HTTPException) as exc_info:
+            change_service.get_changes(db_session, 2, None, "not-a-token")
+        assert exc_info.value.status_code == 400
+
+        expired = change_service.encode_token(
+            datetime.now() - change_service.TOMBSTONE_RETENTION - timedelta(hours=1)
+        )
+        with pytest.raises(HTTPException) as exc_info:
+            change_service.get_changes(db_session, 2, None, expired)
+        assert exc_info.value.status_code == 410
+
+    def test_unknown_document(self, change_service, db_session):
+        """Should raise 404 for a missing document."""
+        with pytest.raises(HTTPException) as exc_info:
+            change_service.get_changes(db_session, 999, None, None)
+        assert exc_info.value.status_code == 404
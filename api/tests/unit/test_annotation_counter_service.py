@@ -0,0 +1,307 @@
+# tests/unit/test_annotation_counter_service.py
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from schemas.annotations import AnnotationCreate, AnnotationPatch, Body, TextTarget
+from schemas.documents import DocumentCreate
+from schemas.document_elements import DocumentElementCreate
+
+
+ELEMENT, DOCUMENT, COLLECTION = "element", "document", "collection"
+
+
+@pytest.fixture
+def create_annotation(annotation_service, db_session, test_user):
+    """Factory that creates an annotation on element 1 of document 2 through the service."""
+
+    def _create(motivation):
+        return annotation_service.create(
+            db=db_session,
+            annotation=AnnotationCreate(
+                creator_id=test_user.id,
+                motivation=motivation,
+                document_collection_id=1,
+                document_id=2,
+                document_element_id=1,
+                body=Body(type="TextualBody", value=motivation, format="text/plain", language="en"),
+                target=[TextTarget(type="TextTarget", source="DocumentElements/1", selector=None)],
+            ),
+            user=test_user,
+            classroom_id=None,
+        )
+
+    return _create
+
+
+def _counts(service, db_session, scope, scope_id):
+    return service.get_counts(db_session, scope, [scope_id])[scope_id]
+
+
+class TestAnnotationCounterSeeding:
+    """Test reading counters."""
+
+    def test_seeds_missing_rows_from_source(
+        self, annotation_counter_service, db_session, test_document_with_elements
+    ):
+        """Should count from source and store the row on first read."""
+        counts = _counts(annotation_counter_service, db_session, COLLECTION, 1)
+
+        assert counts["document_count"] == 1
+        assert counts["element_count"] == 3
+        assert db_session.get(annotation_counter_service.model, (COLLECTION, 1)) is not None
+
+    def test_reads_stored_rows(
+        self, annotation_counter_service, db_session, test_document_with_elements
+    ):
+        """Should answer from the stored row, not from source."""
+        _counts(annotation_counter_service, db_session, DOCUMENT, 2)
+        row = db_session.get(annotation_counter_service.model, (DOCUMENT, 2))
+        row.element_count = 42
+        db_session.commit()
+
+        assert _counts(annotation_counter_service, db_session, DOCUMENT, 2)["element_count"] == 42
+
+    def test_second_read_does_not_recount(
+        self, annotation_counter_service, db_session, test_document_with_elements, monkeypatch
+    ):
+        """Should store a seeded row outside the caller's session, so later reads skip the count."""
+        source_counts = []
+        count_from_source = annotation_counter_service._count_from_source
+
+        def counted(*args, **kwargs):
+            source_counts.append(args[1])
+            return count_from_source(*args, **kwargs)
+
+        monkeypatch.setattr(annotation_counter_service, "_count_from_source", counted)
+
+        caller_writes = []
+
+        def record_write(state):
+            if not state.is_select:
+                caller_writes.append(state.statement)
+
+        event.listen(db_session, "do_orm_execute", record_write)
+        try:
+            first = _counts(annotation_counter_service, db_session, DOCUMENT, 2)
+            db_session.rollback()
+            second = _counts(annotation_counter_service, db_session, DOCUMENT, 2)
+        finally:
+            event.remove(db_session, "do_orm_execute", record_write)
+
+        assert first == second
+        assert source_counts == [DOCUMENT]
+        assert caller_writes == []
+
+    def test_seeding_leaves_caller_transaction_alone(self, annotation_counter_service, tmp_path):
+        """Should seed on its own connection, never committing the caller's pending writes."""
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'counters.db'}", connect_args={"timeout": 0.1}
+        )
+        model = annotation_counter_service.model
+        model.metadata.create_all(engine)
+        zero = dict.fromkeys(annotation_counter_service.COUNT_COLUMNS, 0)
+
+        try:
+            with Session(engine) as db:
+                db.add(model(scope=DOCUMENT, scope_id=99, **zero))
+                db.flush()
+                # The caller's write lock stops the seed; counts are still answered
+                assert annotation_counter_service.get_counts(db, COLLECTION, [1]) == {1: zero}
+                db.rollback()
+
+            with Session(engine) as db:
+                annotation_counter_service.get_counts(db, COLLECTION, [2])
+                db.rollback()
+
+            with Session(engine) as db:
+                assert db.get(model, (DOCUMENT, 99)) is None
+                assert db.get(model, (COLLECTION, 1)) is None
+                assert db.get(model, (COLLECTION, 2)) is not None
+        finally:
+            engine.dispose()
+
+
+class TestAnnotationCounterMaintenance:
+    """Test counters kept current by service writes."""
+
+    def test_annotation_writes_adjust_every_scope(
+        self,
+        annotation_counter_service,
+        annotation_service,
+        db_session,
+        test_document_with_elements,
+        create_annotation,
+    ):
+        """Should count creates, motivation changes and deletes in each bucket."""
+        for scope, scope_id in ((ELEMENT, 1), (DOCUMENT, 2), (COLLECTION, 1)):
+            _counts(annotation_counter_service, db_session, scope, scope_id)
+
+        comment = create_annotation("commenting")
+        create_annotation("scholarly")
+        annotation_service.update(
+            db_session, comment.id, AnnotationPatch(motivation="highlighting"), None
+        )
+        create_annotation("linking")
+
+        for scope, scope_id in ((ELEMENT, 1), (DOCUMENT, 2), (COLLECTION, 1)):
+            counts = _counts(annotation_counter_service, db_session, scope, scope_id)
+            assert counts["scholarly_count"] == 2
+            assert counts["comment_count"] == 0
+            assert counts["annotation_count"] == 3
+
+        annotation_service.delete(db_session, comment.id, None)
+
+        counts = _counts(annotation_counter_service, db_session, DOCUMENT, 2)
+        assert counts["scholarly_count"] == 1
+        assert counts["annotation_count"] == 2
+
+    def test_element_and_document_writes(
+        self,
+        annotation_counter_service,
+        document_element_service,
+        db_session,
+        test_document_with_elements,
+        monkeypatch,
+        DocumentModel,
+        DocumentCollectionModel,
+        DocumentElementModel,
+        AnnotationModel,
+    ):
+        """Should count new elements and recompute after deletes."""
+        import services.document_service as doc_service_module
+        from services.document_service import DocumentService
+
+        monkeypatch.setattr(doc_service_module, "DocumentModel", DocumentModel)
+        monkeypatch.setattr(doc_service_module, "DocumentCollection", DocumentCollectionModel)
+        monkeypatch.setattr(doc_service_module, "DocumentElement", DocumentElementModel)
+        monkeypatch.setattr(doc_service_module, "AnnotationModel", AnnotationModel)
+        document_service = DocumentService()
+
+        _counts(annotation_counter_service, db_session, COLLECTION, 1)
+
+        document = document_service.create(
+            db_session, DocumentCreate(title="New", document_collection_id=1)
+        )
+        document_element_service.create(
+            db_session, DocumentElementCreate(document_id=document.id, content={})
+        )
+
+        counts = _counts(annotation_counter_service, db_session, DOCUMENT, document.id)
+        assert counts["element_count"] == 1
+        counts = _counts(annotation_counter_service, db_session, COLLECTION, 1)
+        assert counts["document_count"] == 2
+        assert counts["element_count"] == 4
+
+        document_service.delete(db_session, 2)
+
+        counts = _counts(annotation_counter_service, db_session, COLLECTION, 1)
+        assert counts["document_count"] == 1
+        assert counts["element_count"] == 1
+        assert db_session.get(annotation_counter_service.model, (DOCUMENT, 2)) is None
+
+
+class TestElementVersion:
+    """Test the per-element change counter behind conditional GETs."""
+
+    def test_version_changes_on_thread_writes(
+        self,
+        annotation_counter_service,
+        annotation_service,
+        db_session,
+        test_document_with_elements,
+        test_user,
+        create_annotation,
+    ):
+        """Should move when an element's annotation or a reply to it is written."""
+        initial = annotation_counter_service.element_version(db_session, 1)
+
+        comment = create_annotation("commenting")
+        after_create = annotation_counter_service.element_version(db_session, 1)
+
+        annotation_service.create(
+            db=db_session,
+            annotation=AnnotationCreate(
+                creator_id=test_user.id,
+                motivation="replying",
+                body=Body(type="TextualBody", value="reply", format="text/plain", language="en"),
+                target=[TextTarget(type="TextTarget", source=f"Annotation/{comment.id}", selector=None)],
+            ),
+            user=test_user,
+            classroom_id=None,
+        )
+        after_reply = annotation_counter_service.element_version(db_session, 1)
+
+        assert len({initial, after_create, after_reply}) == 3
+        assert annotation_counter_service.element_version(db_session, 1) == after_reply
+        assert annotation_counter_service.element_version(db_session, 2) == "0.0"
+
+    def test_version_survives_refresh(
+        self, annotation_counter_service, db_session, test_document_with_elements, create_annotation
+    ):
+        """Should keep moving change_count forward when rows are recomputed."""
+        create_annotation("commenting")
+        before = annotation_counter_service.element_version(db_session, 1)
+
+        annotation_counter_service.refresh(db_session, ELEMENT, [1])
+        after = annotation_counter_service.element_version(db_session, 1)
+
+        assert after != before
+        assert int(after.split(".")[0]) > int(before.split(".")[0])
+
+    def test_write_seeds_missing_element_row(
+        self, annotation_counter_service, db_session, test_document_with_elements, create_annotation
+    ):
+        """Should store an unseeded element's row on write so its version moves."""
+        unseeded = annotation_counter_service.element_version(db_session, 1)
+        db_session.rollback()
+
+        create_annotation("commenting")
+
+        row = db_session.get(annotation_counter_service.model, (ELEMENT, 1))
+        assert row is not None and row.change_count == 1
+        assert annotation_counter_service.element_version(db_session, 1) != unseeded
+
+
+class TestAnnotationCounterReconcile:
+    """Test repairing drift."""
+
+    def test_reconcile_repairs_drift(
+        self,
+        annotation_counter_service,
+        db_session,
+        test_document_with_elements,
+        test_user,
+        AnnotationModel,
+    ):
+        """Should fix wrong counts, insert missing rows and delete orphans."""
+        _counts(annotation_counter_service, db_session, DOCUMENT, 2)
+        db_session.add(
+            annotation_counter_service.model(
+                scope=DOCUMENT, scope_id=999, scholarly_count=0, comment_count=0,
+                annotation_count=0, element_count=0, document_count=0,
+            )
+        )
+        db_session.add(
+            AnnotationModel(
+                creator_id=test_user.id,
+                document_id=2,
+                motivation="commenting",
+                created=datetime.now(),
+                modified=datetime.now(),
+            )
+        )
+        db_session.commit()
+
+        repaired = annotation_counter_service.reconcile(db_session)
+
+        assert repaired[DOCUMENT] == 2
+        assert repaired[ELEMENT] == 3
+        assert _counts(annotation_counter_service, db_session, DOCUMENT, 2)["comment_count"] == 1
+        assert db_session.get(annotation_counter_service.model, (DOCUMENT, 999)) is None
+        assert annotation_counter_service.reconcile(db_session) == {
+            ELEMENT: 0,
+            DOCUMENT: 0,
+            COLLECTION: 0,
+        }
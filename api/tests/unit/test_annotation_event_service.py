@@ -0,0 +1,189 @@
+# tests/unit/test_annotation_event_service.py
+import pytest
+from unittest.mock import MagicMock
+
+from schemas.annotations import AnnotationCreate, Body, TextTarget
+from services.annotation_event_service import EventSubscription, PostgresEventBackend
+
+
+def _event(annotation_id, event_type="updated", classroom_id=None):
+    return {
+        "type": event_type,
+        "annotation_id": annotation_id,
+        "classroom_id": classroom_id,
+        "channels": ["document:2"],
+    }
+
+
+class TestEventSubscription:
+    """Test the per-client event queue."""
+
+    def test_coalesces_by_annotation(self):
+        """Should keep one event per annotation, created winning over later updates."""
+        subscription = EventSubscription("document:2", None, max_pending=10)
+
+        subscription.push(_event(1, "created"))
+        subscription.push(_event(1, "updated"))
+        subscription.push(_event(2, "updated"))
+        subscription.push(_event(2, "updated"))
+
+        assert [(e["annotation_id"], e["type"]) for e in subscription.drain()] == [
+            (1, "created"),
+            (2, "updated"),
+        ]
+        assert subscription.drain() == []
+
+    def test_created_then_deleted_is_dropped(self):
+        """Should not send an annotation the client never saw."""
+        subscription = EventSubscription("document:2", None, max_pending=10)
+
+        subscription.push(_event(1, "created"))
+        subscription.push(_event(1, "deleted"))
+
+        assert subscription.drain() == []
+
+    def test_overflow_becomes_resync(self):
+        """Should replace an overfull queue with a single resync event."""
+        subscription = EventSubscription("document:2", None, max_pending=2)
+
+        for annotation_id in range(5):
+            subscription.push(_event(annotation_id))
+
+        assert subscription.drain() == [{"type": "resync", "channel": "document:2"}]
+        subscription.push(_event(9))
+        assert [e["annotation_id"] for e in subscription.drain()] == [9]
+
+    def test_hides_other_classrooms(self):
+        """Should only deliver global events and those of its own classroom."""
+        subscription = EventSubscription("document:2", 5, max_pending=10)
+
+        subscription.push(_event(1, classroom_id=None))
+        subscription.push(_event(2, classroom_id=5))
+        subscription.push(_event(3, classroom_id=6))
+
+        assert [e["annotation_id"] for e in subscription.drain()] == [1, 2]
+
+
+class TestPublishing:
+    """Test events published by annotation writes."""
+
+    @pytest.fixture
+    def create_comment(self, annotation_service, db_session, test_user):
+        def _create(source, classroom_id=None):
+            return annotation_service.create(
+                db=db_session,
+                annotation=AnnotationCreate(
+                    creator_id=test_user.id,
+                    motivation="commenting",
+                    body=Body(type="TextualBody", value="Hi", format="text/plain", language="en"),
+                    target=[TextTarget(type="TextTarget", source=source, selector=None)],
+                ),
+                user=test_user,
+                classroom_id=classroom_id,
+            )
+
+        return _create
+
+    def test_create_and_delete_reach_document_channel(
+        self,
+        annotation_event_service,
+        annotation_service,
+        db_session,
+        test_document_with_elements,
+        create_comment,
+    ):
+        """Should publish to the channel of the annotated element's document."""
+        subscription = annotation_event_service.subscribe("document:2", None)
+        other = annotation_event_service.subscribe("document:99", None)
+
+        comment = create_comment("DocumentElements/1")
+        created = subscription.drain()
+        annotation_service.delete(db_session, comment.id, None)
+        deleted = subscription.drain()
+
+        assert [(e["type"], e["annotation_id"]) for e in created] == [("created", comment.id)]
+        assert created[0]["document_ids"] == [2]
+        assert created[0]["document_element_ids"] == [1]
+        assert [(e["type"], e["annotation_id"]) for e in deleted] == [("deleted", comment.id)]
+        assert other.drain() == []
+
+    def test_unsubscribed_client_gets_nothing(
+        self,
+        annotation_event_service,
+        test_document_with_elements,
+        create_comment,
+    ):
+        """Should stop delivering once a client unsubscribes."""
+        subscription = annotation_event_service.subscribe("document:2", None)
+        annotation_event_service.unsubscribe(subscription)
+
+        create_comment("DocumentElements/1")
+
+        assert subscription.drain() == []
+
+    def test_publish_failure_does_not_fail_write(
+        self,
+        annotation_event_service,
+        monkeypatch,
+        test_document_with_elements,
+        create_comment,
+    ):
+        """Should log and swallow backend errors after the write has committed."""
+        annotation_event_service.subscribe("document:2", None)
+
+        def _fail(events):
+            raise RuntimeError("backend down")
+
+        monkeypatch.setattr(annotation_event_service.backend, "publish", _fail)
+
+        assert create_comment("DocumentElements/1").id is not None
+
+
+class TestPostgresEventBackend:
+    """Test NOTIFY delivery through the writer's transaction."""
+
+    def test_stages_notify_on_writer_session(self, monkeypatch):
+        """Should NOTIFY on the writer's session, in a savepoint, without a new connection."""
+        engine = MagicMock()
+        monkeypatch.setattr("database.engine", engine)
+        db = MagicMock()
+
+        backend = PostgresEventBackend()
+        backend.stage(db, [_event(1), _event(2)])
+        backend.publish([_event(1), _event(2)])
+
+        db.begin_nested.assert_called_once()
+        assert db.execute.call_count == 2
+        assert "pg_notify" in str(db.execute.call_args.args[0])
+        engine.connect.assert_not_called()
+
+    def test_stage_failure_does_not_fail_write(
+        self,
+        annotation_event_service,
+        monkeypatch,
+        annotation_service,
+        db_session,
+        test_user,
+        test_document_with_elements,
+    ):
+        """Should log and swallow staging errors, keeping the write."""
+
+        def _fail(db, events):
+            raise RuntimeError("payload too large")
+
+        monkeypatch.setattr(annotation_event_service.backend, "stage", _fail)
+        annotation_event_service.subscribe("document:2", None)
+
+        comment = annotation_service.create(
+            db=db_session,
+            annotation=AnnotationCreate(
+                creator_id=test_user.id,
+                motivation="commenting",
+                body=Body(type="TextualBody", value="Hi", format="text/plain", language="en"),
+                target=[TextTarget(type="TextTarget", source="DocumentElements/1", selector=None)],
+            ),
+            user=test_user,
+            classroom_id=None,
+        )
+
+        assert comment.id is not None
@@ -0,0 +1,170 @@
+# tests/unit/test_annotation_export_service.py
+import json
+import pytest
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+
+import services.annotation_export_service as export_module
+from services.annotation_export_service import AnnotationExportService
+
+
+@pytest.fixture
+def export_service(
+    monkeypatch,
+    AnnotationModel,
+    User,
+    DocumentCollectionModel,
+):
+    """AnnotationExportService bound to the SQLite test models."""
+    monkeypatch.setattr(export_module, "User", User)
+    monkeypatch.setattr(export_module, "DocumentCollectionModel", DocumentCollectionModel)
+
+    service = AnnotationExportService()
+    service.model = AnnotationModel
+    return service
+
+
+@pytest.fixture
+def make_annotation(db_session, test_user, AnnotationModel):
+    """Factory that stores an annotation on a document element of a collection."""
+
+    def _make(motivation, element_id=1, classroom_id=None, modified=None, collection_id=1):
+        annotation = AnnotationModel(
+            creator_id=test_user.id,
+            classroom_id=classroom_id,
+            motivation=motivation,
+            document_collection_id=collection_id,
+            document_element_id=element_id,
+            body={"type": "TextualBody", "value": motivation, "format": "text/plain", "language": "en"},
+            target=[
+                {"id": 1, "type": "Target", "source": f"DocumentElements/{element_id}"}
+                if element_id is not None
+                else {"id": 1, "type": "Target", "source": "DocumentCollections/1"}
+            ],
+            created=datetime(2024, 1, 1),
+            modified=modified or datetime(2024, 1, 1),
+        )
+        db_session.add(annotation)
+        db_session.commit()
+        return annotation
+
+    return _make
+
+
+def _export(service, db_session, **kwargs):
+    return b"".join(service.export(db_session, 1, **kwargs)).decode("utf-8")
+
+
+class TestAnnotationExport:
+    """Test streaming annotation export."""
+
+    def test_ndjson_one_annotation_per_line(
+        self, export_service, db_session, test_document_with_elements, make_annotation
+    ):
+        """Should write each annotation as a standalone W3C annotation line."""
+        scholarly = make_annotation("scholarly")
+        comment = make_annotation("commenting", element_id=2)
+
+        lines = _export(export_service, db_session).splitlines()
+        exported = [json.loads(line) for line in lines]
+
+        assert [a["id"] for a in exported] == [
+            f"Annotation/{scholarly.id}",
+            f"Annotation/{comment.id}",
+        ]
+        assert exported[0]["@context"] == "http://www.w3.org/ns/anno.jsonld"
+        assert exported[0]["creator"]["name"] == "Test User"
+        assert exported[0]["created"] == "2024-01-01T00:00:00"
+
+    def test_jsonld_collection(
+        self, export_service, db_session, test_document_with_elements, make_annotation
+    ):
+        """Should wrap annotations in a valid AnnotationCollection document."""
+        make_annotation("scholarly")
+        make_annotation("linking", element_id=3)
+
+        document = json.loads(_export(export_service, db_session, format="jsonld"))
+
+        assert document["type"] == "AnnotationCollection"
+        assert [a["motivation"] for a in document["first"]["items"]] == [
+            "scholarly",
+            "linking",
+        ]
+
+    def test_jsonld_empty_collection(
+        self, export_service, db_session, test_document_with_elements
+    ):
+        """Should produce a valid document when nothing matches."""
+        document = json.loads(_export(export_service, db_session, format="jsonld"))
+
+        assert document["first"]["items"] == []
+
+    def test_streams_in_batches(
+        self, export_service, db_session, test_document_with_elements, make_annotation, monkeypatch
+    ):
+        """Should write one chunk per cursor batch."""
+        monkeypatch.setattr(export_service, "BATCH_SIZE", 2)
+        for _ in range(5):
+            make_annotation("scholarly")
+
+        chunks = list(export_service.export(db_session, 1))
+
+        assert [chunk.count(b"\n") for chunk in chunks] == [2, 2, 1]
+
+    def test_filters(
+        self,
+        export_service,
+        db_session,
+        test_document_with_elements,
+        test_classroom,
+        make_annotation,
+    ):
+        """Should apply motivation, classroom and since filters."""
+        global_comment = make_annotation("commenting")
+        classroom_comment = make_annotation("commenting", classroom_id=test_classroom.id)
+        recent = make_annotation("scholarly", modified=datetime(2024, 1, 1) + timedelta(days=7))
+        make_annotation("scholarly")
+
+        def ids(**kwargs):
+            return [
+                json.loads(line)["id"]
+                for line in _export(export_service, db_session, **kwargs).splitlines()
+            ]
+
+        assert ids(motivation="commenting") == [f"Annotation/{global_comment.id}"]
+        assert ids(motivation="commenting", classroom_id=test_classroom.id) == [
+            f"Annotation/{classroom_comment.id}"
+        ]
+        assert ids(since=datetime(2024, 1, 5)) == [f"Annotation/{recent.id}"]
+
+    def test_excludes_other_collections(
+        self, export_service, db_session, test_document_with_elements, make_annotation
+    ):
+        """Should only export annotations of the collection."""
+        make_annotation("scholarly", collection_id=2)
+
+        assert _export(export_service, db_session) == ""
+
+    def test_includes_annotations_without_element(
+        self, export_service, db_session, test_document_with_elements, make_annotation
+    ):
+        """Should export collection annotations that are not attached to an element."""
+        annotation = make_annotation("scholarly", element_id=None)
+
+        lines = _export(export_service, db_session, format="ndjson").splitlines()
+
+        assert [json.loads(line)["id"] for line in lines] == [f"Annotation/{annotation.id}"]
+
+    def test_invalid_format(self, export_service, db_session):
+        """Should raise 400 for an unknown format."""
+        with pytest.raises(HTTPException) as exc_info:
+            export_service.export(db_session, 1, format="csv")
+
+        assert exc_info.value.status_code == 400
+
+    def test_missing_collection(self, export_service, db_session):
+        """Should raise 404 before streaming when the collection does not exist."""
+        with pytest.raises(HTTPException) as exc_info:
+            export_service.export(db_session, 9999)
+
+        assert exc_info.value.status_code == 404
@@ -0,0 +1,410 @@
+# tests/unit/test_annotation_query_service.py
+import pytest
+from datetime import datetime
+from fastapi import HTTPException
+
+import services.annotation_query_service as query_service_module
+import services.annotation_write_service as write_service_module
+from services.annotation_query_service import AnnotationQueryService
+from services.annotation_target_service import annotation_target_service
+from schemas.annotations import AnnotationCreate, Body, TextTarget
+
+
+@pytest.fixture
+def query_service(
+    db_session,
+    monkeypatch,
+    AnnotationModel,
+    AnnotationTargetModel,
+    User,
+    DocumentModel,
+    DocumentElementModel,
+):
+    """AnnotationQueryService bound to the SQLite test models."""
+    monkeypatch.setattr(query_service_module, "AnnotationModel", AnnotationModel)
+    monkeypatch.setattr(query_service_module, "User", User)
+    monkeypatch.setattr(query_service_module, "Document", DocumentModel)
+    monkeypatch.setattr(
+        query_service_module, "DocumentElementModel", DocumentElementModel
+    )
+    monkeypatch.setattr(annotation_target_service, "model", AnnotationTargetModel)
+
+    service = AnnotationQueryService()
+    service.model = AnnotationModel
+    return service
+
+
+@pytest.fixture
+def make_annotation(db_session, test_user, query_service, AnnotationModel):
+    """Factory that stores an annotation and its target index rows."""
+
+    def _make(motivation, sources, classroom_id=None, creator=None, targets=None):
+        annotation = AnnotationModel(
+            creator_id=(creator or test_user).id,
+            classroom_id=classroom_id,
+            motivation=motivation,
+            body={"type": "TextualBody", "value": motivation, "format": "text/plain", "language": "en"},
+            target=targets
+            or [{"id": i, "type": "Target", "source": s} for i, s in enumerate(sources)],
+            created=datetime.now(),
+            modified=datetime.now(),
+        )
+        db_session.add(annotation)
+        db_session.flush()
+        annotation_target_service.sync(db_session, annotation.id, annotation.target)
+        db_session.commit()
+        return annotation
+
+    return _make
+
+
+class TestGetByMotivation:
+    """Test get_by_motivation thread resolution."""
+
+    def test_groups_element_annotations_and_replies(
+        self, query_service, db_session, make_annotation
+    ):
+        """Should return the element's annotations and their replies grouped by motivation."""
+        comment = make_annotation("commenting", ["DocumentElements/1"])
+        scholarly = make_annotation("scholarly", ["DocumentElements/1"])
+        reply = make_annotation("replying", [f"Annotation/{comment.id}"])
+        upvote = make_annotation("upvoting", [f"Annotation/{comment.id}"])
+        make_annotation("commenting", ["DocumentElements/2"])
+
+        result = query_service.get_by_motivation(db_session, 1, None)
+
+        assert {k: [a.id for a in v] for k, v in result.items()} == {
+            "commenting": [comment.id],
+            "scholarly": [scholarly.id],
+            "replying": [reply.id],
+            "upvoting": [upvote.id],
+        }
+
+    def test_respects_max_depth(self, query_service, db_session, make_annotation):
+        """Should stop following replies beyond max_depth."""
+        comment = make_annotation("commenting", ["DocumentElements/1"])
+        reply = make_annotation("replying", [f"Annotation/{comment.id}"])
+        flag_on_reply = make_annotation("flagging", [f"Annotation/{reply.id}"])
+
+        shallow = query_service.get_by_motivation(db_session, 1, None)
+        deep = query_service.get_by_motivation(db_session, 1, None, max_depth=2)
+
+        assert "flagging" not in shallow
+        assert [a.id for a in deep["flagging"]] == [flag_on_reply.id]
+
+    def test_filters_comments_by_classroom(
+        self, query_service, db_session, make_annotation, test_classroom
+    ):
+        """Should only include comments from the requested classroom scope."""
+        global_comment = make_annotation("commenting", ["DocumentElements/1"])
+        classroom_comment = make_annotation(
+            "commenting", ["DocumentElements/1"], classroom_id=test_classroom.id
+        )
+
+        global_result = query_service.get_by_motivation(db_session, 1, None)
+        classroom_result = query_service.get_by_motivation(
+            db_session, 1, test_classroom.id
+        )
+
+        assert [a.id for a in global_result["commenting"]] == [global_comment.id]
+        assert [a.id for a in classroom_result["commenting"]] == [classroom_comment.id]
+
+    def test_returns_empty_for_untargeted_element(self, query_service, db_session):
+        """Should return an empty mapping when nothing targets the element."""
+        assert query_service.get_by_motivation(db_session, 99, None) == {}
+
+
+class TestGetByElements:
+    """Test batched annotation lookup across document elements."""
+
+    def test_groups_by_element_then_motivation(
+        self, query_service, db_session, make_annotation
+    ):
+        """Should key annotations by element and then by motivation."""
+        comment_1 = make_annotation("commenting", ["DocumentElements/1"])
+        reply_1 = make_annotation("replying", [f"Annotation/{comment_1.id}"])
+        scholarly_2 = make_annotation("scholarly", ["DocumentElements/2"])
+        make_annotation("commenting", ["DocumentElements/3"])
+
+        result = query_service.get_by_elements(db_session, [1, 2], None)
+
+        assert {
+            element_id: {k: [a.id for a in v] for k, v in groups.items()}
+            for element_id, groups in result.items()
+        } == {
+            1: {"commenting": [comment_1.id], "replying": [reply_1.id]},
+            2: {"scholarly": [scholarly_2.id]},
+        }
+
+    def test_annotation_on_several_elements_listed_under_each(
+        self, query_service, db_session, make_annotation
+    ):
+        """Should list a multi-target annotation under every requested element."""
+        link = make_annotation("linking", ["DocumentElements/1", "DocumentElements/2"])
+
+        result = query_service.get_by_elements(db_session, [1, 2], None)
+
+        assert [a.id for a in result[1]["linking"]] == [link.id]
+        assert [a.id for a in result[2]["linking"]] == [link.id]
+
+    def test_classroom_filter_matches_per_element_lookup(
+        self, query_service, db_session, make_annotation, test_classroom, admin_user
+    ):
+        """Should apply the same classroom rules as get_by_motivation."""
+        member_comment = make_annotation(
+            "commenting", ["DocumentElements/1"], classroom_id=test_classroom.id
+        )
+        other_comment = make_annotation(
+            "commenting",
+            ["DocumentElements/1"],
+            classroom_id=test_classroom.id,
+            creator=admin_user,
+        )
+        make_annotation("commenting", ["DocumentElements/1"])
+        scholarly = make_annotation(
+            "scholarly", ["DocumentElements/1"], creator=admin_user
+        )
+
+        result = query_service.get_by_elements(db_session, [1], test_classroom.id)
+
+        assert [a.id for a in result[1]["commenting"]] == [
+            member_comment.id,
+            other_comment.id,
+        ]
+        assert [a.id for a in result[1]["scholarly"]] == [scholarly.id]
+
+
+class TestGetByDocument:
+    """Test document-scoped annotation lookup."""
+
+    def test_returns_annotations_for_document_elements(
+        self, query_service, db_session, make_annotation, test_document_with_elements
+    ):
+        """Should only include elements that belong to the document."""
+        comment = make_annotation("commenting", ["DocumentElements/1"])
+        scholarly = make_annotation("scholarly", ["DocumentElements/3"])
+        make_annotation("commenting", ["DocumentElements/99"])
+
+        result = query_service.get_by_document(
+            db_session, test_document_with_elements["document"].id, None
+        )
+
+        assert set(result) == {1, 3}
+        assert [a.id for a in result[1]["commenting"]] == [comment.id]
+        assert [a.id for a in result[3]["scholarly"]] == [scholarly.id]
+
+    @pytest.mark.parametrize("in_classroom", [False, True])
+    def test_matches_per_element_lookup(
+        self,
+        query_service,
+        db_session,
+        make_annotation,
+        test_document_with_elements,
+        test_classroom,
+        admin_user,
+        in_classroom,
+    ):
+        """Should return what get_by_motivation returns for each element of the document."""
+        classroom_id = test_classroom.id if in_classroom else None
+        comment = make_annotation("commenting", ["DocumentElements/1"])
+        make_annotation("replying", [f"Annotation/{comment.id}"])
+        classroom_comment = make_annotation(
+            "commenting", ["DocumentElements/1"], classroom_id=test_classroom.id
+        )
+        make_annotation(
+            "commenting",
+            ["DocumentElements/2"],
+            classroom_id=test_classroom.id,
+            creator=admin_user,
+        )
+        make_annotation("upvoting", [f"Annotation/{classroom_comment.id}"], classroom_id=classroom_id)
+        make_annotation("scholarly", ["DocumentElements/2", "DocumentElements/3"])
+        make_annotation("linking", ["DocumentElements/3"], creator=admin_user)
+
+        def ids(by_motivation):
+            return {
+                motivation: sorted(a.id for a in annotations)
+                for motivation, annotations in by_motivation.items()
+            }
+
+        batch = query_service.get_by_document(
+            db_session, test_document_with_elements["document"].id, classroom_id
+        )
+        per_element = {
+            element.id: query_service.get_by_motivation(db_session, element.id, classroom_id)
+            for element in test_document_with_elements["elements"]
+        }
+
+        assert {e: ids(groups) for e, groups in batch.items()} == {
+            e: ids(groups) for e, groups in per_element.items() if groups
+        }
+
+    def test_missing_document_raises_404(self, query_service, db_session):
+        """Should raise 404 when the document does not exist."""
+        with pytest.raises(HTTPException) as exc_info:
+            query_service.get_by_document(db_session, 9999, None)
+
+        assert exc_info.value.status_code == 404
+
+
+class TestGetAggregates:
+    """Test reply, upvote and flag counts."""
+
+    def test_counts_children_per_annotation(
+        self, query_service, db_session, make_annotation, admin_user
+    ):
+        """Should count replies, upvotes and flags and report the user's upvote."""
+        first = make_annotation("commenting", ["DocumentElements/1"])
+        second = make_annotation("commenting", ["DocumentElements/1"])
+        make_annotation("replying", [f"Annotation/{first.id}"])
+        make_annotation("replying", [f"Annotation/{first.id}"])
+        make_annotation("upvoting", [f"Annotation/{first.id}"], creator=admin_user)
+        make_annotation("upvoting", [f"Annotation/{second.id}"])
+        make_annotation("flagging", [f"Annotation/{second.id}"])
+
+        result = query_service.get_aggregates(
+            db_session, [first.id, second.id, 9999], None, user_id=admin_user.id
+        )
+
+        assert result == {
+            first.id: {"reply_count": 2, "upvote_count": 1, "flag_count": 0, "upvoted": True},
+            second.id: {"reply_count": 0, "upvote_count": 1, "flag_count": 1, "upvoted": False},
+            9999: {"reply_count": 0, "upvote_count": 0, "flag_count": 0, "upvoted": False},
+        }
+
+    def test_hides_comments_outside_classroom(
+        self, query_service, db_session, make_annotation, test_classroom
+    ):
+        """Should report zero counts for comments not visible in the context."""
+        comment = make_annotation("commenting", ["DocumentElements/1"], classroom_id=test_classroom.id)
+        make_annotation("replying", [f"Annotation/{comment.id}"], classroom_id=test_classroom.id)
+
+        assert query_service.get_aggregates(db_session, [comment.id], None)[comment.id][
+            "reply_count"
+        ] == 0
+        assert query_service.get_aggregates(db_session, [comment.id], test_classroom.id)[
+            comment.id
+        ]["reply_count"] == 1
+
+
+def _link_target(element_id, text, start=0, end=5):
+    return {
+        "id": element_id,
+        "type": "Target",
+        "source": f"DocumentElements/{element_id}",
+        "selector": {
+            "type": "TextQuoteSelector",
+            "value": text,
+            "refined_by": {"type": "TextPositionSelector", "start": start, "end": end},
+        },
+    }
+
+
+class TestGetLinkedTextInfo:
+    """Test linked-text info building and caching."""
+
+    def test_groups_linked_targets_by_document(
+        self,
+        query_service,
+        db_session,
+        make_annotation,
+        test_document,
+        test_document_with_elements,
+    ):
+        """Should list one option per linking annotation and linked document."""
+        link = make_annotation(
+            "linking",
+            [],
+            targets=[
+                _link_target(1, "source text"),
+                _link_target(2, "first"),
+                _link_target(3, "second", 2, 8),
+            ],
+        )
+
+        result = query_service.get_linked_text_info(db_session, 1)
+
+        assert result["source_element_id"] == 1
+        assert result["total_links"] == 1
+        document = result["linked_documents"][0]
+        assert document["documentId"] == test_document_with_elements["document"].id
+        assert document["documentTitle"] == "Document with Elements"
+        assert document["collectionId"] == test_document.document_collection_id
+        # Both linked elements live in the same document, so only the first is offered
+        [option] = document["linkedTextOptions"]
+        assert option["linkingAnnotationId"] == link.id
+        assert option["linkedText"] == "first"
+        assert option["targetInfo"] == {
+            "sourceURI": "DocumentElements/2",
+            "start": 0,
+            "end": 5,
+            "text": "first",
+        }
+        assert [t["sourceURI"] for t in option["allTargets"]] == [
+            "DocumentElements/1",
+            "DocumentElements/2",
+            "DocumentElements/3",
+        ]
+
+    def test_no_links(self, query_service, db_session):
+        """Should return an empty result when nothing links to the element."""
+        assert query_service.get_linked_text_info(db_session, 1) == {
+            "source_element_id": 1,
+            "linked_documents": [],
+            "total_links": 0,
+        }
+
+    def test_result_is_cached_until_invalidated(
+        self, query_service, db_session, monkeypatch
+    ):
+        """Should serve repeated requests from the cache until the element is invalidated."""
+        calls = []
+        original = query_service._build_linked_text_info
+
+        def counting_build(db, element_id):
+            calls.append(element_id)
+            return original(db, element_id)
+
+        monkeypatch.setattr(query_service, "_build_linked_text_info", counting_build)
+
+        query_service.get_linked_text_info(db_session, 1)
+        query_service.get_linked_text_info(db_session, 1)
+        query_service.invalidate_linked_text([2])
+        query_service.get_linked_text_info(db_session, 1)
+        assert calls == [1]
+
+        query_service.invalidate_linked_text([1])
+        query_service.get_linked_text_info(db_session, 1)
+        assert calls == [1, 1]
+
+    def test_linking_write_invalidates_touched_elements(
+        self,
+        query_service,
+        annotation_service,
+        db_session,
+        test_user,
+        test_document_with_elements,
+        monkeypatch,
+    ):
+        """Should drop cached results when a linking annotation on the element is created."""
+        monkeypatch.setattr(
+            write_service_module, "annotation_query_service", query_service
+        )
+        assert query_service.get_linked_text_info(db_session, 1)["total_links"] == 0
+
+        annotation_service.create(
+            db=db_session,
+            annotation=AnnotationCreate(
+                creator_id=test_user.id,
+                motivation="linking",
+                body=Body(type="TextualBody", value="link", format="text/plain", language="en"),
+                target=[
+                    TextTarget(type="TextTarget", source="DocumentElements/1", selector=None),
+                    TextTarget(type="TextTarget", source="DocumentElements/2", selector=None),
+                ],
+            ),
+            user=test_user,
+            classroom_id=None,
+        )
+
+        assert query_service.get_linked_text_info(db_session, 1)["total_links"] == 1
@@ -0,0 +1,87 @@
+# tests/unit/test_annotation_serializer.py
+import json
+from typing import Dict, List
+
+import pytest
+from pydantic import TypeAdapter
+
+from schemas.annotations import (
+    Annotation,
+    AnnotationCreate,
+    Body,
+    TextTarget,
+    ObjectTarget,
+    TextQuoteSelector,
+    TextPositionSelector,
+)
+from services.annotation_serializer import AnnotationSerializer
+
+
+@pytest.fixture
+def serializer():
+    return AnnotationSerializer()
+
+
+@pytest.fixture
+def annotations(annotation_service, db_session, admin_user, test_role_admin):
+    """Annotations covering every target shape, created through the service."""
+    admin_user.roles.append(test_role_admin)
+    db_session.commit()
+
+    body = Body(type="TextualBody", value="x", format="text/plain", language="en")
+    quote = TextQuoteSelector(value="abc", refined_by=TextPositionSelector(start=1, end=4))
+    target_lists = [
+        [TextTarget(type="TextTarget", source="DocumentElements/1", selector=quote)],
+        [ObjectTarget(type="Image", source=7)],
+        [[TextTarget(type="TextTarget", source="DocumentElements/2", selector=None),
+          TextTarget(type="TextTarget", source="DocumentElements/3", selector=quote)]],
+    ]
+    created = [
+        annotation_service.create(
+            db=db_session,
+            annotation=AnnotationCreate(
+                creator_id=admin_user.id,
+                motivation="linking",
+                body=body,
+                target=targets,
+            ),
+            user=admin_user,
+            classroom_id=None,
+        )
+        for targets in target_lists
+    ]
+    for annotation in created:
+        db_session.refresh(annotation)
+    return created
+
+
+class TestAnnotationSerializer:
+    """Test that the fast path matches the response_model path."""
+
+    def test_annotations_match_response_model(self, serializer, annotations):
+        """Should produce the same JSON as validating through List[Annotation]."""
+        adapter = TypeAdapter(List[Annotation])
+        expected = adapter.dump_python(
+            adapter.validate_python(annotations, from_attributes=True), mode="json"
+        )
+
+        assert json.loads(serializer.dumps(serializer.annotations(annotations))) == expected
+        assert expected[0]["creator"]["roles"]
+
+    def test_grouped_matches_response_model(self, serializer, annotations):
+        """Should serialize nested groupings keyed by element and motivation."""
+        grouped = {1: {"linking": annotations[:1]}, 2: {"linking": annotations[1:]}}
+        adapter = TypeAdapter(Dict[int, Dict[str, List[Annotation]]])
+        expected = adapter.dump_python(
+            adapter.validate_python(grouped, from_attributes=True), mode="json"
+        )
+
+        assert json.loads(serializer.dumps(serializer.grouped(grouped))) == json.loads(
+            json.dumps(expected)
+        )
+
+    def test_missing_creator(self, serializer, annotations):
+        """Should emit a null creator."""
+        annotations[0].creator = None
+
+        assert serializer.annotation(annotations[0])["creator"] is None
@@ -1,6 +1,8 @@
 # tests/unit/test_annotation_service.py
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from unittest.mock import MagicMock
 from fastapi import HTTPException
 
 from schemas.annotations import (
@@ -13,6 +15,7 @@ from schemas.annotations import (
     TextQuoteSelector,
     TextPositionSelector,
 )
+from services.annotation_service import AnnotationIdAllocator
 
 
 class TestAnnotationServiceInit:
@@ -93,6 +96,114 @@ class TestAnnotationServiceIDGeneration:
         assert id2 == id1 + 1
 
 
+class FakeSequenceSession:
+    """Session stand-in that answers the allocator's block query from counters."""
+
+    def __init__(self):
+        self.next_ids = {"body_count": 1, "target_count": 1}
+        self.calls = []
+        self.statements = []
+
+    def execute(self, statement, params):
+        self.calls.append(dict(params))
+        self.statements.append(str(statement))
+        blocks = []
+        for key in ("body_count", "target_count"):
+            start = self.next_ids[key]
+            self.next_ids[key] += params[key]
+            blocks.append(list(range(start, start + params[key])))
+        return MagicMock(one=MagicMock(return_value=tuple(blocks)))
+
+
+class TestAnnotationIdAllocator:
+    """Test block reservation of body and target IDs."""
+
+    def test_serves_from_block_without_query(self):
+        """Should reserve a block once and serve later IDs from memory."""
+        db = FakeSequenceSession()
+        allocator = AnnotationIdAllocator(block_size=10, schema="app")
+
+        first = allocator.reserve(db, 1, 2)
+        second = allocator.reserve(db, 3, 4)
+
+        assert first == ([1], [1, 2])
+        assert second == ([2, 3, 4], [3, 4, 5, 6])
+        assert db.calls == [{"body_count": 11, "target_count": 12}]
+
+    def test_refills_only_short_pool(self):
+        """Should request the shortfall plus a block, and nothing for a full pool."""
+        db = FakeSequenceSession()
+        allocator = AnnotationIdAllocator(block_size=5, schema="app")
+
+        allocator.reserve(db, 1, 1)
+        body_ids, target_ids = allocator.reserve(db, 10, 1)
+
+        assert body_ids == list(range(2, 12))
+        assert target_ids == [2]
+        assert db.calls[1] == {"body_count": 10, "target_count": 0}
+
+    def test_concurrent_reservations_are_unique(self):
+        """Should never hand the same ID to two threads."""
+        db = FakeSequenceSession()
+        allocator = AnnotationIdAllocator(block_size=7, schema="app")
+
+        def take(_):
+            return allocator.reserve(db, 1, 2)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(take, range(200)))
+
+        body_ids = [i for body, _ in results for i in body]
+        target_ids = [i for _, targets in results for i in targets]
+        assert len(set(body_ids)) == 200
+        assert len(set(target_ids)) == 400
+
+    def test_reads_schema_on_first_reservation(self, monkeypatch):
+        """Should take DB_SCHEMA when the first block is reserved, not at construction."""
+        monkeypatch.delenv("DB_SCHEMA", raising=False)
+        db = FakeSequenceSession()
+        allocator = AnnotationIdAllocator(block_size=1)
+
+        monkeypatch.setenv("DB_SCHEMA", "tenant")
+        allocator.reserve(db, 1, 1)
+
+        assert "tenant.annotation_body_id_seq" in db.statements[0]
+        assert "tenant.annotation_target_id_seq" in db.statements[0]
+
+    def test_missing_schema_fails(self, monkeypatch):
+        """Should refuse to query sequences in an unknown schema."""
+        monkeypatch.delenv("DB_SCHEMA", raising=False)
+        allocator = AnnotationIdAllocator(block_size=1)
+
+        with pytest.raises(RuntimeError):
+            allocator.reserve(FakeSequenceSession(), 1, 0)
+
+    def test_create_takes_ids_from_allocator(self, annotation_service, db_session, test_user):
+        """Should serve consecutive creates from one reserved block."""
+        created = [
+            annotation_service.create(
+                db=db_session,
+                annotation=AnnotationCreate(
+                    creator_id=test_user.id,
+                    motivation="commenting",
+                    body=Body(type="TextualBody", value="note", format="text/plain", language="en"),
+                    target=[TextTarget(type="TextTarget", source="DocumentElements/1", selector=None)],
+                ),
+                user=test_user,
+                classroom_id=None,
+            )
+            for _ in range(3)
+        ]
+
+        block_size = annotation_service.id_allocator.block_size
+        assert annotation_service.id_allocator.fetch_calls == [
+            (1 + block_size, 0),
+            (0, 1 + block_size),
+        ]
+        assert [a.body["id"] for a in created] == [1, 2, 3]
+        assert [a.target[0]["id"] for a in created] == [1, 2, 3]
+
+
 class TestAnnotationServiceCreate:
     """Test annotation creation."""
 
@@ -270,6 +381,116 @@ class TestAnnotationServiceCreate:
         assert result.classroom_id == test_classroom.id
 
 
+class TestAnnotationServiceBulkCreate:
+    """Test bulk annotation creation."""
+
+    @pytest.fixture
+    def bulk_references(
+        self, monkeypatch, DocumentCollectionModel, DocumentModel, DocumentElementModel
+    ):
+        import services.annotation_service as annotation_service_module
+
+        monkeypatch.setattr(annotation_service_module, "DocumentCollection", DocumentCollectionModel)
+        monkeypatch.setattr(annotation_service_module, "Document", DocumentModel)
+        monkeypatch.setattr(annotation_service_module, "DocumentElementModel", DocumentElementModel)
+
+    @pytest.fixture
+    def bulk_service(self, annotation_service, monkeypatch, bulk_references):
+        calls = []
+
+        def reserve_ids(db, body_count, target_count):
+            calls.append((body_count, target_count))
+            return list(range(100, 100 + body_count)), list(range(500, 500 + target_count))
+
+        monkeypatch.setattr(annotation_service, "reserve_ids", reserve_ids)
+        annotation_service.reserve_calls = calls
+        return annotation_service
+
+    def _item(self, element_id=1, targets=1, **overrides):
+        item = {
+            "creator_id": 1,
+            "document_element_id": element_id,
+            "motivation": "scholarly",
+            "body": {"type": "TextualBody", "value": "note", "format": "text/plain", "language": "en"},
+            "target": [
+                {"type": "TextTarget", "source": f"DocumentElements/{element_id}", "selector": None}
+                for _ in range(targets)
+            ],
+        }
+        item.update(overrides)
+        return item
+
+    def test_bulk_create_inserts_valid_items(
+        self, bulk_service, db_session, test_user, test_document_with_elements, AnnotationTargetModel
+    ):
+        """Should insert every valid item with IDs from one reservation."""
+        result = bulk_service.bulk_create(
+            db_session, [self._item(1), self._item(2, targets=2)], test_user, None
+        )
+
+        assert result["errors"] == []
+        assert [item["index"] for item in result["created"]] == [0, 1]
+        assert bulk_service.reserve_calls == [(2, 3)]
+
+        second = bulk_service.get_by_id(db_session, result["created"][1]["id"], None)
+        assert second.body["id"] == 101
+        assert [t["id"] for t in second.target] == [501, 502]
+        assert second.creator_id == test_user.id
+        assert db_session.query(AnnotationTargetModel).count() == 3
+
+    def test_bulk_create_takes_ids_from_allocator(
+        self,
+        annotation_service,
+        bulk_references,
+        db_session,
+        test_user,
+        test_document_with_elements,
+    ):
+        """Should reserve the whole batch's IDs from the allocator in one sequence query."""
+        result = annotation_service.bulk_create(
+            db_session, [self._item(1), self._item(2, targets=2)], test_user, None
+        )
+
+        block_size = annotation_service.id_allocator.block_size
+        assert annotation_service.id_allocator.fetch_calls == [(2 + block_size, 3 + block_size)]
+
+        created = [
+            annotation_service.get_by_id(db_session, item["id"], None) for item in result["created"]
+        ]
+        assert [a.body["id"] for a in created] == [1, 2]
+        assert [t["id"] for a in created for t in a.target] == [1, 2, 3]
+
+    def test_bulk_create_reports_item_errors(
+        self, bulk_service, db_session, test_user, test_document_with_elements
+    ):
+        """Should report invalid and dangling items by index and create the rest."""
+        result = bulk_service.bulk_create(
+            db_session,
+            [
+                self._item(1),
+                self._item(1, body="not a body"),
+                self._item(99),
+                self._item(1, target=[]),
+            ],
+            test_user,
+            None,
+        )
+
+        assert [item["index"] for item in result["created"]] == [0]
+        assert [error["index"] for error in result["errors"]] == [1, 2, 3]
+        assert result["errors"][0]["detail"].startswith("body")
+        assert result["errors"][1]["detail"] == "Not found: document_element_id"
+
+    def test_bulk_create_too_many_items(self, bulk_service, db_session, test_user, monkeypatch):
+        """Should raise 400 when the batch exceeds the limit."""
+        monkeypatch.setattr(bulk_service, "MAX_BULK_ANNOTATIONS", 1)
+
+        with pytest.raises(HTTPException) as exc_info:
+            bulk_service.bulk_create(db_session, [self._item(), self._item()], test_user, None)
+
+        assert exc_info.value.status_code == 400
+
+
 class TestAnnotationServiceGetById:
     """Test get_by_id method."""
 
@@ -387,6 +608,83 @@ class TestAnnotationServiceList:
         assert len(result) <= 100  # Default limit
 
 
+class TestAnnotationServiceListUnpatched:
+    """Test cursor pagination and classroom filtering of the unpatched list method."""
+
+    @pytest.fixture
+    def list_service(self, monkeypatch, AnnotationModel, Group):
+        import services.annotation_service as annotation_service_module
+        from services.annotation_service import AnnotationService
+
+        monkeypatch.setattr(annotation_service_module, "AnnotationModel", AnnotationModel)
+        monkeypatch.setattr(
+            annotation_service_module, "group_members", Group.members.property.secondary
+        )
+
+        service = AnnotationService()
+        service.model = AnnotationModel
+        return service
+
+    def test_cursor_pages_by_id(
+        self, list_service, db_session, multiple_test_annotations
+    ):
+        """Should return every annotation exactly once, in id order."""
+        seen = []
+        cursor = None
+        while True:
+            page = list_service.list(
+                db=db_session, classroom_id=None, limit=2, cursor=cursor
+            )
+            seen.extend(a.id for a in page)
+            cursor = list_service.get_next_cursor(page, 2)
+            if cursor is None:
+                break
+
+        everything = list_service.list(db=db_session, classroom_id=None)
+        assert seen == sorted(a.id for a in everything)
+
+    def test_cursor_ignores_skip(
+        self, list_service, db_session, multiple_test_annotations
+    ):
+        """Should continue after the cursor regardless of skip."""
+        first = list_service.list(db=db_session, classroom_id=None, limit=1)
+        cursor = list_service.encode_cursor(first[0].id)
+
+        result = list_service.list(
+            db=db_session, classroom_id=None, skip=50, cursor=cursor
+        )
+
+        assert result and all(a.id > first[0].id for a in result)
+
+    def test_classroom_comments_limited_to_members(
+        self, list_service, db_session, test_classroom, test_user, AnnotationModel, User
+    ):
+        """Should only return classroom comments written by classroom members."""
+        outsider = User(id=50, username="outsider", first_name="Out", last_name="Sider")
+        db_session.add(outsider)
+        db_session.commit()
+
+        comments = {}
+        for creator in (test_user, outsider):
+            comments[creator.id] = AnnotationModel(
+                creator_id=creator.id,
+                classroom_id=test_classroom.id,
+                motivation="commenting",
+                body={"type": "TextualBody", "value": "c", "format": "text/plain", "language": "en"},
+                target=[{"id": 1, "type": "Target", "source": "DocumentElements/1"}],
+                created=datetime.now(),
+                modified=datetime.now(),
+            )
+            db_session.add(comments[creator.id])
+        db_session.commit()
+
+        result = list_service.list(
+            db=db_session, motivation="commenting", classroom_id=test_classroom.id
+        )
+
+        assert [a.id for a in result] == [comments[test_user.id].id]
+
+
 class TestAnnotationServiceUpdate:
     """Test update method."""
 
@@ -904,3 +1202,168 @@ class TestAnnotationServiceRemoveTarget:
         )
 
         assert result is not None
+
+
+class TestAnnotationServiceTargetIndex:
+    """Test that writes keep the annotation_targets index in sync."""
+
+    def _index_rows(self, db_session, AnnotationTargetModel, annotation_id):
+        return (
+            db_session.query(AnnotationTargetModel)
+            .filter(AnnotationTargetModel.annotation_id == annotation_id)
+            .all()
+        )
+
+    def test_create_indexes_targets(
+        self, annotation_service, db_session, test_user, AnnotationTargetModel
+    ):
+        """Should write one index row per indexable target."""
+        annotation_data = AnnotationCreate(
+            document_collection_id=1,
+            document_id=1,
+            document_element_id=7,
+            creator_id=test_user.id,
+            type="Annotation",
+            motivation="commenting",
+            body=Body(
+                type="TextualBody", value="Test", format="text/plain", language="en"
+            ),
+            target=[
+                TextTarget(
+                    type="TextTarget",
+                    source="DocumentElements/7",
+                    selector=TextQuoteSelector(
+                        value="abc",
+                        refined_by=TextPositionSelector(start=3, end=6),
+                    ),
+                ),
+                TextTarget(type="TextTarget", source="doc/1", selector=None),
+            ],
+        )
+
+        result = annotation_service.create(
+            db=db_session, annotation=annotation_data, user=test_user, classroom_id=None
+        )
+
+        rows = self._index_rows(db_session, AnnotationTargetModel, result.id)
+        assert len(rows) == 1
+        assert rows[0].source_kind == "DocumentElements"
+        assert rows[0].source_id == 7
+        assert rows[0].start == 3
+        assert rows[0].end == 6
+        assert rows[0].target_id == result.target[0]["id"]
+
+    def test_add_target_indexes_new_targets(
+        self,
+        annotation_service,
+        db_session,
+        annotation_with_multiple_targets,
+        test_user,
+        AnnotationTargetModel,
+    ):
+        """Should index targets added to an existing annotation."""
+        payload = AnnotationAddTarget(
+            target=[
+                TextTarget(type="TextTarget", source="DocumentElements/2", selector=None),
+                TextTarget(type="TextTarget", source="DocumentElements/3", selector=None),
+            ]
+        )
+
+        annotation_service.add_target(
+            db=db_session,
+            annotation_id=annotation_with_multiple_targets.id,
+            payload=payload,
+            user=test_user,
+        )
+
+        rows = self._index_rows(
+            db_session, AnnotationTargetModel, annotation_with_multiple_targets.id
+        )
+        assert sorted(row.source_id for row in rows) == [2, 3]
+
+    def test_remove_target_drops_index_row(
+        self,
+        annotation_service,
+        db_session,
+        test_user,
+        AnnotationTargetModel,
+    ):
+        """Should drop the index row of a removed target."""
+        annotation_data = AnnotationCreate(
+            creator_id=test_user.id,
+            motivation="linking",
+            body=Body(
+                type="TextualBody", value="Link", format="text/plain", language="en"
+            ),
+            target=[
+                TextTarget(type="TextTarget", source="DocumentElements/1", selector=None),
+                TextTarget(type="TextTarget", source="DocumentElements/2", selector=None),
+            ],
+        )
+        created = annotation_service.create(
+            db=db_session, annotation=annotation_data, user=test_user, classroom_id=None
+        )
+
+        annotation_service.remove_target(
+            db=db_session,
+            annotation_id=created.id,
+            target_id=created.target[0]["id"],
+            user=test_user,
+        )
+
+        rows = self._index_rows(db_session, AnnotationTargetModel, created.id)
+        assert [row.source_id for row in rows] == [2]
+        assert created.target_element_id == 2
+
+    def test_create_sets_primary_target_columns(
+        self, annotation_service, db_session, test_user
+    ):
+        """Should denormalize the first target's element or annotation ID."""
+        body = Body(type="TextualBody", value="x", format="text/plain", language="en")
+        comment = annotation_service.create(
+            db=db_session,
+            annotation=AnnotationCreate(
+                creator_id=test_user.id,
+                motivation="commenting",
+                body=body,
+                target=[TextTarget(type="TextTarget", source="/DocumentElements/4", selector=None)],
+            ),
+            user=test_user,
+            classroom_id=None,
+        )
+        flag = annotation_service.create(
+            db=db_session,
+            annotation=AnnotationCreate(
+                creator_id=test_user.id,
+                motivation="flagging",
+                body=body,
+                target=[TextTarget(type="TextTarget", source=f"Annotation/{comment.id}", selector=None)],
+            ),
+            user=test_user,
+            classroom_id=None,
+        )
+
+        assert (comment.target_element_id, comment.target_annotation_id) == (4, None)
+        assert (flag.target_element_id, flag.target_annotation_id) == (None, comment.id)
+
+    def test_delete_clears_index_rows(
+        self, annotation_service, db_session, test_user, AnnotationTargetModel
+    ):
+        """Should remove index rows along with the annotation."""
+        annotation_data = AnnotationCreate(
+            creator_id=test_user.id,
+            motivation="commenting",
+            body=Body(
+                type="TextualBody", value="Test", format="text/plain", language="en"
+            ),
+            target=[
+                TextTarget(type="TextTarget", source="DocumentElements/1", selector=None)
+            ],
+        )
+        created = annotation_service.create(
+            db=db_session, annotation=annotation_data, user=test_user, classroom_id=None
+        )
+
+        annotation_service.delete(db=db_session, annotation_id=created.id, classroom_id=None)
+
+        assert self._index_rows(db_session, AnnotationTargetModel, created.id) == []
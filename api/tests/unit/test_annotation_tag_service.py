@@ -0,0 +1,137 @@
+# tests/unit/test_annotation_tag_service.py
+import pytest
+from fastapi import HTTPException
+
+import services.annotation_tag_service as tag_service_module
+from schemas.annotations import AnnotationCreate, AnnotationPatch, Body, TextTarget
+
+
+@pytest.fixture
+def annotation_tag_service(annotation_service, monkeypatch, DocumentCollectionModel):
+    """AnnotationTagService bound to the SQLite test models."""
+    from services.annotation_tag_service import annotation_tag_service
+
+    monkeypatch.setattr(tag_service_module, "DocumentCollection", DocumentCollectionModel)
+    return annotation_tag_service
+
+
+@pytest.fixture
+def create_annotation(annotation_service, db_session, test_user, test_document_with_elements):
+    """Factory that creates an annotation in document 2's collection."""
+    collection_id = test_document_with_elements["document"].document_collection_id
+
+    def _create(motivation, value, *sources):
+        return annotation_service.create(
+            db=db_session,
+            annotation=AnnotationCreate(
+                creator_id=test_user.id,
+                document_collection_id=collection_id,
+                motivation=motivation,
+                body=Body(type="TextualBody", value=value, format="text/plain", language="en"),
+                target=[
+                    TextTarget(type="TextTarget", source=source, selector=None)
+                    for source in sources
+                ],
+            ),
+            user=test_user,
+            classroom_id=None,
+        )
+
+    return _create
+
+
+def _tags(db_session, AnnotationTagModel):
+    return sorted(
+        (row.tag, row.source_kind, row.source_id)
+        for row in db_session.query(AnnotationTagModel).all()
+    )
+
+
+class TestNormalize:
+    """Test tag normalization."""
+
+    def test_normalize(self, annotation_tag_service):
+        """Should trim, collapse whitespace and lower-case, dropping empty tags."""
+        assert annotation_tag_service.normalize("  Tale of\n Genji ") == "tale of genji"
+        assert annotation_tag_service.normalize("   ") is None
+        assert annotation_tag_service.normalize(None) is None
+        assert annotation_tag_service.normalize_all(["Poem", "poem ", "", "Exile"]) == [
+            "exile",
+            "poem",
+        ]
+
+    def test_normalize_tabs_and_newlines(self, annotation_tag_service):
+        """Should treat leading, trailing and inner tabs and newlines as spaces."""
+        assert annotation_tag_service.normalize("\tPoem\n") == "poem"
+        assert annotation_tag_service.normalize("\n\tTale\tof\r\nGenji \t") == "tale of genji"
+        assert annotation_tag_service.normalize("\t\n") is None
+
+
+class TestTagIndex:
+    """Test that tag rows follow tagging annotation writes."""
+
+    def test_create_indexes_each_target(
+        self, annotation_tag_service, db_session, AnnotationTagModel, create_annotation
+    ):
+        """Should write one row per tagged object, and none for other motivations."""
+        create_annotation("tagging", " Poem ", "DocumentElements/1", "DocumentElements/2")
+        create_annotation("commenting", "poem", "DocumentElements/1")
+
+        assert _tags(db_session, AnnotationTagModel) == [
+            ("poem", "DocumentElements", 1),
+            ("poem", "DocumentElements", 2),
+        ]
+
+    def test_update_and_delete(
+        self,
+        annotation_tag_service,
+        annotation_service,
+        db_session,
+        AnnotationTagModel,
+        create_annotation,
+    ):
+        """Should retag on body edits, drop rows when no longer tagging, and on delete."""
+        tag = create_annotation("tagging", "poem", "DocumentElements/1")
+
+        annotation_service.update(db_session, tag.id, AnnotationPatch(body="Exile"), None)
+        assert _tags(db_session, AnnotationTagModel) == [("exile", "DocumentElements", 1)]
+
+        annotation_service.update(
+            db_session, tag.id, AnnotationPatch(motivation="commenting"), None
+        )
+        assert _tags(db_session, AnnotationTagModel) == []
+
+        annotation_service.update(db_session, tag.id, AnnotationPatch(motivation="tagging"), None)
+        annotation_service.delete(db_session, tag.id, None)
+        assert _tags(db_session, AnnotationTagModel) == []
+
+
+class TestTagCloud:
+    """Test per-collection tag clouds."""
+
+    def test_counts_tag_applications(
+        self, annotation_tag_service, db_session, create_annotation, test_document_with_elements
+    ):
+        """Should count each tagged object, most used first, ties by tag."""
+        create_annotation("tagging", "Poem", "DocumentElements/1", "DocumentElements/2")
+        create_annotation("tagging", "poem", "DocumentElements/3")
+        create_annotation("tagging", "exile", "DocumentElements/1")
+        create_annotation("tagging", "court", "DocumentElements/2")
+        collection_id = test_document_with_elements["document"].document_collection_id
+
+        cloud = annotation_tag_service.tag_cloud(db_session, collection_id)
+        limited = annotation_tag_service.tag_cloud(db_session, collection_id, limit=2)
+
+        assert cloud == [
+            {"tag": "poem", "count": 3},
+            {"tag": "court", "count": 1},
+            {"tag": "exile", "count": 1},
+        ]
+        assert limited == cloud[:2]
+
+    def test_missing_collection(self, annotation_tag_service, db_session):
+        """Should return 404 for an unknown collection."""
+        with pytest.raises(HTTPException) as exc_info:
+            annotation_tag_service.tag_cloud(db_session, 999)
+
+        assert exc_info.value.status_code == 404
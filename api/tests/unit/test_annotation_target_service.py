@@ -0,0 +1,173 @@
+# tests/unit/test_annotation_target_service.py
+import pytest
+
+from services.annotation_target_service import AnnotationTargetService
+
+
+@pytest.fixture
+def target_service(AnnotationTargetModel):
+    """AnnotationTargetService bound to the SQLite test model."""
+    service = AnnotationTargetService()
+    service.model = AnnotationTargetModel
+    return service
+
+
+class TestParseSource:
+    """Test parse_source helper."""
+
+    def test_parse_document_element_source(self, target_service):
+        """Should split element sources into kind and id."""
+        assert target_service.parse_source("DocumentElements/12") == (
+            "DocumentElements",
+            12,
+        )
+
+    def test_parse_source_with_leading_slash(self, target_service):
+        """Should accept the '/DocumentElements/N' form used by the client."""
+        assert target_service.parse_source("/DocumentElements/5") == (
+            "DocumentElements",
+            5,
+        )
+
+    def test_parse_annotation_source(self, target_service):
+        """Should split annotation sources into kind and id."""
+        assert target_service.parse_source("Annotation/3") == ("Annotation", 3)
+
+    @pytest.mark.parametrize(
+        "source",
+        [
+            None,
+            42,
+            "",
+            "doc",
+            "doc/abc",
+            "a/b/c",
+            "DocumentElements/",
+            "Annotation/+5",
+            "Annotation/-5",
+            "DocumentElements/1_000",
+            "DocumentElements/ 7",
+            " DocumentElements/7",
+            "DocumentElements/7\n",
+            "DocumentElements/\u0667",
+            "DocumentElements/2147483648",
+            "Documents/7",
+        ],
+    )
+    def test_parse_invalid_source_returns_none(self, target_service, source):
+        """Should return None for sources that cannot be indexed."""
+        assert target_service.parse_source(source) is None
+
+    def test_parse_source_bounds(self, target_service):
+        """Should accept IDs up to the int4 maximum and leading zeros, like the backfill."""
+        assert target_service.parse_source("Annotation/2147483647") == (
+            "Annotation",
+            2147483647,
+        )
+        assert target_service.parse_source("DocumentElements/007") == ("DocumentElements", 7)
+
+
+class TestBuildRows:
+    """Test build_rows helper."""
+
+    def test_build_rows_flattens_nested_targets(self, target_service):
+        """Should index nested target lists one level deep."""
+        targets = [
+            {"id": 1, "source": "DocumentElements/1"},
+            [
+                {"id": 2, "source": "DocumentElements/2"},
+                {"id": 3, "source": "Annotation/9"},
+            ],
+        ]
+
+        rows = target_service.build_rows(10, targets)
+
+        assert [(r.target_id, r.source_kind, r.source_id) for r in rows] == [
+            (1, "DocumentElements", 1),
+            (2, "DocumentElements", 2),
+            (3, "Annotation", 9),
+        ]
+        assert all(r.annotation_id == 10 for r in rows)
+
+    def test_build_rows_reads_selector_offsets(self, target_service):
+        """Should copy the refined_by offsets."""
+        targets = [
+            {
+                "id": 1,
+                "source": "DocumentElements/1",
+                "selector": {"value": "x", "refined_by": {"start": 4, "end": 9}},
+            }
+        ]
+
+        row = target_service.build_rows(1, targets)[0]
+
+        assert row.start == 4
+        assert row.end == 9
+
+    def test_build_rows_skips_unindexable_targets(self, target_service):
+        """Should skip targets without a parsable source."""
+        assert target_service.build_rows(1, [{"id": 1, "source": "doc/1"}]) == []
+        assert target_service.build_rows(1, None) == []
+
+
+class TestPrimaryIds:
+    """Test primary_ids helper."""
+
+    def test_primary_ids_uses_first_target(self, target_service):
+        """Should take the first target, looking into nested lists."""
+        assert target_service.primary_ids(
+            [[{"source": "Annotation/9"}], {"source": "DocumentElements/1"}]
+        ) == {"target_element_id": None, "target_annotation_id": 9}
+
+    @pytest.mark.parametrize(
+        "targets",
+        [
+            None,
+            [],
+            [{"source": "doc/1"}],
+            [{"source": "Annotation/+9"}],
+            [{"source": "DocumentElements/2147483648"}],
+        ],
+    )
+    def test_primary_ids_without_indexable_target(self, target_service, targets):
+        """Should leave both columns empty."""
+        assert target_service.primary_ids(targets) == {
+            "target_element_id": None,
+            "target_annotation_id": None,
+        }
+
+
+class TestSync:
+    """Test index maintenance against the database."""
+
+    def test_sync_replaces_existing_rows(
+        self, target_service, db_session, test_annotation, AnnotationTargetModel
+    ):
+        """Should replace previously indexed rows for the annotation."""
+        target_service.sync(
+            db_session, test_annotation.id, [{"id": 1, "source": "DocumentElements/1"}]
+        )
+        db_session.commit()
+
+        target_service.sync(
+            db_session, test_annotation.id, [{"id": 2, "source": "DocumentElements/2"}]
+        )
+        db_session.commit()
+
+        rows = db_session.query(AnnotationTargetModel).all()
+        assert [(r.target_id, r.source_id) for r in rows] == [(2, 2)]
+
+    def test_annotation_ids_for_element(
+        self, target_service, db_session, test_annotation
+    ):
+        """Should select annotations that target an element."""
+        target_service.sync(
+            db_session, test_annotation.id, [{"id": 1, "source": "DocumentElements/4"}]
+        )
+        db_session.commit()
+
+        hits = db_session.execute(target_service.annotation_ids_for_element(4)).scalars().all()
+        misses = db_session.execute(target_service.annotation_ids_for_element(5)).scalars().all()
+
+        assert hits == [test_annotation.id]
+        assert misses == []
@@ -199,6 +199,26 @@ class TestList:
         
         assert len(result) == 1
     
+    def test_list_cursor_follows_element_order(self, db_session, test_document, document_element_service):
+        """Should page by (element_order, id), keeping unordered elements last."""
+        from conftest import TestDocumentElement
+        
+        elements = [
+            TestDocumentElement(document_id=test_document.id, hierarchy={"element_order": order})
+            for order in (3, 1, None, 2)
+        ]
+        db_session.add_all(elements)
+        db_session.commit()
+        
+        first = document_element_service.list(db_session, document_id=test_document.id, limit=2)
+        cursor = document_element_service.get_next_cursor(first, 2)
+        second = document_element_service.list(
+            db_session, document_id=test_document.id, limit=2, cursor=cursor
+        )
+        
+        assert [e.hierarchy["element_order"] for e in first + second] == [1, 2, 3, None]
+        assert document_element_service.get_next_cursor(second, 3) is None
+    
     def test_list_with_content_query(self, db_session, test_document, document_element_service):
         """Should filter by content query."""
         from conftest import TestDocumentElement
@@ -454,6 +474,17 @@ class TestDeleteAllByDocument:
         remaining = db_session.query(TestDocumentElement).filter_by(document_id=document.id).all()
         assert len(remaining) == 0
     
+    def test_delete_all_invalidates_link_caches(self, db_session, test_document_with_elements, document_element_service):
+        """Should drop the link graph and linked-text caches, like deleting one element."""
+        document = test_document_with_elements["document"]
+        
+        with patch("services.document_element_service.link_graph_service") as graph, \
+                patch("services.document_element_service.annotation_query_service") as queries:
+            document_element_service.delete_all_by_document(db_session, document.id, force=True)
+        
+        graph.invalidate.assert_called_once_with()
+        queries.invalidate_linked_text.assert_called_once_with()
+    
     def test_delete_all_document_not_found(self, db_session, document_element_service):
         """Should raise 404 when document not found."""
         with pytest.raises(HTTPException) as exc_info:
@@ -597,6 +597,49 @@ class TestList:
         assert len(result) >= 1
         assert all(doc.document_collection_id == test_document.document_collection_id for doc in result)
 
+    def test_list_documents_cursor_pages(
+        self, db_session, test_document, test_document_with_elements, monkeypatch
+    ):
+        """Should page through documents by cursor without gaps or repeats."""
+        TestDocument = type(test_document)
+        
+        import services.document_service as doc_service_module
+        monkeypatch.setattr(doc_service_module, 'DocumentModel', TestDocument)
+        
+        for i in range(3):
+            db_session.add(TestDocument(
+                title=f"Paged {i}",
+                document_collection_id=test_document.document_collection_id
+            ))
+        db_session.commit()
+        
+        service = DocumentService()
+        seen = []
+        cursor = None
+        while True:
+            page = service.list(db_session, limit=2, cursor=cursor)
+            seen.extend(doc.id for doc in page)
+            cursor = service.get_next_cursor(page, 2)
+            if cursor is None:
+                break
+        
+        all_ids = [doc.id for doc in db_session.query(TestDocument).all()]
+        assert seen == sorted(all_ids)
+
+    def test_list_documents_invalid_cursor(self, db_session, test_document, monkeypatch):
+        """Should raise 400 for a malformed cursor."""
+        TestDocument = type(test_document)
+        
+        import services.document_service as doc_service_module
+        monkeypatch.setattr(doc_service_module, 'DocumentModel', TestDocument)
+        
+        service = DocumentService()
+        
+        with pytest.raises(HTTPException) as exc_info:
+            service.list(db_session, cursor="not-a-cursor")
+        
+        assert exc_info.value.status_code == 400
+
 
 class TestUpdate:
     """Test update method."""
@@ -0,0 +1,304 @@
+# tests/unit/test_flag_service.py
+import pytest
+from sqlalchemy import event
+from fastapi import HTTPException
+
+import services.annotation_query_service as query_service_module
+import services.annotation_write_service as write_service_module
+import services.flag_service as flag_service_module
+import services.link_graph_service as link_graph_module
+from services.annotation_query_service import annotation_query_service
+from services.link_graph_service import LinkGraphService
+from schemas.annotations import AnnotationCreate, Body, TextTarget
+
+
+@pytest.fixture
+def flag_service(monkeypatch, AnnotationModel, admin_user, test_role_admin, db_session):
+    """FlagService bound to the SQLite test models, with an admin to call it."""
+    from services.flag_service import flag_service
+
+    monkeypatch.setattr(flag_service_module, "AnnotationModel", AnnotationModel)
+    monkeypatch.setattr(flag_service, "model", AnnotationModel)
+    monkeypatch.setattr(annotation_query_service, "model", AnnotationModel)
+    monkeypatch.setattr(annotation_query_service, "_flag_count_cache", {})
+    admin_user.roles.append(test_role_admin)
+    db_session.commit()
+    return flag_service
+
+
+@pytest.fixture
+def create_annotation(annotation_service, db_session, test_user):
+    """Factory that creates an annotation through the service."""
+
+    def _create(motivation, source, value=None, classroom_id=None):
+        return annotation_service.create(
+            db=db_session,
+            annotation=AnnotationCreate(
+                creator_id=test_user.id,
+                motivation=motivation,
+                body=Body(type="TextualBody", value=value or motivation, format="text/plain", language="en"),
+                target=[TextTarget(type="TextTarget", source=source, selector=None)],
+            ),
+            user=test_user,
+            classroom_id=classroom_id,
+        )
+
+    return _create
+
+
+@pytest.fixture
+def count_queries(db_session):
+    """Count the SQL statements run inside a block."""
+
+    class _Counter:
+        def __init__(self):
+            self.count = 0
+
+        def _before(self, *args, **kwargs):
+            self.count += 1
+
+        def __enter__(self):
+            event.listen(db_session.bind, "before_cursor_execute", self._before)
+            return self
+
+        def __exit__(self, *exc):
+            event.remove(db_session.bind, "before_cursor_execute", self._before)
+
+    return _Counter
+
+
+class TestListFlags:
+    """Test the moderation list of flags."""
+
+    def test_requires_admin(self, flag_service, db_session, test_user):
+        """Should return 403 for non-admins."""
+        with pytest.raises(HTTPException) as exc_info:
+            flag_service.list(db_session, None, test_user)
+        assert exc_info.value.status_code == 403
+
+    def test_single_query(
+        self,
+        flag_service,
+        db_session,
+        admin_user,
+        test_document_with_elements,
+        create_annotation,
+        count_queries,
+    ):
+        """Should load flags, flagged comments and both creators in one query."""
+        comments = [create_annotation("commenting", "DocumentElements/1") for _ in range(3)]
+        for comment in comments:
+            create_annotation("flagging", f"Annotation/{comment.id}", "Spam")
+        db_session.expire_all()
+        admin_user.roles  # the permission check is not what is being counted
+
+        with count_queries() as counter:
+            flags = flag_service.list(db_session, None, admin_user)
+
+        assert counter.count == 1
+        assert sorted(f["flagged_annotation"]["id"] for f in flags) == sorted(
+            c.id for c in comments
+        )
+        assert all(f["flagged_annotation"]["author"]["name"] for f in flags)
+        assert all(f["flagged_by"]["name"] for f in flags)
+
+    def test_grouped_by_flagged_annotation(
+        self,
+        flag_service,
+        db_session,
+        admin_user,
+        test_document_with_elements,
+        create_annotation,
+    ):
+        """Should return one entry per flagged comment with count and reasons."""
+        busy = create_annotation("commenting", "DocumentElements/1")
+        quiet = create_annotation("commenting", "DocumentElements/2")
+        create_annotation("flagging", f"Annotation/{busy.id}", "Spam")
+        create_annotation("flagging", f"Annotation/{busy.id}", "Rude")
+        create_annotation("flagging", f"Annotation/{busy.id}", "Spam")
+        create_annotation("flagging", f"Annotation/{quiet.id}", "Off topic")
+
+        entries = flag_service.list(db_session, None, admin_user, grouped=True)
+        by_id = {e["flagged_annotation"]["id"]: e for e in entries}
+
+        assert by_id[busy.id]["flag_count"] == 3
+        assert sorted(by_id[busy.id]["reasons"]) == ["Rude", "Spam"]
+        assert len(by_id[busy.id]["flags"]) == 3
+        assert by_id[quiet.id]["flag_count"] == 1
+        assert by_id[busy.id]["first_flagged_at"] == min(
+            f["flagged_at"] for f in by_id[busy.id]["flags"]
+        )
+
+
+class TestFlagCount:
+    """Test the cached pending-flag count."""
+
+    def test_cached_until_flag_written(
+        self,
+        flag_service,
+        annotation_service,
+        db_session,
+        admin_user,
+        test_document_with_elements,
+        create_annotation,
+        count_queries,
+    ):
+        """Should serve repeat reads from cache and recount after flag writes."""
+        comment = create_annotation("commenting", "DocumentElements/1")
+        flag = create_annotation("flagging", f"Annotation/{comment.id}")
+        assert flag_service.get_count(db_session, None, admin_user) == 1
+
+        admin_user.roles  # the permission check is not what is being counted
+        with count_queries() as counter:
+            assert flag_service.get_count(db_session, None, admin_user) == 1
+        assert counter.count == 0
+
+        second = create_annotation("flagging", f"Annotation/{comment.id}")
+        assert flag_service.get_count(db_session, None, admin_user) == 2
+
+        annotation_service.delete(db_session, second.id, None)
+        assert flag_service.get_count(db_session, None, admin_user) == 1
+
+        flag_service.unflag(db_session, flag.id, admin_user)
+        assert flag_service.get_count(db_session, None, admin_user) == 0
+
+    def test_remove_comment_invalidates(
+        self,
+        flag_service,
+        db_session,
+        admin_user,
+        test_document_with_elements,
+        create_annotation,
+    ):
+        """Should recount after a comment and its flags are removed."""
+        comment = create_annotation("commenting", "DocumentElements/1")
+        flag = create_annotation("flagging", f"Annotation/{comment.id}")
+        create_annotation("flagging", f"Annotation/{comment.id}")
+        assert flag_service.get_count(db_session, None, admin_user) == 2
+
+        flag_service.remove_comment(db_session, flag.id, admin_user)
+
+        assert flag_service.get_count(db_session, None, admin_user) == 0
+
+    def test_remove_comment_invalidates_every_classroom(
+        self,
+        flag_service,
+        db_session,
+        admin_user,
+        test_document_with_elements,
+        create_annotation,
+    ):
+        """Should recount every classroom scope the removed flags were in."""
+        comment = create_annotation("commenting", "DocumentElements/1")
+        flag = create_annotation("flagging", f"Annotation/{comment.id}")
+        create_annotation("flagging", f"Annotation/{comment.id}", classroom_id=7)
+        create_annotation("flagging", f"Annotation/{comment.id}", classroom_id=8)
+        other = create_annotation("commenting", "DocumentElements/2")
+        create_annotation("flagging", f"Annotation/{other.id}", classroom_id=8)
+        counts = {
+            classroom_id: flag_service.get_count(db_session, classroom_id, admin_user)
+            for classroom_id in (None, 7, 8)
+        }
+        assert counts == {None: 1, 7: 1, 8: 2}
+
+        flag_service.remove_comment(db_session, flag.id, admin_user)
+
+        assert {
+            classroom_id: flag_service.get_count(db_session, classroom_id, admin_user)
+            for classroom_id in (None, 7, 8)
+        } == {None: 0, 7: 0, 8: 1}
+
+    def test_expires_after_ttl(
+        self,
+        flag_service,
+        monkeypatch,
+        db_session,
+        admin_user,
+        test_document_with_elements,
+        create_annotation,
+    ):
+        """Should recount once the TTL passes, catching writes from other workers."""
+        comment = create_annotation("commenting", "DocumentElements/1")
+        assert flag_service.get_count(db_session, None, admin_user) == 0
+
+        # Stands in for a flag written by another worker
+        create_annotation("flagging", f"Annotation/{comment.id}")
+        monkeypatch.setattr(annotation_query_service, "_flag_count_cache", {None: (0.0, 0)})
+        monkeypatch.setattr(annotation_query_service, "FLAG_COUNT_TTL", 0)
+
+        assert flag_service.get_count(db_session, None, admin_user) == 1
+
+
+class TestRemoveComment:
+    """Test removing a flagged annotation together with its flags."""
+
+    def test_removed_link_leaves_link_views(
+        self,
+        flag_service,
+        annotation_service,
+        monkeypatch,
+        db_session,
+        admin_user,
+        test_user,
+        test_document_with_elements,
+        create_annotation,
+        AnnotationModel,
+        AnnotationTargetModel,
+        User,
+        DocumentModel,
+        DocumentElementModel,
+    ):
+        """Should drop the link from the link graph, linked text and target index."""
+        monkeypatch.setattr(query_service_module, "AnnotationModel", AnnotationModel)
+        monkeypatch.setattr(query_service_module, "User", User)
+        monkeypatch.setattr(query_service_module, "Document", DocumentModel)
+        monkeypatch.setattr(query_service_module, "DocumentElementModel", DocumentElementModel)
+        monkeypatch.setattr(annotation_query_service, "_linked_text_cache", {})
+        monkeypatch.setattr(link_graph_module, "DocumentElementModel", DocumentElementModel)
+        graph = LinkGraphService()
+        graph.model = AnnotationModel
+        monkeypatch.setattr(write_service_module, "link_graph_service", graph)
+
+        link = annotation_service.create(
+            db=db_session,
+            annotation=AnnotationCreate(
+                creator_id=test_user.id,
+                motivation="linking",
+                body=Body(type="TextualBody", value="link", format="text/plain", language="en"),
+                target=[
+                    TextTarget(type="TextTarget", source="DocumentElements/1", selector=None),
+                    TextTarget(type="TextTarget", source="DocumentElements/2", selector=None),
+                ],
+            ),
+            user=test_user,
+            classroom_id=None,
+        )
+        flag = create_annotation("flagging", f"Annotation/{link.id}")
+        assert graph.neighbours(db_session, 1)
+        assert annotation_query_service.get_linked_text_info(db_session, 1)["total_links"] == 1
+
+        flag_service.remove_comment(db_session, flag.id, admin_user)
+
+        assert graph.neighbours(db_session, 1) == []
+        assert annotation_query_service.get_linked_text_info(db_session, 1)["total_links"] == 0
+        assert db_session.query(AnnotationTargetModel).filter(
+            AnnotationTargetModel.annotation_id.in_([link.id, flag.id])
+        ).count() == 0
+
+
+class TestFindFlags:
+    """Test flag lookup by flagged annotation."""
+
+    def test_finds_only_flags_of_that_annotation(
+        self, flag_service, db_session, test_document_with_elements, create_annotation
+    ):
+        """Should ignore replies and flags on other comments."""
+        comment = create_annotation("commenting", "DocumentElements/1")
+        other = create_annotation("commenting", "DocumentElements/1")
+        flag = create_annotation("flagging", f"Annotation/{comment.id}")
+        create_annotation("replying", f"Annotation/{comment.id}")
+        create_annotation("flagging", f"Annotation/{other.id}")
+
+        found = flag_service._find_flags_for_annotation(db_session, comment.id)
+
+        assert [f.id for f in found] == [flag.id]
@@ -0,0 +1,285 @@
+# tests/unit/test_link_graph_service.py
+import pytest
+import threading
+import time
+from datetime import datetime
+from sqlalchemy.orm import sessionmaker
+
+import services.annotation_write_service as write_service_module
+import services.link_graph_service as link_graph_module
+from services.link_graph_service import LinkGraphService
+from services.annotation_target_service import annotation_target_service
+from schemas.annotations import AnnotationCreate, Body, TextTarget
+
+
+@pytest.fixture
+def graph(
+    db_session, monkeypatch, AnnotationModel, AnnotationTargetModel, DocumentElementModel
+):
+    """A fresh LinkGraphService bound to the SQLite test models."""
+    monkeypatch.setattr(link_graph_module, "DocumentElementModel", DocumentElementModel)
+    monkeypatch.setattr(annotation_target_service, "model", AnnotationTargetModel)
+
+    service = LinkGraphService()
+    service.model = AnnotationModel
+    return service
+
+
+@pytest.fixture
+def elements(db_session, test_document, test_document_with_elements, DocumentElementModel):
+    """Elements 1-3 in document 2 and element 4 in document 1."""
+    element = DocumentElementModel(
+        id=4, document_id=test_document.id, element_type="paragraph", content="Element 4"
+    )
+    db_session.add(element)
+    db_session.commit()
+    return {1: 2, 2: 2, 3: 2, 4: 1}
+
+
+@pytest.fixture
+def make_link(db_session, test_user, AnnotationModel):
+    """Factory that stores an annotation and its target index rows."""
+
+    def _make(element_ids, motivation="linking"):
+        annotation = AnnotationModel(
+            creator_id=test_user.id,
+            motivation=motivation,
+            body={"type": "TextualBody", "value": "link", "format": "text/plain", "language": "en"},
+            target=[
+                {"id": i, "type": "Target", "source": f"DocumentElements/{e}"}
+                for i, e in enumerate(element_ids)
+            ],
+            created=datetime.now(),
+            modified=datetime.now(),
+        )
+        db_session.add(annotation)
+        db_session.flush()
+        annotation_target_service.sync(db_session, annotation.id, annotation.target)
+        db_session.commit()
+        return annotation
+
+    return _make
+
+
+class TestLinkGraphBuild:
+    """Test building and querying the graph."""
+
+    def test_neighbours(self, graph, db_session, elements, make_link):
+        """Should list linked elements with their documents and linking annotations."""
+        link_a = make_link([1, 4])
+        link_b = make_link([1, 2])
+        make_link([1, 3], motivation="commenting")
+
+        result = graph.neighbours(db_session, 1)
+
+        assert result == [
+            {"element_id": 2, "document_id": 2, "annotation_ids": [link_b.id]},
+            {"element_id": 4, "document_id": 1, "annotation_ids": [link_a.id]},
+        ]
+
+    def test_expand_respects_hops(self, graph, db_session, elements, make_link):
+        """Should stop the breadth-first expansion at the requested depth."""
+        make_link([1, 2])
+        make_link([2, 3])
+        make_link([3, 4])
+
+        one_hop = graph.expand(db_session, 1, 1)
+        two_hops = graph.expand(db_session, 1, 2)
+
+        assert [n["element_id"] for n in one_hop["nodes"]] == [1, 2]
+        assert [(n["element_id"], n["distance"]) for n in two_hops["nodes"]] == [
+            (1, 0),
+            (2, 1),
+            (3, 2),
+        ]
+        assert [(e["source"], e["target"]) for e in two_hops["edges"]] == [(1, 2), (2, 3)]
+
+    def test_document_summary(self, graph, db_session, elements, make_link):
+        """Should count linked elements, links, and the documents they reach."""
+        cross = make_link([1, 4])
+        make_link([2, 3])
+
+        summary = graph.document_summary(db_session, 2)
+
+        assert summary["linked_element_count"] == 3
+        assert summary["link_count"] == 2
+        assert summary["linked_documents"] == [{"document_id": 1, "link_count": 1}]
+        assert graph.document_summary(db_session, 1)["linked_documents"] == [
+            {"document_id": 2, "link_count": 1}
+        ]
+        assert cross.id in graph.neighbours(db_session, 4)[0]["annotation_ids"]
+
+    def test_reads_do_not_rebuild(self, graph, db_session, elements, make_link, monkeypatch):
+        """Should answer repeated reads from memory."""
+        make_link([1, 2])
+        graph.neighbours(db_session, 1)
+
+        def fail(db):
+            raise AssertionError("graph rebuilt")
+
+        monkeypatch.setattr(graph, "build", fail)
+        assert len(graph.neighbours(db_session, 2)) == 1
+
+
+class TestLinkGraphMaintenance:
+    """Test incremental updates."""
+
+    def test_apply_annotation_updates_edges(self, graph, db_session, elements, make_link):
+        """Should replace an annotation's edges with its current targets."""
+        link = make_link([1, 2])
+        graph.neighbours(db_session, 1)
+
+        link.target = [*link.target, {"id": 9, "type": "Target", "source": "DocumentElements/4"}]
+        graph.apply_annotation(db_session, link)
+
+        neighbours = graph.neighbours(db_session, 1)
+        assert [n["element_id"] for n in neighbours] == [2, 4]
+        assert neighbours[1]["document_id"] == 1
+
+    def test_apply_annotation_reads_outside_lock(
+        self, graph, db_session, elements, make_link, monkeypatch
+    ):
+        """Should look up new elements' documents without blocking graph reads."""
+        link = make_link([1, 2])
+        graph.neighbours(db_session, 1)
+        link.target = [*link.target, {"id": 9, "type": "Target", "source": "DocumentElements/4"}]
+
+        lock_free = []
+        execute = db_session.execute
+
+        def probe():
+            acquired = graph._lock.acquire(blocking=False)
+            if acquired:
+                graph._lock.release()
+            lock_free.append(acquired)
+
+        def checked_execute(*args, **kwargs):
+            # Another thread stands in for a concurrent graph read
+            reader = threading.Thread(target=probe)
+            reader.start()
+            reader.join()
+            return execute(*args, **kwargs)
+
+        monkeypatch.setattr(db_session, "execute", checked_execute)
+        graph.apply_annotation(db_session, link)
+
+        assert lock_free == [True]
+        assert graph.neighbours(db_session, 4)[0]["element_id"] == 1
+
+    def test_apply_non_linking_annotation_removes_edges(
+        self, graph, db_session, elements, make_link
+    ):
+        """Should drop edges when an annotation stops being a link."""
+        link = make_link([1, 2])
+        graph.neighbours(db_session, 1)
+
+        link.motivation = "commenting"
+        graph.apply_annotation(db_session, link)
+
+        assert graph.neighbours(db_session, 1) == []
+        assert graph.document_summary(db_session, 2)["linked_element_count"] == 0
+
+    def test_remove_annotation_keeps_other_links(
+        self, graph, db_session, elements, make_link
+    ):
+        """Should only remove the edges of the removed annotation."""
+        first = make_link([1, 2])
+        second = make_link([1, 2])
+        graph.neighbours(db_session, 1)
+
+        graph.remove_annotation(first.id)
+
+        assert graph.neighbours(db_session, 1)[0]["annotation_ids"] == [second.id]
+
+    def test_annotation_service_keeps_graph_current(
+        self, graph, annotation_service, db_session, elements, test_user, monkeypatch
+    ):
+        """Should follow creates and deletes made through AnnotationService."""
+        monkeypatch.setattr(write_service_module, "link_graph_service", graph)
+        assert graph.neighbours(db_session, 1) == []
+
+        created = annotation_service.create(
+            db=db_session,
+            annotation=AnnotationCreate(
+                creator_id=test_user.id,
+                motivation="linking",
+                body=Body(type="TextualBody", value="link", format="text/plain", language="en"),
+                target=[
+                    TextTarget(type="TextTarget", source="DocumentElements/1", selector=None),
+                    TextTarget(type="TextTarget", source="DocumentElements/3", selector=None),
+                ],
+            ),
+            user=test_user,
+            classroom_id=None,
+        )
+        assert [n["element_id"] for n in graph.neighbours(db_session, 1)] == [3]
+
+        annotation_service.delete(db_session, created.id, None)
+        assert graph.neighbours(db_session, 1) == []
+
+
+class TestLinkGraphRebuild:
+    """Test startup and background rebuilds."""
+
+    def test_write_during_build_is_replayed(self, graph, db_session, elements, make_link):
+        """Should keep links written between the build's read and its swap."""
+        make_link([1, 2])
+        read_links = graph._read_links
+        late = {}
+
+        def _read_then_write(db):
+            rows = read_links(db)
+            late["link"] = make_link([1, 3])
+            graph.apply_annotation(db, late["link"])
+            return rows
+
+        graph._read_links = _read_then_write
+        graph.build(db_session)
+
+        assert [n["element_id"] for n in graph.neighbours(db_session, 1)] == [2, 3]
+        assert graph.neighbours(db_session, 3)[0]["annotation_ids"] == [late["link"].id]
+
+    def test_concurrent_first_reads_build_once(self, graph, db_session, elements):
+        """Should run a single build when several reads find no graph."""
+        builds = []
+
+        def _read(db):
+            builds.append(1)
+            time.sleep(0.05)
+            return []
+
+        graph._read_links = _read
+        threads = [
+            threading.Thread(target=graph.neighbours, args=(db_session, 1)) for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(builds) == 1
+
+    def test_start_builds_and_invalidate_rebuilds_in_background(
+        self, graph, engine, db_session, elements, make_link, monkeypatch
+    ):
+        """Should build at startup and leave rebuilds to the background thread."""
+        make_link([1, 2])
+        graph.start(sessionmaker(bind=engine))
+        try:
+            rebuilt = threading.Event()
+            build = graph.build
+
+            def _build(db):
+                build(db)
+                rebuilt.set()
+
+            monkeypatch.setattr(graph, "build", _build)
+            assert len(graph.neighbours(db_session, 1)) == 1
+
+            make_link([1, 3])
+            graph.invalidate()
+
+            assert rebuilt.wait(2)
+            assert len(graph.neighbours(db_session, 1)) == 2
+        finally:
+            graph.stop()
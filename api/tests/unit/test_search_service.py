@@ -0,0 +1,490 @@
+# tests/unit/test_search_service.py
+import json
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from unittest.mock import MagicMock
+from fastapi import HTTPException
+
+from services.search_service import search_service, SearchResultCache
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    """Start every test with an empty result cache."""
+    cache = SearchResultCache(100, 1024 * 1024, 60)
+    monkeypatch.setattr(search_service, "cache", cache)
+    return cache
+
+
+def _row(type_, score, row_id, sort_value=None):
+    return {
+        "annotation_id": row_id if type_ == "annotation" else None,
+        "element_id": row_id if type_ == "element" else None,
+        "type": type_,
+        "relevance_score": score,
+        "sort_value": score if sort_value is None else sort_value,
+        "created": datetime(2024, 1, 1),
+    }
+
+
+def _query(search_types, limit=50, sort_order="desc", sort_by="relevance", **extra):
+    return {
+        **extra,
+        "query": "genji",
+        "parsedQuery": [{"type": "term", "term": "genji", "group": None, "operator": None}],
+        "searchTypes": search_types,
+        "tags": [],
+        "sortBy": sort_by,
+        "sortOrder": sort_order,
+        "limit": limit,
+    }
+
+
+@pytest.fixture
+def per_type_rows(monkeypatch):
+    """
+    Serve canned rows per search type instead of running PGroonga SQL,
+    applying the keyset bounds and limit the way the SQL does.
+    """
+    rows = {}
+    page_queries = {
+        sql_query: (query_type, descending)
+        for (query_type, _, descending), sql_query in search_service.page_queries.items()
+    }
+
+    def _execute(bind, sql_query, params):
+        if sql_query in search_service.COUNT_QUERY_MAP.values():
+            return [{"count": 41}]
+        if sql_query in search_service.ESTIMATE_QUERY_MAP.values():
+            return [{"QUERY PLAN": '[{"Plan": {"Plan Rows": 40}}]'}]
+
+        query_type, descending = page_queries[sql_query]
+        page = []
+        for row in rows[query_type]:
+            key = (row["sort_value"], row["annotation_id"] or row["element_id"])
+            if params["after_value"] is not None:
+                after_value = params["after_value"]
+                if isinstance(row["sort_value"], datetime):
+                    after_value = datetime.fromisoformat(after_value)
+                after = (after_value, params["after_id"])
+                if (key >= after) if descending else (key <= after):
+                    continue
+            page.append(row)
+        return page[: params["limit"]]
+
+    monkeypatch.setattr(search_service, "_execute_search_query", _execute)
+    return rows
+
+
+class TestSearchPaging:
+    """Test cursor paging and counts."""
+
+    @pytest.mark.parametrize("sort_order", ["desc", "asc"])
+    def test_pages_cover_results_once(self, per_type_rows, sort_order):
+        """Should walk every row exactly once in global order, ties included."""
+        per_type_rows["documents"] = [
+            _row("element", score, row_id)
+            for score, row_id in [(9.0, 3), (5.0, 1), (5.0, 2), (2.0, 7)]
+        ]
+        per_type_rows["comments"] = [
+            _row("annotation", score, row_id)
+            for score, row_id in [(8.0, 10), (5.0, 4), (5.0, 6), (1.0, 2)]
+        ]
+        descending = sort_order == "desc"
+        for rows in per_type_rows.values():
+            rows.sort(
+                key=lambda r: (r["relevance_score"], r["annotation_id"] or r["element_id"]),
+                reverse=descending,
+            )
+
+        seen, cursor = [], None
+        while True:
+            result = search_service.search(
+                MagicMock(),
+                _query(["documents", "comments"], limit=3, sort_order=sort_order, cursor=cursor),
+            )
+            seen.extend(search_service._row_key(r) for r in result["results"])
+            cursor = result["next_cursor"]
+            if cursor is None:
+                break
+
+        assert len(seen) == 8
+        assert seen == sorted(seen, reverse=descending)
+
+    def test_counts(self, per_type_rows):
+        """Should sum exact counts, or planner estimates, across types."""
+        per_type_rows["documents"] = []
+        per_type_rows["comments"] = []
+        types = ["documents", "comments"]
+
+        exact = search_service.search(MagicMock(), _query(types, countMode="exact"))
+        estimated = search_service.search(MagicMock(), _query(types, countMode="estimated"))
+
+        assert (exact["total"], exact["total_estimated"]) == (82, False)
+        assert (estimated["total"], estimated["total_estimated"]) == (80, True)
+
+    @pytest.mark.parametrize("sort_order", ["desc", "asc"])
+    def test_pages_by_created(self, per_type_rows, sort_order):
+        """Should page by timestamp across types, with timestamps in the cursor."""
+        per_type_rows["documents"] = [
+            _row("element", 0.0, row_id, datetime(2024, 1, day))
+            for day, row_id in [(3, 1), (2, 5), (2, 6)]
+        ]
+        per_type_rows["annotations"] = [
+            _row("annotation", 0.0, row_id, datetime(2024, 1, day))
+            for day, row_id in [(4, 2), (2, 3), (1, 9)]
+        ]
+        descending = sort_order == "desc"
+        for rows in per_type_rows.values():
+            rows.sort(
+                key=lambda r: (r["sort_value"], r["annotation_id"] or r["element_id"]),
+                reverse=descending,
+            )
+
+        seen, cursor = [], None
+        while True:
+            result = search_service.search(
+                MagicMock(),
+                _query(
+                    ["documents", "annotations"],
+                    limit=2,
+                    sort_order=sort_order,
+                    sort_by="created",
+                    cursor=cursor,
+                ),
+            )
+            seen.extend(search_service._row_key(r) for r in result["results"])
+            cursor = result["next_cursor"]
+            if cursor is None:
+                break
+
+        assert len(seen) == 6
+        assert seen == sorted(seen, reverse=descending)
+
+    def test_invalid_cursor(self, per_type_rows):
+        """Should return 400 for a malformed cursor."""
+        with pytest.raises(HTTPException) as exc_info:
+            search_service.search(MagicMock(), _query(["documents"], cursor="nope"))
+
+        assert exc_info.value.status_code == 400
+
+
+class TestSortQueries:
+    """Test the per-sort SQL variants."""
+
+    def test_indexed_sort_orders_on_expression(self):
+        """Should order title, created and modified pages on the indexed expression."""
+        sql = str(search_service._get_query_for_type("documents", "created", True))
+
+        assert "ORDER BY coalesce(de.created, 'epoch'::timestamp) DESC, de.id DESC" in sql
+        assert "CASE WHEN :descending" not in sql
+
+    def test_variant_per_sort_and_direction(self):
+        """Should compile a distinct query for every sort field and direction."""
+        queries = {
+            str(search_service._get_query_for_type("comments", sort_by, descending))
+            for sort_by in ["relevance", "title", "created", "modified"]
+            for descending in [True, False]
+        }
+
+        assert len(queries) == 8
+
+    def test_unknown_sort(self, monkeypatch):
+        """Should return 400 for an unrecognized sortBy."""
+        monkeypatch.setattr(search_service, "_execute_search_query", MagicMock())
+
+        with pytest.raises(HTTPException) as exc_info:
+            search_service.search(MagicMock(), _query(["documents"], sort_by="length"))
+
+        assert exc_info.value.status_code == 400
+
+
+class TestSearch:
+    """Test concurrent multi-type search."""
+
+    def test_merges_types_by_relevance(self, per_type_rows):
+        """Should interleave types by score and apply limit to the merged list."""
+        per_type_rows["documents"] = [
+            _row("element", 9.0, 1),
+            _row("element", 4.0, 2),
+            _row("element", 1.0, 3),
+        ]
+        per_type_rows["comments"] = [
+            _row("annotation", 7.0, 4),
+            _row("annotation", 4.0, 5),
+        ]
+
+        result = search_service.search(MagicMock(), _query(["documents", "comments"], limit=4))
+
+        assert [(r["type"], r["relevance_score"]) for r in result["results"]] == [
+            ("element", 9.0),
+            ("annotation", 7.0),
+            ("element", 4.0),
+            ("annotation", 4.0),
+        ]
+        assert result["total_results"] == 4
+        assert result["next_cursor"] is not None
+        assert result["total"] is None
+
+    def test_ascending_merge(self, per_type_rows):
+        """Should merge ascending lists lowest score first."""
+        per_type_rows["documents"] = [_row("element", 1.0, 1), _row("element", 5.0, 2)]
+        per_type_rows["annotations"] = [_row("annotation", 2.0, 1)]
+
+        result = search_service.search(
+            MagicMock(), _query(["documents", "annotations"], sort_order="asc")
+        )
+
+        assert [r["relevance_score"] for r in result["results"]] == [1.0, 2.0, 5.0]
+
+    def test_queries_run_concurrently(self, monkeypatch):
+        """Should have every per-type query in flight at once."""
+        started = threading.Barrier(3, timeout=2)
+
+        def _execute(bind, sql_query, params):
+            started.wait()
+            return []
+
+        monkeypatch.setattr(search_service, "_execute_search_query", _execute)
+
+        result = search_service.search(
+            MagicMock(), _query(["documents", "comments", "annotations"])
+        )
+
+        assert result["results"] == []
+
+    def test_timeout(self, monkeypatch):
+        """Should return 504 when a query outlives the timeout."""
+        release = threading.Event()
+
+        def _execute(bind, sql_query, params):
+            release.wait(2)
+            return []
+
+        monkeypatch.setattr(search_service, "_execute_search_query", _execute)
+        monkeypatch.setattr(search_service, "QUERY_TIMEOUT_SECONDS", 0.05)
+        monkeypatch.setattr(search_service, "QUERY_TIMEOUT_GRACE_SECONDS", 0)
+
+        try:
+            with pytest.raises(HTTPException) as exc_info:
+                search_service.search(MagicMock(), _query(["documents"]))
+        finally:
+            release.set()
+
+        assert exc_info.value.status_code == 504
+
+    def test_queue_time_does_not_count(self, monkeypatch):
+        """Should time each query from when it starts, not from when it was queued."""
+        def _execute(bind, sql_query, params):
+            time.sleep(0.15)
+            return []
+
+        monkeypatch.setattr(search_service, "_execute_search_query", _execute)
+        monkeypatch.setattr(search_service, "_executor", ThreadPoolExecutor(max_workers=1))
+        monkeypatch.setattr(search_service, "QUERY_TIMEOUT_SECONDS", 0.3)
+        monkeypatch.setattr(search_service, "QUERY_TIMEOUT_GRACE_SECONDS", 0)
+
+        result = search_service.search(
+            MagicMock(), _query(["documents", "comments", "annotations"])
+        )
+
+        assert result["results"] == []
+
+    def test_queue_timeout_is_503(self, monkeypatch):
+        """Should give up with 503 when queries wait too long for a worker, and drop them."""
+        release = threading.Event()
+        ran = []
+
+        def _execute(bind, sql_query, params):
+            ran.append(sql_query)
+            release.wait(2)
+            return []
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        monkeypatch.setattr(search_service, "_execute_search_query", _execute)
+        monkeypatch.setattr(search_service, "_executor", executor)
+        monkeypatch.setattr(search_service, "QUEUE_TIMEOUT_SECONDS", 0.05)
+
+        try:
+            with pytest.raises(HTTPException) as exc_info:
+                search_service.search(MagicMock(), _query(["documents", "comments"]))
+        finally:
+            release.set()
+            executor.shutdown(wait=True)
+
+        assert exc_info.value.status_code == 503
+        assert len(ran) == 1
+
+    def test_statement_timeout_is_504(self, monkeypatch):
+        """Should map a server-side statement timeout to 504."""
+
+        def _execute(bind, sql_query, params):
+            raise RuntimeError("canceling statement due to statement timeout")
+
+        monkeypatch.setattr(search_service, "_execute_search_query", _execute)
+
+        with pytest.raises(HTTPException) as exc_info:
+            search_service.search(MagicMock(), _query(["documents"]))
+
+        assert exc_info.value.status_code == 504
+
+    def test_unknown_type_runs_nothing(self, monkeypatch):
+        """Should reject an unrecognized type before starting any query."""
+        execute = MagicMock(return_value=[])
+        monkeypatch.setattr(search_service, "_execute_search_query", execute)
+
+        with pytest.raises(HTTPException) as exc_info:
+            search_service.search(MagicMock(), _query(["documents", "elements"]))
+
+        assert exc_info.value.status_code == 400
+        execute.assert_not_called()
+
+
+class TestSearchCache:
+    """Test the search result cache."""
+
+    @pytest.fixture
+    def counted_rows(self, per_type_rows, monkeypatch):
+        """Count the per-type queries that actually run."""
+        calls = []
+        execute = search_service._execute_search_query
+
+        def _execute(bind, sql_query, params):
+            calls.append(sql_query)
+            return execute(bind, sql_query, params)
+
+        monkeypatch.setattr(search_service, "_execute_search_query", _execute)
+        per_type_rows["documents"] = [_row("element", 3.0, 1)]
+        per_type_rows["comments"] = [_row("annotation", 2.0, 1)]
+        return calls
+
+    def test_hit_for_normalized_query(self, counted_rows, fresh_cache):
+        """Should serve a repeat search, differing only in whitespace, from cache."""
+        first = search_service.search(MagicMock(), _query(["documents"]))
+        query = _query(["documents"])
+        query["parsedQuery"][0]["term"] = "  genji "
+        second = search_service.search(MagicMock(), query)
+
+        assert len(counted_rows) == 1
+        assert second["results"] == first["results"]
+        assert second["query"] is query
+        assert (fresh_cache.stats()["hits"], fresh_cache.stats()["misses"]) == (1, 1)
+
+    def test_scope_is_part_of_key(self, counted_rows):
+        """Should not share results across classrooms or sort orders."""
+        search_service.search(MagicMock(), _query(["comments"]), classroom_id=1)
+        search_service.search(MagicMock(), _query(["comments"]), classroom_id=2)
+        search_service.search(MagicMock(), _query(["comments"], sort_order="asc"), classroom_id=1)
+
+        assert len(counted_rows) == 3
+
+    def test_annotation_writes_invalidate_annotation_searches(self, counted_rows):
+        """Should recompute searches over annotations, but not element-only ones."""
+        search_service.search(MagicMock(), _query(["documents"]))
+        search_service.search(MagicMock(), _query(["comments"]))
+
+        search_service.annotations_changed(["upvoting"])
+        search_service.search(MagicMock(), _query(["comments"]))
+        assert len(counted_rows) == 2
+
+        search_service.annotations_changed(["commenting"])
+        search_service.search(MagicMock(), _query(["documents"]))
+        search_service.search(MagicMock(), _query(["comments"]))
+        assert len(counted_rows) == 3
+
+        search_service.documents_changed()
+        search_service.search(MagicMock(), _query(["documents"]))
+        assert len(counted_rows) == 4
+
+    def test_lru_byte_budget_and_ttl(self):
+        """Should evict least recently used entries past the budget, and expire by TTL."""
+        result = {"results": ["x" * 100]}
+        size = len(json.dumps(result))
+        cache = SearchResultCache(max_entries=10, max_bytes=size * 4, ttl_seconds=60)
+        kinds = (SearchResultCache.DOCUMENTS,)
+
+        for key in "abcd":
+            cache.put((key,), cache.generations(kinds), result)
+        assert cache.get(("a",), kinds) == result
+        cache.put(("e",), cache.generations(kinds), result)
+
+        assert cache.get(("b",), kinds) is None
+        assert cache.get(("a",), kinds) == result
+        assert cache.stats()["evictions"] == 1
+        assert cache.stats()["bytes"] == size * 4
+
+        cache.ttl_seconds = 0
+        assert cache.get(("a",), kinds) is None
+
+
+class TestSearchSnippets:
+    """Test keyword-in-context snippets."""
+
+    def test_snippet_offsets(self):
+        """Should strip keyword markup, unescape text and record keyword offsets."""
+        snippet, highlights = search_service._snippet(
+            [
+                'The <span class="keyword">Genji</span> &amp; Murasaki',
+                'visits <span class="keyword">Genji</span>',
+            ]
+        )
+
+        assert snippet == "The Genji & Murasaki … visits Genji"
+        assert [snippet[start:end] for start, end in highlights] == ["Genji", "Genji"]
+
+    def test_search_returns_snippets(self, per_type_rows):
+        """Should replace content with snippets, falling back to the content preview."""
+        per_type_rows["documents"] = [
+            {
+                **_row("element", 2.0, 1),
+                "content": "Genji was",
+                "snippets_html": ['<span class="keyword">Genji</span> was'],
+            },
+            {**_row("element", 1.0, 2), "content": "Genj", "snippets_html": []},
+        ]
+
+        result = search_service.search(MagicMock(), _query(["documents"], snippets=True))
+
+        assert [(r["content"], r["snippet"], r["highlights"]) for r in result["results"]] == [
+            (None, "Genji was", [[0, 5]]),
+            (None, "Genj", []),
+        ]
+        assert all("snippets_html" not in r for r in result["results"])
+
+
+class TestSearchTags:
+    """Test tag filters."""
+
+    @pytest.mark.parametrize("operator,required", [("OR", 1), ("AND", 2)])
+    def test_tag_params(self, monkeypatch, operator, required):
+        """Should pass normalized tags and how many of them a result needs."""
+        execute = MagicMock(return_value=[])
+        monkeypatch.setattr(search_service, "_execute_search_query", execute)
+
+        search_service.search(
+            MagicMock(),
+            {**_query(["documents"]), "tags": [" Poem", "exile", "poem"], "tagOperator": operator},
+        )
+
+        params = execute.call_args.args[2]
+        assert params["tags"] == ["exile", "poem"]
+        assert (params["tag_count"], params["tag_required"]) == (2, required)
+
+    def test_tags_are_part_of_key(self, monkeypatch):
+        """Should cache per tag filter, and drop element searches on tag writes."""
+        execute = MagicMock(return_value=[])
+        monkeypatch.setattr(search_service, "_execute_search_query", execute)
+        tagged = {**_query(["documents"]), "tags": ["poem"]}
+
+        search_service.search(MagicMock(), _query(["documents"]))
+        search_service.search(MagicMock(), tagged)
+        search_service.search(MagicMock(), {**tagged, "tagOperator": "AND"})
+        assert execute.call_count == 3
+
+        search_service.annotations_changed(["tagging"])
+        search_service.search(MagicMock(), _query(["documents"]))
+        search_service.search(MagicMock(), tagged)
+        assert execute.call_count == 4